@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third party apps
     "rest_framework",
     "rest_framework.authtoken",
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
     # Project apps
     "core",
     "users",
+    "store",
 ]
 
 CORS_ALLOWED_ORIGINS = []
@@ -66,6 +68,8 @@ CORS_ALLOWED_ORIGINS.extend(
 CORS_ALLOW_CREDENTIALS = True
 
 MIDDLEWARE = [
+    "core.middleware.metrics_middleware",
+    "core.middleware.replica_routing_middleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -76,6 +80,14 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Addresses or networks of the clients allowed to scrape /metrics, only the loopback addresses by default.
+METRICS_ALLOWED_IPS = list(
+    filter(
+        None,
+        os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(","),
+    )
+)
+
 ROOT_URLCONF = "app.urls"
 
 TEMPLATES = [
@@ -110,6 +122,38 @@ DATABASES = {
     }
 }
 
+# Read replicas as comma separated HOST or HOST/NAME entries, the other connection settings are the primary's.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.environ.get("DB_REPLICAS", "").split(","))):
+    host, _, name = replica.strip().partition("/")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "NAME": name or DATABASES["default"]["NAME"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{index}")
+
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+# How long reads of a client that wrote go to the primary, covering the replication lag.
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+# 0 turns the response cache of anonymous store reads off.
+STORE_RESPONSE_CACHE_TIMEOUT = int(os.environ.get("STORE_RESPONSE_CACHE_TIMEOUT", 300))
+# ETag and Last-Modified validators of store reads, computed with an aggregate query per request.
+STORE_CONDITIONAL_GET = bool(int(os.environ.get("STORE_CONDITIONAL_GET", 1)))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -130,6 +174,31 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/4.1/topics/auth/passwords/
+
+# Hashes of the other hashers are still accepted, and replaced by one of PASSWORD_HASHER after a login.
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "scrypt")
+AVAILABLE_PASSWORD_HASHERS = {
+    "scrypt": "users.hashers.ScryptPasswordHasher",
+    # Needs the argon2-cffi package.
+    "argon2": "users.hashers.Argon2PasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    AVAILABLE_PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(hasher for name, hasher in AVAILABLE_PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get("PASSWORD_SCRYPT_WORK_FACTOR", 2**14))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get("PASSWORD_ARGON2_MEMORY_COST", 102400))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get("PASSWORD_ARGON2_PARALLELISM", 8))
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", os.cpu_count() or 1))
+
+AUTHENTICATION_BACKENDS = ["users.backends.PooledModelBackend"]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
 
@@ -159,10 +228,20 @@ AUTH_USER_MODEL = "core.User"
 
 
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": ("dj_rest_auth.jwt_auth.JWTCookieAuthentication",),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("users.authentication.CachedJWTCookieAuthentication",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 8,
+    # Number of trusted proxies appending to X-Forwarded-For, throttles key on REMOTE_ADDR without it.
+    "NUM_PROXIES": int(os.environ["NUM_PROXIES"]) if os.environ.get("NUM_PROXIES") else None,
+    "DEFAULT_THROTTLE_RATES": {
+        "register": os.environ.get("REGISTER_THROTTLE_RATE", "20/hour"),
+        "store_list": os.environ.get("STORE_LIST_THROTTLE_RATE", "600/minute"),
+        "store_search": os.environ.get("STORE_SEARCH_THROTTLE_RATE", "120/minute"),
+        "store_write": os.environ.get("STORE_WRITE_THROTTLE_RATE", "120/minute"),
+        "store_upload_image": os.environ.get("STORE_UPLOAD_IMAGE_THROTTLE_RATE", "60/minute"),
+        "store_upload_chunk": os.environ.get("STORE_UPLOAD_CHUNK_THROTTLE_RATE", "600/minute"),
+    },
 }
 
 REST_AUTH = {
@@ -1,4 +1,4 @@
-from core.models import Category, Product, User
+from core.models import Category, ImageJob, Product, User
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
@@ -7,6 +7,22 @@ class UserAdmin(UserAdmin):
     add_fieldsets = ((None, {"classes": ("wide",), "fields": ("username", "email", "password1", "password2")}),)
 
 
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ("name", "category", "author", "price", "province", "created")
+    list_select_related = ("category", "author")
+
+
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ("name", "product_count", "min_price", "max_price")
+    readonly_fields = Category.stats_fields
+
+
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ("source", "product", "status", "attempts", "updated")
+    list_select_related = ("product",)
+
+
 admin.site.register(User, UserAdmin)
-admin.site.register(Product)
-admin.site.register(Category)
+admin.site.register(Product, ProductAdmin)
+admin.site.register(Category, CategoryAdmin)
+admin.site.register(ImageJob, ImageJobAdmin)
@@ -0,0 +1,65 @@
+"""
+Helpers shared by the in-process load test and benchmark commands.
+"""
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.test import override_settings
+
+
+def split(total, parts):
+    """Split a number of requests as evenly as possible between workers."""
+    parts = min(total, parts)
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def load_settings():
+    """Return `override_settings` for sending load through the test clients.
+
+    The test clients send requests for the testserver host, and all of them come from one address,
+    so throttling is turned off.
+    """
+    return override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}},
+    )
+
+
+def run_threads(worker, requests, concurrency):
+    """Run `worker(count)` in `concurrency` threads and return the concatenated results and the elapsed time.
+
+    Every thread closes its database connections once its worker returns.
+    """
+
+    def run(count):
+        try:
+            return worker(count)
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        chunks = list(executor.map(run, split(requests, concurrency)))
+    return [result for chunk in chunks for result in chunk], time.perf_counter() - started
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
+
+
+def summarize(results, elapsed):
+    """Return the throughput, errors and latency percentiles in milliseconds of `(status_code, latency)` results."""
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "requests": len(results),
+        "errors": sum(1 for status_code, _ in results if status_code >= 400),
+        "throughput": round(len(results) / elapsed, 2),
+        "mean": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50": round(percentile(latencies, 50) * 1000, 3),
+        "p95": round(percentile(latencies, 95) * 1000, 3),
+        "p99": round(percentile(latencies, 99) * 1000, 3),
+    }
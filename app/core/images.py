@@ -0,0 +1,137 @@
+"""
+Product image variants, generated in the background by the process_images worker.
+"""
+import io
+import os
+from datetime import timedelta
+
+from core.models import ImageJob, Product
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+VARIANT_SIZES = {
+    "thumbnail": (200, 200),
+    "medium": (800, 800),
+    "large": (1600, 1600),
+}
+VARIANT_FORMATS = {
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+}
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=10)
+
+
+def variant_file_path(source, variant, extension):
+    """Generate file path for an image variant, grouped by the source image."""
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join("uploads", "product", "variants", stem, f"{variant}.{extension}")
+
+
+def generate_variants(source, storage=default_storage):
+    """Decode the source image once and store its resized variants without metadata.
+
+    Returns the storage names of the variants by variant and format.
+    """
+    with storage.open(source, "rb") as file:
+        with Image.open(file) as original:
+            # Applying the orientation first, as the EXIF data holding it isn't kept.
+            image = ImageOps.exif_transpose(original)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    variants = {}
+    for variant, size in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.Resampling.LANCZOS)
+        flattened = resized.convert("RGB") if resized.mode == "RGBA" else resized
+        variants[variant] = {}
+        for name, (image_format, extension, options) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            (resized if image_format == "WEBP" else flattened).save(buffer, format=image_format, **options)
+            path = variant_file_path(source, variant, extension)
+            storage.delete(path)
+            variants[variant][name] = storage.save(path, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def variant_names(source):
+    """Return the storage names of every variant of the source image."""
+    return [
+        variant_file_path(source, variant, extension)
+        for variant in VARIANT_SIZES
+        for _, extension, _ in VARIANT_FORMATS.values()
+    ]
+
+
+def release_image(name):
+    """Delete an image and its variants once no product refers to it anymore."""
+    storage = Product._meta.get_field("image").storage
+    if storage.release(name, Product.objects.filter(image=name).exists):
+        for variant_name in variant_names(name):
+            default_storage.delete(variant_name)
+
+
+def enqueue_image_processing(product):
+    """Queue generating variants of the current product image, unless a product sharing it has them already.
+
+    Returns the queued job, or None when the variants were reused.
+    """
+    shared = Product.objects.filter(image=product.image.name).exclude(image_variants={}).exclude(pk=product.pk)
+    variants = shared.values_list("image_variants", flat=True).first()
+    if variants is not None:
+        product.image_variants = variants
+        product.save(update_fields=["image_variants", "updated"])
+        return None
+    return ImageJob.objects.create(product=product, source=product.image.name)
+
+
+def claim_image_job():
+    """Mark the oldest claimable job as processing and return it, or None when the queue is empty.
+
+    Jobs left processing by a crashed worker become claimable again after `STALE_AFTER`.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            ImageJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImageJob.PENDING) | Q(status=ImageJob.PROCESSING, updated__lt=now - STALE_AFTER),
+            )
+            .order_by("created")
+            .first()
+        )
+        if job is None:
+            return None
+        ImageJob.objects.filter(pk=job.pk).update(status=ImageJob.PROCESSING, attempts=F("attempts") + 1, updated=now)
+    job.refresh_from_db()
+    return job
+
+
+def process_image_job(job):
+    """Generate the variants of a claimed job and record them on its product."""
+    try:
+        variants = generate_variants(job.source)
+    except Exception as exc:
+        job.status = ImageJob.FAILED if job.attempts >= MAX_ATTEMPTS else ImageJob.PENDING
+        job.error = f"{type(exc).__name__}: {exc}"
+        job.save(update_fields=["status", "error", "updated"])
+        return False
+
+    with transaction.atomic():
+        product = Product.objects.select_for_update().filter(pk=job.product_id).first()
+        current = product is not None and product.image.name == job.source
+        if current:
+            product.image_variants = variants
+            product.save(update_fields=["image_variants", "updated"])
+        job.status = ImageJob.DONE
+        job.error = ""
+        job.save(update_fields=["status", "error", "updated"])
+
+    if not current:
+        # The image was replaced or removed while processing, so the variants may be orphaned.
+        release_image(job.source)
+    return True
@@ -0,0 +1,83 @@
+"""
+Django command to measure the login throughput of the seeded benchmark users.
+"""
+import os
+import time
+
+from core.benchmarks import run_threads, summarize
+from core.management.commands.seed_store import BENCHMARK_PASSWORD, BENCHMARK_PREFIX
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    """Django command to report logins per second and per core."""
+
+    help = (
+        "Log the users generated by seed_store in through the login API from concurrent clients in process, and "
+        "report logins per second, logins per second per core and latency percentiles. With --hasher the users' "
+        "passwords are first hashed with that hasher, and are replaced by the preferred hasher on later logins."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Number of logins.")
+        parser.add_argument(
+            "--concurrency", type=int, default=os.cpu_count() or 1, help="Number of concurrent clients."
+        )
+        parser.add_argument(
+            "--hasher", choices=settings.AVAILABLE_PASSWORD_HASHERS, help="Default: the preferred password hasher."
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive.")
+
+        UserModel = get_user_model()
+        users = UserModel.objects.filter(username__startswith=f"{BENCHMARK_PREFIX}-user-")
+        usernames = list(users.order_by("pk").values_list("username", flat=True))
+        if not usernames:
+            raise CommandError("There are no benchmark users, run seed_store first.")
+
+        hasher = options["hasher"] or settings.PASSWORD_HASHER
+        hashers = settings.AVAILABLE_PASSWORD_HASHERS
+        password_hashers = [hashers[hasher], *(path for name, path in hashers.items() if name != hasher)]
+        # The test clients send requests for the testserver host.
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], PASSWORD_HASHERS=password_hashers
+        ):
+            if options["hasher"]:
+                try:
+                    # Every user gets the same hash, hashing it once keeps this fast.
+                    users.update(password=make_password(BENCHMARK_PASSWORD))
+                except ValueError as exc:
+                    # Raised when the library of the hasher isn't installed.
+                    raise CommandError(exc)
+            results, elapsed = run_threads(self.get_worker(usernames), options["requests"], options["concurrency"])
+
+        summary = summarize(results, elapsed)
+        cores = min(options["concurrency"], settings.PASSWORD_HASHING_WORKERS, os.cpu_count() or 1)
+        self.stdout.write(
+            f"login ({hasher}): {summary['throughput']:.1f} logins/s, {summary['throughput'] / cores:.1f} logins/s "
+            f"per core on {cores} cores, p50 {summary['p50']:.1f}ms, p95 {summary['p95']:.1f}ms, "
+            f"{summary['errors']} errors"
+        )
+
+    def get_worker(self, usernames):
+        url = reverse("users:rest_login")
+
+        def worker(count):
+            client = Client()
+            results = []
+            for i in range(count):
+                payload = {"username": usernames[i % len(usernames)], "password": BENCHMARK_PASSWORD}
+                started = time.perf_counter()
+                res = client.post(url, payload, content_type="application/json")
+                results.append((res.status_code, time.perf_counter() - started))
+            return results
+
+        return worker
@@ -0,0 +1,107 @@
+"""
+Django command to benchmark the precompiled product serializers against the DRF field machinery.
+"""
+import time
+from decimal import Decimal
+from unittest.mock import patch
+
+from core.models import Category, Product
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from store.representation import PrecompiledRepresentationMixin
+from store.serializers import ProductListSerializer, ProductSerializer
+
+
+class Command(BaseCommand):
+    """Django command to time serializing in-memory products with and without the precompiled representation."""
+
+    help = "Serialize unsaved products with the DRF fields and the precompiled product serializers and compare."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000, help="Number of products to serialize.")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of runs, the fastest one is reported.")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        # Absolute URLs are built from the host of the test request.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            self.benchmark(options)
+
+    def benchmark(self, options):
+        products = build_products(options["count"])
+        context = {"request": APIRequestFactory().get("/api/store/products/")}
+
+        for serializer_class in (ProductListSerializer, ProductSerializer):
+            plan = serializer_class.get_representation_plan()
+            rows = [to_row(plan, product, {}) for product in products]
+
+            with patch.object(
+                PrecompiledRepresentationMixin, "to_representation", serializers.Serializer.to_representation
+            ):
+                drf_time, expected = self.measure(serializer_class, products, context, options["repeat"])
+            instances_time, data = self.measure(serializer_class, products, context, options["repeat"])
+            rows_time, row_data = self.measure(serializer_class, rows, context, options["repeat"])
+
+            renderer = JSONRenderer()
+            if not renderer.render(expected) == renderer.render(data) == renderer.render(row_data):
+                raise CommandError(f"{serializer_class.__name__} output differs from the DRF fields.")
+
+            self.stdout.write(
+                f"{serializer_class.__name__}: DRF fields {drf_time * 1000:.0f}ms, "
+                f"instances {instances_time * 1000:.0f}ms ({drf_time / instances_time:.1f}x), "
+                f"rows {rows_time * 1000:.0f}ms ({drf_time / rows_time:.1f}x)"
+            )
+
+    def measure(self, serializer_class, items, context, repeat):
+        best = None
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            data = serializer_class(items, many=True, context=context).data
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
+
+
+def build_products(count):
+    """Return unsaved products with an author and a category, half of them with an image."""
+    now = timezone.now()
+    author = get_user_model()(id=1, username="benchmark", date_joined=now, last_login=now)
+    category = Category(name="electronics")
+    products = []
+    for i in range(count):
+        image = f"uploads/product/{i % 256:02x}/{i:064x}.jpg" if i % 2 else None
+        products.append(
+            Product(
+                id=i + 1,
+                category=category,
+                author=author,
+                name=f"Product {i}",
+                price=Decimal(f"{i % 1000}.99"),
+                description="Sample description",
+                created=now,
+                updated=now,
+                province="Lublin",
+                phone_number="123456789",
+                image=image,
+                image_variants={"thumbnail": {"jpeg": image, "webp": image}} if image else {},
+            )
+        )
+    return products
+
+
+def to_row(plan, instance, row):
+    """Return the `.values()` row of an instance for a representation plan."""
+    for _, getter, row_key, _, nested in plan.fields:
+        value = getter(instance)
+        if nested is not None:
+            row[row_key] = value.pk
+            to_row(nested, value, row)
+        else:
+            row[row_key] = value
+    return row
@@ -0,0 +1,233 @@
+"""
+Django command to benchmark the store API scenarios against the seeded benchmark data.
+"""
+import contextlib
+import io
+import itertools
+import json
+import platform
+import random
+import subprocess
+import time
+
+import django
+from core.benchmarks import load_settings, run_threads, summarize
+from core.management.commands.seed_store import BENCHMARK_PREFIX
+from core.models import Category, ImageJob, Product
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+
+SEARCH_TERMS = ("bike", "lamp", "vintage", "wireless", "camera", "chair")
+ORDERINGS = ("name", "-name", "price", "-price", "created", "-created", "province")
+# Metrics where a higher value is a regression, and the ones where a lower value is.
+HIGHER_IS_WORSE = ("p50", "p99")
+LOWER_IS_WORSE = ("throughput",)
+
+
+class Command(BaseCommand):
+    """Django command to measure the latency and throughput of store API scenarios."""
+
+    help = (
+        "Run store API scenarios in process at a given concurrency against the data generated by seed_store, "
+        "write the throughput and latency percentiles as JSON and optionally compare them with a previous run. "
+        "Reads are sent by authenticated users unless --anonymous is given, so the response cache doesn't hide "
+        "the cost of the database and the serializers. The products created and the images uploaded by the create "
+        "and upload-image scenarios are removed after each run, so every run measures the same data set."
+    )
+
+    scenarios = ("list", "search", "filter", "order", "detail", "create", "my-products", "upload-image")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", choices=self.scenarios, action="append", help="Default: all.")
+        parser.add_argument("--requests", type=int, default=200, help="Number of measured requests per scenario.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent clients.")
+        parser.add_argument("--warmup", type=int, default=20, help="Number of unmeasured requests per scenario.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed of the request parameters.")
+        parser.add_argument("--anonymous", action="store_true", help="Send read requests without authentication.")
+        parser.add_argument("--label", help="Label of the results, by default the current git commit.")
+        parser.add_argument("--output", help="Write the results to this JSON file instead of the standard output.")
+        parser.add_argument("--compare", help="JSON results of a previous run to compare with.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.1,
+            help="Relative change of p50, p99 or throughput reported as a regression when comparing.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options["requests"] < 1 or options["concurrency"] < 1 or options["warmup"] < 0:
+            raise CommandError("--requests and --concurrency must be positive.")
+
+        users = list(get_user_model().objects.filter(username__startswith=f"{BENCHMARK_PREFIX}-user-").order_by("pk"))
+        self.product_ids = list(Product.objects.filter(author__in=users).values_list("pk", flat=True))
+        self.categories = list(
+            Category.objects.filter(name__startswith=f"{BENCHMARK_PREFIX}-").values_list("name", flat=True)
+        )
+        if not users or not self.product_ids:
+            raise CommandError("There is no benchmark data, run seed_store first.")
+        self.owned_product_ids = {
+            user.pk: list(Product.objects.filter(author=user).values_list("pk", flat=True)[:100]) for user in users
+        }
+        # The upload-image scenario needs a product of the user, small data sets leave some users without any.
+        self.users = [user for user in users if self.owned_product_ids[user.pk]]
+
+        results = {
+            "label": options["label"] or get_git_commit(),
+            "created": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": settings.DATABASES["default"]["ENGINE"],
+            },
+            "options": {key: options[key] for key in ("requests", "concurrency", "warmup", "seed", "anonymous")},
+            "dataset": {"users": len(users), "categories": len(self.categories), "products": len(self.product_ids)},
+            "scenarios": {},
+        }
+        with load_settings():
+            for scenario in options["scenario"] or self.scenarios:
+                with self.restore_data(scenario):
+                    results["scenarios"][scenario] = self.run_scenario(scenario, options)
+                self.stderr.write(self.format_summary(scenario, results["scenarios"][scenario]))
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            with open(options["compare"]) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = self.compare(baseline, results, options["tolerance"])
+            if regressions:
+                raise CommandError(f"{regressions} regressions compared to {baseline.get('label')}.")
+
+    def run_scenario(self, scenario, options):
+        request = getattr(self, f"request_{scenario.replace('-', '_')}")
+        authenticated = scenario in ("create", "my-products", "upload-image") or not options["anonymous"]
+        seed = options["seed"]
+
+        def worker(count, worker_index):
+            rng = random.Random(f"{seed}-{scenario}-{worker_index}")
+            user = self.users[worker_index % len(self.users)]
+            client = Client()
+            if authenticated:
+                client.cookies[settings.REST_AUTH["JWT_AUTH_COOKIE"]] = str(AccessToken.for_user(user))
+            results = []
+            for _ in range(count):
+                started = time.perf_counter()
+                res = request(client, rng, user)
+                results.append((res.status_code, time.perf_counter() - started))
+            return results
+
+        if options["warmup"]:
+            worker_indexes = itertools.count()
+            run_threads(lambda count: worker(count, next(worker_indexes)), options["warmup"], options["concurrency"])
+        worker_indexes = itertools.count()
+        results, elapsed = run_threads(
+            lambda count: worker(count, next(worker_indexes)), options["requests"], options["concurrency"]
+        )
+        return summarize(results, elapsed)
+
+    @contextlib.contextmanager
+    def restore_data(self, scenario):
+        """Remove the products created and restore the images replaced by a scenario once it ran."""
+        if scenario not in ("create", "upload-image"):
+            yield
+            return
+        last_product = Product.objects.aggregate(pk=Max("pk"))["pk"] or 0
+        last_job = ImageJob.objects.aggregate(pk=Max("pk"))["pk"] or 0
+        owned = [pk for product_ids in self.owned_product_ids.values() for pk in product_ids]
+        rows = Product.objects.filter(pk__in=owned).values_list("pk", "image", "image_variants")
+        images = {pk: (image, variants) for pk, image, variants in rows}
+        try:
+            yield
+        finally:
+            # Deleting and saving models releases the uploaded images and bumps the cache versions.
+            Product.objects.filter(author__in=self.users, pk__gt=last_product).delete()
+            ImageJob.objects.filter(pk__gt=last_job).delete()
+            for product in Product.objects.filter(pk__in=owned):
+                if product.image.name != images[product.pk][0]:
+                    product.image, product.image_variants = images[product.pk]
+                    product.save(update_fields=["image", "image_variants", "updated"])
+
+    def request_list(self, client, rng, user):
+        last_page = max(1, len(self.product_ids) // settings.REST_FRAMEWORK["PAGE_SIZE"])
+        return client.get(reverse("store:products-list"), {"page": rng.randint(1, min(last_page, 50))})
+
+    def request_search(self, client, rng, user):
+        return client.get(reverse("store:products-list"), {"search": rng.choice(SEARCH_TERMS)})
+
+    def request_filter(self, client, rng, user):
+        low = rng.randint(1, 4000)
+        params = {"category__name": rng.choice(self.categories), "price__gt": low, "price__lt": low + 1000}
+        return client.get(reverse("store:products-list"), params)
+
+    def request_order(self, client, rng, user):
+        return client.get(reverse("store:products-list"), {"ordering": rng.choice(ORDERINGS)})
+
+    def request_detail(self, client, rng, user):
+        return client.get(reverse("store:products-detail", args=[rng.choice(self.product_ids)]))
+
+    def request_create(self, client, rng, user):
+        payload = {
+            "category": rng.choice(self.categories),
+            "name": "Benchmark product",
+            "price": f"{rng.randint(1, 5000)}.99",
+            "description": "Created by benchmark_store.",
+            "province": "Masovia",
+            "phone_number": "123456789",
+        }
+        return client.post(reverse("store:products-list"), payload, content_type="application/json")
+
+    def request_my_products(self, client, rng, user):
+        return client.get(reverse("store:products-my-products"))
+
+    def request_upload_image(self, client, rng, user):
+        image_file = io.BytesIO()
+        Image.new("RGB", (64, 64), tuple(rng.randrange(256) for _ in range(3))).save(image_file, format="JPEG")
+        image_file.name = "benchmark.jpg"
+        image_file.seek(0)
+        product_id = rng.choice(self.owned_product_ids[user.pk])
+        return client.post(reverse("store:products-upload-image", args=[product_id]), {"image": image_file})
+
+    def format_summary(self, scenario, summary):
+        return (
+            f"{scenario}: {summary['throughput']:.1f} req/s, p50 {summary['p50']:.1f}ms, "
+            f"p99 {summary['p99']:.1f}ms, {summary['errors']} errors"
+        )
+
+    def compare(self, baseline, results, tolerance):
+        """Report the change of every scenario metric and return the number of regressions."""
+        regressions = 0
+        for scenario, summary in results["scenarios"].items():
+            previous = baseline.get("scenarios", {}).get(scenario)
+            if previous is None:
+                continue
+            for metric in (*HIGHER_IS_WORSE, *LOWER_IS_WORSE):
+                if not previous[metric]:
+                    continue
+                change = (summary[metric] - previous[metric]) / previous[metric]
+                regressed = change > tolerance if metric in HIGHER_IS_WORSE else change < -tolerance
+                regressions += regressed
+                line = f"{scenario} {metric}: {previous[metric]} -> {summary[metric]} ({change:+.1%})"
+                self.stderr.write(self.style.ERROR(line) if regressed else line)
+        return regressions
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,228 @@
+"""
+Django command to import a product catalog from a CSV, NDJSON or JSON array file.
+"""
+import csv
+import io
+import itertools
+import json
+import os
+import time
+
+from core.models import ImportCheckpoint
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from store.cache import CATEGORIES_VERSION_KEY, GENERATION_KEY, bump_version_on_commit
+from store.serializers import ProductBulkSerializer
+
+STAGING_TABLE = "core_product_import"
+STAGING_COLUMNS = ("line", "id", "category_id", "name", "price", "description", "province", "phone_number")
+
+CREATE_STAGING_SQL = f"""
+CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} (
+    line bigint NOT NULL,
+    id bigint,
+    category_id varchar(200) NOT NULL,
+    name varchar(50) NOT NULL,
+    price numeric(8, 2) NOT NULL,
+    description text NOT NULL,
+    province varchar(64) NOT NULL,
+    phone_number varchar(9) NOT NULL
+)
+"""
+
+UPDATE_SQL = f"""
+UPDATE core_product AS p
+SET category_id = s.category_id, name = s.name, price = s.price, description = s.description,
+    province = s.province, phone_number = s.phone_number, updated = now()
+FROM (
+    SELECT DISTINCT ON (id) * FROM {STAGING_TABLE} WHERE id IS NOT NULL ORDER BY id, line DESC
+) AS s
+WHERE p.id = s.id AND p.author_id = %s
+"""
+
+INSERT_SQL = f"""
+INSERT INTO core_product
+    (category_id, author_id, name, price, description, created, updated, province, phone_number,
+     image, image_variants)
+SELECT category_id, %s, name, price, description, now(), now(), province, phone_number, NULL, '{{}}'
+FROM {STAGING_TABLE} WHERE id IS NULL ORDER BY line
+"""
+
+
+def iter_json_array(file, chunk_size=1 << 16):
+    """Yield the items of a JSON array one by one without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer, pos, started = "", 0, False
+    while True:
+        chunk = file.read(chunk_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise CommandError("Expected a JSON array.")
+                started = True
+                pos += 1
+            elif buffer[pos] == "]":
+                return
+            elif buffer[pos] == ",":
+                pos += 1
+            else:
+                try:
+                    item, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as exc:
+                    if not chunk:
+                        raise CommandError(f"Invalid JSON: {exc}")
+                    # The item continues in the next chunk.
+                    break
+                yield item
+        if not chunk:
+            raise CommandError("Unexpected end of the JSON array.")
+
+
+def iter_ndjson(file):
+    for number, line in enumerate(file, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                raise CommandError(f"Invalid JSON on line {number}: {exc}")
+
+
+def iter_csv(file):
+    for row in csv.DictReader(file):
+        yield {key: value for key, value in row.items() if value != "" or key != "id"}
+
+
+READERS = {"csv": iter_csv, "ndjson": iter_ndjson, "json": iter_json_array}
+
+
+class Command(BaseCommand):
+    """Django command to import products in batches through a COPY-loaded staging table."""
+
+    help = (
+        "Import products from a CSV, NDJSON or JSON array file. Rows with an `id` update that product "
+        "if it belongs to the author, other rows create new products. Progress is saved in the database with "
+        "every batch, so an interrupted import resumes after the last imported batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import.")
+        parser.add_argument("--author", required=True, help="Email of the user the products belong to.")
+        parser.add_argument("--format", choices=sorted(READERS), help="Input format, guessed from the extension.")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows validated and loaded at once.")
+        parser.add_argument("--checkpoint", help="Checkpoint name, defaults to the absolute path of the file.")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint.")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = options["path"]
+        input_format = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+        if input_format not in READERS:
+            raise CommandError(f"Unknown input format {input_format!r}, use --format.")
+        try:
+            self.author = get_user_model().objects.get(email=options["author"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['author']!r} does not exist.")
+
+        self.source = self.describe_source(path)
+        self.checkpoint_name = options["checkpoint"] or self.source["path"]
+        self.stats = {"rows": 0, "created": 0, "updated": 0, "skipped": 0, "invalid": 0}
+        if not options["restart"]:
+            self.load_checkpoint()
+        resumed_from = self.stats["rows"]
+        if resumed_from:
+            self.stdout.write(f"Resuming after row {resumed_from}.")
+
+        started = time.monotonic()
+        with open(path, newline="" if input_format == "csv" else None, encoding="utf-8") as file:
+            items = itertools.islice(READERS[input_format](file), resumed_from, None)
+            while batch := list(itertools.islice(items, options["batch_size"])):
+                self.import_batch(batch)
+                rate = (self.stats["rows"] - resumed_from) / (time.monotonic() - started)
+                self.stdout.write(
+                    f"{self.stats['rows']} rows: {self.stats['created']} created, {self.stats['updated']} updated, "
+                    f"{self.stats['skipped']} skipped, {self.stats['invalid']} invalid ({rate:.0f} rows/sec)"
+                )
+
+        elapsed = time.monotonic() - started
+        rate = (self.stats["rows"] - resumed_from) / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {self.stats['rows']} rows in {elapsed:.1f}s ({rate:.0f} rows/sec).")
+        )
+
+    def import_batch(self, batch):
+        first_row = self.stats["rows"] + 1
+        serializer = ProductBulkSerializer(data=batch, many=True, context={})
+        serializer.is_valid(raise_exception=True)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for line, (item, attrs, errors) in enumerate(
+            zip(batch, serializer.validated_data, serializer.item_errors), start=first_row
+        ):
+            product_id = item.get("id") if attrs is not None else None
+            if product_id is not None:
+                try:
+                    product_id = int(product_id)
+                except (TypeError, ValueError):
+                    errors = {"id": ["A valid integer is required."]}
+            if errors:
+                self.stats["invalid"] += 1
+                self.stderr.write(f"Row {line}: {json.dumps(errors)}")
+                continue
+            writer.writerow(
+                [
+                    line,
+                    product_id,
+                    attrs["category"].pk,
+                    attrs["name"],
+                    attrs["price"],
+                    attrs["description"],
+                    attrs["province"],
+                    attrs["phone_number"],
+                ]
+            )
+        buffer.seek(0)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGING_SQL)
+            cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+            cursor.execute(f"SELECT count(*) FROM {STAGING_TABLE} WHERE id IS NOT NULL")
+            with_id = cursor.fetchone()[0]
+            cursor.execute(UPDATE_SQL, [self.author.pk])
+            self.stats["updated"] += cursor.rowcount
+            self.stats["skipped"] += with_id - cursor.rowcount
+            cursor.execute(INSERT_SQL, [self.author.pk])
+            self.stats["created"] += cursor.rowcount
+            # COPY and set-based writes don't send model signals.
+            bump_version_on_commit(GENERATION_KEY)
+            bump_version_on_commit(CATEGORIES_VERSION_KEY)
+            self.stats["rows"] += len(batch)
+            # Saved with the batch, so a crash can't import it twice.
+            self.save_checkpoint()
+
+    def describe_source(self, path):
+        stat = os.stat(path)
+        return {"path": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load_checkpoint(self):
+        checkpoint = ImportCheckpoint.objects.filter(name=self.checkpoint_name).first()
+        if checkpoint is None:
+            return
+        if checkpoint.source != self.source:
+            raise CommandError(f"Checkpoint {self.checkpoint_name!r} belongs to a different file, use --restart.")
+        self.stats = checkpoint.stats
+
+    def save_checkpoint(self):
+        ImportCheckpoint.objects.update_or_create(
+            name=self.checkpoint_name, defaults={"source": self.source, "stats": self.stats}
+        )
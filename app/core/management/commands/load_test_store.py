@@ -0,0 +1,103 @@
+"""
+Django command to compare the throughput of the DRF and async store read endpoints.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from core.benchmarks import load_settings, run_threads, split, summarize
+from core.models import Product
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+ENDPOINTS = ("products", "product", "categories")
+
+
+class Command(BaseCommand):
+    """Django command to load test the product and category reads through the WSGI and ASGI handlers."""
+
+    help = (
+        "Send concurrent anonymous reads in process to the DRF endpoints through the WSGI handler and to the async "
+        "endpoints through the ASGI handler, and report requests per second and latency percentiles. The async "
+        "endpoints don't authenticate, cache responses or compute ETags, so the response cache, the ETag and "
+        "Last-Modified validators and throttling are turned off for both, and only the handlers and the DRF request "
+        "processing differ. Run it against a seeded database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Number of requests per endpoint and handler.")
+        parser.add_argument("--concurrency", type=int, default=16, help="Number of requests in flight at once.")
+        parser.add_argument(
+            "--endpoint", choices=ENDPOINTS, action="append", help="Endpoint to test, can be repeated. Default: all."
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive.")
+
+        with load_settings(), override_settings(STORE_RESPONSE_CACHE_TIMEOUT=0, STORE_CONDITIONAL_GET=False):
+            self.load_test(options)
+
+    def load_test(self, options):
+        for endpoint in options["endpoint"] or ENDPOINTS:
+            sync_url, async_url = self.get_urls(endpoint)
+            for handler, run in (("wsgi", self.run_wsgi), ("asgi", self.run_asgi)):
+                url = sync_url if handler == "wsgi" else async_url
+                results, elapsed = run(url, options["requests"], options["concurrency"])
+                self.report(f"{endpoint} {handler}", results, elapsed)
+
+    def get_urls(self, endpoint):
+        if endpoint == "products":
+            return reverse("store:products-list"), reverse("store:async-product-list")
+        if endpoint == "categories":
+            return reverse("store:category-list"), reverse("store:async-category-list")
+
+        product_id = Product.objects.values_list("pk", flat=True).first()
+        if product_id is None:
+            raise CommandError("The product endpoint needs at least one product.")
+        return (
+            reverse("store:products-detail", args=[product_id]),
+            reverse("store:async-product-detail", args=[product_id]),
+        )
+
+    def run_wsgi(self, url, requests, concurrency):
+        def worker(count):
+            client = Client()
+            results = []
+            for _ in range(count):
+                started = time.perf_counter()
+                res = client.get(url)
+                results.append((res.status_code, time.perf_counter() - started))
+            return results
+
+        return run_threads(worker, requests, concurrency)
+
+    def run_asgi(self, url, requests, concurrency):
+        async def worker(client, count):
+            results = []
+            for _ in range(count):
+                started = time.perf_counter()
+                res = await client.get(url)
+                results.append((res.status_code, time.perf_counter() - started))
+            return results
+
+        async def main():
+            client = AsyncClient()
+            started = time.perf_counter()
+            try:
+                chunks = await asyncio.gather(*(worker(client, count) for count in split(requests, concurrency)))
+            finally:
+                await sync_to_async(connections.close_all)()
+            return [result for chunk in chunks for result in chunk], time.perf_counter() - started
+
+        return asyncio.run(main())
+
+    def report(self, label, results, elapsed):
+        summary = summarize(results, elapsed)
+        self.stdout.write(
+            f"{label}: {summary['throughput']:.1f} req/s, p50 {summary['p50']:.1f}ms, p95 {summary['p95']:.1f}ms, "
+            f"{summary['errors']} errors"
+        )
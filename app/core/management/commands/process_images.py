@@ -0,0 +1,44 @@
+"""
+Django command to run the product image processing worker.
+"""
+import time
+
+from core.images import claim_image_job, process_image_job
+from core.uploads import delete_expired_uploads
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Django command to generate product image variants from the image job queue."""
+
+    help = "Process queued product images and delete expired chunked uploads. Several workers can run side by side."
+    cleanup_interval = 300
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--max-jobs", type=int, help="Exit after processing this many jobs.")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        processed = 0
+        last_cleanup = None
+        while options["max_jobs"] is None or processed < options["max_jobs"]:
+            job = claim_image_job()
+            if job is None:
+                if last_cleanup is None or time.monotonic() - last_cleanup > self.cleanup_interval:
+                    delete_expired_uploads()
+                    last_cleanup = time.monotonic()
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            started = time.monotonic()
+            if process_image_job(job):
+                self.stdout.write(f"Processed {job.source} in {time.monotonic() - started:.2f}s")
+            else:
+                self.stderr.write(f"Failed to process {job.source}: {job.error}")
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} images."))
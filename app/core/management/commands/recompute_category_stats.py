@@ -0,0 +1,53 @@
+"""
+Django command to recompute and verify the denormalized category product stats.
+"""
+from core.models import Category
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+STATS_FIELDS = ("product_count", "min_price", "max_price")
+
+
+class Command(BaseCommand):
+    """Django command to recompute category product counts and price bounds."""
+
+    help = "Recompute category product counts and price bounds from the products table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report categories whose stats are out of date and exit with an error if there are any.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        with transaction.atomic():
+            # Lock the categories first so concurrent product writes can't change the stats mid-recompute.
+            list(Category.objects.select_for_update().values_list("pk", flat=True))
+            categories = Category.objects.annotate(
+                actual_product_count=Count("products"),
+                actual_min_price=Min("products__price"),
+                actual_max_price=Max("products__price"),
+            )
+            stale = []
+            for category in categories:
+                actual = {field: getattr(category, f"actual_{field}") for field in STATS_FIELDS}
+                stored = {field: getattr(category, field) for field in STATS_FIELDS}
+                if actual != stored:
+                    self.stdout.write(f"{category.name}: stored {stored}, actual {actual}")
+                    for field, value in actual.items():
+                        setattr(category, field, value)
+                    stale.append(category)
+
+            if options["check"]:
+                if stale:
+                    raise CommandError(f"{len(stale)} categories have out of date stats.")
+            else:
+                Category.objects.bulk_update(stale, STATS_FIELDS, batch_size=500)
+
+        if options["check"]:
+            self.stdout.write(self.style.SUCCESS("Category stats are up to date."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Recomputed stats of {len(stale)} categories."))
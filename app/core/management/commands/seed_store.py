@@ -0,0 +1,94 @@
+"""
+Django command to seed a reproducible benchmark data set.
+"""
+import random
+from decimal import Decimal
+
+from core.models import Category, Product
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from store.cache import CATEGORIES_VERSION_KEY, GENERATION_KEY, bump_version_on_commit
+
+BENCHMARK_PREFIX = "bench"
+BENCHMARK_PASSWORD = "benchmarkPass123"
+ADJECTIVES = ("Used", "New", "Vintage", "Compact", "Wireless", "Wooden", "Electric", "Portable", "Classic", "Large")
+NOUNS = ("bike", "lamp", "phone", "desk", "chair", "camera", "guitar", "sofa", "laptop", "kettle", "drill", "tent")
+
+
+def benchmark_username(index):
+    return f"{BENCHMARK_PREFIX}-user-{index}"
+
+
+class Command(BaseCommand):
+    """Django command to replace the benchmark users, categories and products with a generated data set."""
+
+    help = (
+        "Delete the previous benchmark data and generate users, categories and products. "
+        "The same arguments always generate the same data. Users share the password "
+        f"{BENCHMARK_PASSWORD!r}."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100, help="Number of users.")
+        parser.add_argument("--categories", type=int, default=20, help="Number of categories.")
+        parser.add_argument("--products", type=int, default=10000, help="Number of products.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Number of rows per insert.")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options["users"] < 1 or options["categories"] < 1 or options["products"] < 0:
+            raise CommandError("At least one user and one category are needed.")
+
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        UserModel = get_user_model()
+        with transaction.atomic():
+            UserModel.objects.filter(username__startswith=f"{BENCHMARK_PREFIX}-user-").delete()
+            Category.objects.filter(name__startswith=f"{BENCHMARK_PREFIX}-").delete()
+
+            # Hashing once keeps seeding fast, every user gets the same password.
+            password = make_password(BENCHMARK_PASSWORD)
+            users = UserModel.objects.bulk_create(
+                [
+                    UserModel(
+                        username=benchmark_username(i), email=f"{benchmark_username(i)}@example.com", password=password
+                    )
+                    for i in range(options["users"])
+                ],
+                batch_size=batch_size,
+            )
+            categories = Category.objects.bulk_create(
+                [Category(name=f"{BENCHMARK_PREFIX}-{rng.choice(NOUNS)}-{i}") for i in range(options["categories"])],
+                batch_size=batch_size,
+            )
+            provinces = [province for province, _ in Product.PROVINCES_CHOICES]
+            for start in range(0, options["products"], batch_size):
+                count = min(batch_size, options["products"] - start)
+                Product.objects.bulk_create(
+                    [self.build_product(rng, users, categories, provinces) for _ in range(count)],
+                    batch_size=batch_size,
+                )
+            # Bulk inserts don't send model signals.
+            bump_version_on_commit(GENERATION_KEY)
+            bump_version_on_commit(CATEGORIES_VERSION_KEY)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(users)} users, {len(categories)} categories and {options['products']} products."
+            )
+        )
+
+    def build_product(self, rng, users, categories, provinces):
+        adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS)
+        return Product(
+            category=rng.choice(categories),
+            author=rng.choice(users),
+            name=f"{adjective} {noun}",
+            price=Decimal(rng.randint(100, 500000)) / 100,
+            description=f"{adjective} {noun} in good condition, pickup or shipping. " * rng.randint(1, 5),
+            province=rng.choice(provinces),
+            phone_number=f"{rng.randint(500000000, 899999999)}",
+        )
@@ -0,0 +1,201 @@
+"""
+In-process request metrics: query count, SQL time, serializer time and total time per URL name.
+
+Requests only append a sample to a ring buffer. Samples are folded into histograms when `/metrics`
+is scraped, so the histograms cover the requests of the scraped process only.
+"""
+import itertools
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+UNRESOLVED = "<unresolved>"
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """Counters of the request being handled."""
+
+    __slots__ = ("queries", "sql_time", "serializer_time", "serializing")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def server_timing(self, total):
+        """Return the `Server-Timing` header value of the request."""
+        return (
+            f'db;desc="{self.queries} queries";dur={self.sql_time * 1000:.2f}, '
+            f"serializer;dur={self.serializer_time * 1000:.2f}, total;dur={total * 1000:.2f}"
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting the queries and SQL time of the current request."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - started
+        metrics.queries += 1
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Add `record_query` to a new database connection, see `CoreConfig.ready`."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MeasuredSerializerMixin:
+    """Serializer mixin adding the time spent in `to_representation` to the current request metrics.
+
+    Nested and list child serializers run inside the outermost call, so they aren't counted twice.
+    """
+
+    def to_representation(self, instance):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializing = False
+
+
+class SampleBuffer:
+    """Fixed size ring buffer of request samples, written without locking.
+
+    Slots hold `(index, sample)` so a reader can tell unwritten and overwritten slots apart.
+    Samples overwritten before they were read are counted as dropped.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.slots = [None] * size
+        self.counter = itertools.count()
+        self.read_index = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def append(self, sample):
+        # `next` on `itertools.count` is atomic, so every writer owns its slot.
+        index = next(self.counter)
+        self.slots[index % self.size] = (index, sample)
+
+    def drain(self):
+        """Return the samples written since the last drain."""
+        samples = []
+        with self.lock:
+            while True:
+                slot = self.slots[self.read_index % self.size]
+                if slot is None or slot[0] < self.read_index:
+                    # Not written yet, or claimed by a writer that hasn't stored it yet.
+                    break
+                if slot[0] > self.read_index:
+                    oldest = slot[0] - self.size + 1
+                    self.dropped += oldest - self.read_index
+                    self.read_index = oldest
+                    continue
+                samples.append(slot[1])
+                self.read_index += 1
+        return samples
+
+
+class Histogram:
+    """Prometheus style histogram with fixed upper bounds."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def expose(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class MetricsRegistry:
+    """Histograms of request samples by URL name."""
+
+    histograms = (
+        ("http_request_duration_seconds", "Total request handling time.", DURATION_BUCKETS),
+        ("db_queries_per_request", "Number of database queries per request.", QUERY_COUNT_BUCKETS),
+        ("db_query_duration_seconds", "Total SQL execution time per request.", DURATION_BUCKETS),
+        ("serializer_duration_seconds", "Total serializer time per request.", DURATION_BUCKETS),
+    )
+
+    def __init__(self, buffer_size=65536):
+        self.buffer = SampleBuffer(buffer_size)
+        self.lock = threading.Lock()
+        self.views = {}
+        self.values = []
+
+    def add_value(self, name, description, metric_type, get_value):
+        """Expose the result of `get_value()` as a metric of the given Prometheus type on every scrape."""
+        self.values.append((name, description, metric_type, get_value))
+
+    def record(self, view_name, total, metrics):
+        self.buffer.append((view_name, total, metrics.queries, metrics.sql_time, metrics.serializer_time))
+
+    def collect(self):
+        """Fold the buffered samples into the histograms and return them by URL name."""
+        with self.lock:
+            for view_name, *values in self.buffer.drain():
+                histograms = self.views.get(view_name)
+                if histograms is None:
+                    histograms = self.views[view_name] = [Histogram(buckets) for _, _, buckets in self.histograms]
+                for histogram, value in zip(histograms, values):
+                    histogram.observe(value)
+            return self.views
+
+    def expose(self):
+        """Return the metrics in the Prometheus text format."""
+        views = self.collect()
+        lines = []
+        for position, (name, description, _) in enumerate(self.histograms):
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+            for view_name, histograms in sorted(views.items()):
+                lines.extend(histograms[position].expose(name, f'view="{view_name}"'))
+        lines += [
+            "# HELP metrics_dropped_samples_total Request samples overwritten before they were collected.",
+            "# TYPE metrics_dropped_samples_total counter",
+            f"metrics_dropped_samples_total {self.buffer.dropped}",
+        ]
+        for name, description, metric_type, get_value in self.values:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}", f"{name} {get_value()}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.buffer.drain()
+            self.buffer.dropped = 0
+            self.views = {}
+
+
+registry = MetricsRegistry()
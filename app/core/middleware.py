@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+from core.metrics import UNRESOLVED, RequestMetrics, current_metrics, registry
+from core.routers import PRIMARY_COOKIE, RequestRouting, current_routing, get_sticky_user_key, get_user_id
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse
+from django.utils.decorators import sync_and_async_middleware
+
+
+def measure_stream(content, view_name, metrics, started):
+    """Count the work of producing a streamed body in the request metrics and record them once it ends."""
+    iterator = iter(content)
+    try:
+        while True:
+            token = current_metrics.set(metrics)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                current_metrics.reset(token)
+            yield chunk
+    finally:
+        registry.record(view_name, time.perf_counter() - started, metrics)
+
+
+def finish_request(request, response, metrics, started):
+    """Record the request metrics, or wrap a streamed body to record them once it was sent.
+
+    Headers go out before a streamed body, so the `Server-Timing` header only covers the work done before it.
+    Files are streamed without queries and keep their file wrapper, so they are recorded right away.
+    """
+    view_name = request.resolver_match.view_name if request.resolver_match is not None else UNRESOLVED
+    total = time.perf_counter() - started
+    if response.streaming and not isinstance(response, FileResponse):
+        response.streaming_content = measure_stream(response.streaming_content, view_name, metrics, started)
+    else:
+        registry.record(view_name, total, metrics)
+    response["Server-Timing"] = metrics.server_timing(total)
+    return response
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Record the queries, SQL time, serializer time and total time of requests, see `core.metrics`."""
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            metrics = RequestMetrics()
+            token = current_metrics.set(metrics)
+            started = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                current_metrics.reset(token)
+            return finish_request(request, response, metrics, started)
+
+    else:
+
+        def middleware(request):
+            metrics = RequestMetrics()
+            token = current_metrics.set(metrics)
+            started = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                current_metrics.reset(token)
+            return finish_request(request, response, metrics, started)
+
+    return middleware
+
+
+def stick_to_primary(request, response):
+    """Send the reads of a client and its user that wrote successfully to the primary for `REPLICA_STICKY_SECONDS`."""
+    if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE") and response.status_code < 400:
+        sticky_seconds = settings.REPLICA_STICKY_SECONDS
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            f"{time.time() + sticky_seconds:.3f}",
+            max_age=sticky_seconds,
+            httponly=True,
+            samesite="Lax",
+        )
+        user_id = get_user_id(request)
+        if user_id is not None:
+            cache.set(get_sticky_user_key(user_id), True, sticky_seconds)
+    return response
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """Let `core.routers.ReplicaRouter` route the reads of the request being handled."""
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            token = current_routing.set(RequestRouting(request))
+            try:
+                response = await get_response(request)
+            finally:
+                current_routing.reset(token)
+            return stick_to_primary(request, response)
+
+    else:
+
+        def middleware(request):
+            token = current_routing.set(RequestRouting(request))
+            try:
+                response = get_response(request)
+            finally:
+                current_routing.reset(token)
+            return stick_to_primary(request, response)
+
+    return middleware
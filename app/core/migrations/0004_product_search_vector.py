@@ -0,0 +1,46 @@
+# Generated by Django 4.0.10 on 2026-10-18 14:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_TRIGGER_SQL = """
+CREATE FUNCTION core_product_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_product_search_vector_trigger
+BEFORE INSERT OR UPDATE OF name, description, search_vector ON core_product
+FOR EACH ROW EXECUTE FUNCTION core_product_search_vector_update();
+
+UPDATE core_product SET search_vector = NULL;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS core_product_search_vector_trigger ON core_product;
+DROP FUNCTION IF EXISTS core_product_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_product_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="product_search_vector_idx"),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER_SQL, DROP_SEARCH_VECTOR_TRIGGER_SQL),
+    ]
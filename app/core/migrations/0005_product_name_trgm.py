@@ -0,0 +1,21 @@
+# Generated by Django 4.0.10 on 2026-10-18 14:30
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0004_product_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="product_name_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
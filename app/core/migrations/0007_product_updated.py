@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0006_product_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="updated",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunSQL("UPDATE core_product SET updated = created", migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 4.0.10 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+CATEGORY_STATS_TRIGGER_SQL = """
+CREATE FUNCTION core_product_category_stats_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE core_category AS c
+        SET product_count = c.product_count + n.product_count,
+            min_price = LEAST(c.min_price, n.min_price),
+            max_price = GREATEST(c.max_price, n.max_price)
+        FROM (
+            SELECT category_id, count(*) AS product_count, min(price) AS min_price, max(price) AS max_price
+            FROM new_products GROUP BY category_id
+        ) AS n
+        WHERE c.name = n.category_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE core_category AS c
+        SET product_count = c.product_count - o.product_count,
+            min_price = (SELECT min(p.price) FROM core_product AS p WHERE p.category_id = c.name),
+            max_price = (SELECT max(p.price) FROM core_product AS p WHERE p.category_id = c.name)
+        FROM (SELECT category_id, count(*) AS product_count FROM old_products GROUP BY category_id) AS o
+        WHERE c.name = o.category_id;
+    ELSE
+        UPDATE core_category AS c
+        SET product_count = c.product_count + d.delta,
+            min_price = (SELECT min(p.price) FROM core_product AS p WHERE p.category_id = c.name),
+            max_price = (SELECT max(p.price) FROM core_product AS p WHERE p.category_id = c.name)
+        FROM (
+            SELECT category_id, sum(delta) AS delta
+            FROM (
+                SELECT o.category_id, -1 AS delta
+                FROM old_products AS o JOIN new_products AS n ON n.id = o.id
+                WHERE o.category_id <> n.category_id OR o.price <> n.price
+                UNION ALL
+                SELECT n.category_id, 1 AS delta
+                FROM old_products AS o JOIN new_products AS n ON n.id = o.id
+                WHERE o.category_id <> n.category_id OR o.price <> n.price
+            ) AS changes
+            GROUP BY category_id
+        ) AS d
+        WHERE c.name = d.category_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_product_category_stats_insert_trigger
+AFTER INSERT ON core_product REFERENCING NEW TABLE AS new_products
+FOR EACH STATEMENT EXECUTE FUNCTION core_product_category_stats_update();
+
+CREATE TRIGGER core_product_category_stats_update_trigger
+AFTER UPDATE ON core_product REFERENCING OLD TABLE AS old_products NEW TABLE AS new_products
+FOR EACH STATEMENT EXECUTE FUNCTION core_product_category_stats_update();
+
+CREATE TRIGGER core_product_category_stats_delete_trigger
+AFTER DELETE ON core_product REFERENCING OLD TABLE AS old_products
+FOR EACH STATEMENT EXECUTE FUNCTION core_product_category_stats_update();
+
+UPDATE core_category AS c
+SET product_count = s.product_count, min_price = s.min_price, max_price = s.max_price
+FROM (
+    SELECT category_id, count(*) AS product_count, min(price) AS min_price, max(price) AS max_price
+    FROM core_product GROUP BY category_id
+) AS s
+WHERE c.name = s.category_id;
+"""
+
+DROP_CATEGORY_STATS_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS core_product_category_stats_insert_trigger ON core_product;
+DROP TRIGGER IF EXISTS core_product_category_stats_update_trigger ON core_product;
+DROP TRIGGER IF EXISTS core_product_category_stats_delete_trigger ON core_product;
+DROP FUNCTION IF EXISTS core_product_category_stats_update();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0007_product_updated"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="max_price",
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="min_price",
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="product_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(CATEGORY_STATS_TRIGGER_SQL, DROP_CATEGORY_STATS_TRIGGER_SQL),
+    ]
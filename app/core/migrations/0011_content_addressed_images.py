@@ -0,0 +1,27 @@
+# Generated by Django 4.0.10 on 2026-10-18 14:29
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0010_image_uploads"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="image",
+            field=models.ImageField(
+                null=True,
+                storage=core.storage.ContentAddressedStorage(),
+                upload_to=core.models.product_image_file_path,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["image"], name="product_image_idx"),
+        ),
+    ]
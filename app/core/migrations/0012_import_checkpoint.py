@@ -0,0 +1,22 @@
+# Generated by Django 4.1.13 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0011_content_addressed_images"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportCheckpoint",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("source", models.JSONField()),
+                ("stats", models.JSONField(default=dict)),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,9 +1,12 @@
 import os
 import uuid
 
+from core.storage import content_addressed_storage
 from core.validators import validate_phone_number
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -21,6 +24,12 @@ class User(AbstractUser):
 
 class Category(models.Model):
     name = models.CharField(max_length=200, unique=True, primary_key=True)
+    # Maintained by the core_product_category_stats_* database triggers, see the recompute_category_stats command.
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    min_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, editable=False)
+    max_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, editable=False)
+
+    stats_fields = ("product_count", "min_price", "max_price")
 
     class Meta:
         ordering = ("name",)
@@ -29,6 +38,12 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # The stats of a loaded instance can be stale, so saves only write them when asked to by update_fields.
+        if update_fields is None:
+            values = [value for value in values if value[0].name not in self.stats_fields]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
 
 class Product(models.Model):
     PROVINCES_CHOICES = (
@@ -47,18 +62,102 @@ class Product(models.Model):
         ("West Pomerania", "West Pomerania"),
     )
 
-    category = models.ForeignKey(Category, related_name="products", on_delete=models.CASCADE)
-    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="products")
+    # Foreign key lookups are served by the composite indexes in Meta.indexes.
+    category = models.ForeignKey(Category, related_name="products", on_delete=models.CASCADE, db_index=False)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="products", db_index=False
+    )
     name = models.CharField(max_length=50, db_index=True)
     price = models.DecimalField(max_digits=8, decimal_places=2)
     description = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
     province = models.CharField(max_length=64, choices=PROVINCES_CHOICES)
     phone_number = models.CharField(max_length=9, validators=[validate_phone_number])
-    image = models.ImageField(null=True, upload_to=product_image_file_path)
+    image = models.ImageField(null=True, upload_to=product_image_file_path, storage=content_addressed_storage)
+    # Storage names of the resized copies of `image` by variant and format, written by the process_images worker.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Maintained by the core_product_search_vector_trigger database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ("name",)
+        indexes = (
+            GinIndex(fields=["search_vector"], name="product_search_vector_idx"),
+            GinIndex(fields=["name"], name="product_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+            models.Index(fields=["category", "name"], name="product_category_name_idx"),
+            models.Index(fields=["category", "price"], name="product_category_price_idx"),
+            models.Index(fields=["category", "created"], name="product_category_created_idx"),
+            models.Index(fields=["author", "name"], name="product_author_name_idx"),
+            models.Index(fields=["province", "created"], name="product_province_created_idx"),
+            models.Index(fields=["price"], name="product_price_idx"),
+            models.Index(fields=["created"], name="product_created_idx"),
+            # Counts the references to a shared image blob.
+            models.Index(fields=["image"], name="product_image_idx"),
+        )
 
     def __str__(self):
         return self.name
+
+
+class ImageJob(models.Model):
+    """Queued processing of an uploaded product image, picked up by the process_images worker."""
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="image_jobs")
+    source = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("created",)
+        indexes = (
+            models.Index(
+                fields=["created"],
+                name="imagejob_claimable_idx",
+                condition=models.Q(status__in=["pending", "processing"]),
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.source} ({self.status})"
+
+
+class ImageUpload(models.Model):
+    """Product image being uploaded in chunks, appended to a part file until it is finalized."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="image_uploads")
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.id} ({self.received}/{self.size})"
+
+
+class ImportCheckpoint(models.Model):
+    """Progress of a product import, saved in the transaction of every imported batch."""
+
+    name = models.CharField(max_length=255, unique=True)
+    # Path, size and modification time of the imported file.
+    source = models.JSONField()
+    stats = models.JSONField(default=dict)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.stats.get('rows', 0)} rows)"
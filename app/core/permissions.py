@@ -6,4 +6,5 @@ class IsAuthor(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        return obj.author == request.user
+        # Comparing ids doesn't load the author.
+        return obj.author_id == request.user.id
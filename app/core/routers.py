@@ -0,0 +1,117 @@
+"""
+Routing of the reads of safe-method store requests to read replicas.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import LazyObject, empty
+
+REPLICA_VIEW_MODULES = ("store.views", "store.async_views")
+PRIMARY_COOKIE = "primary_until"
+
+current_routing = ContextVar("current_routing", default=None)
+primary_reads = ContextVar("primary_reads", default=False)
+
+
+@contextmanager
+def reading_from_primary():
+    """Send every read made in the block to the primary, for data that outlives the request like cache entries."""
+    token = primary_reads.set(True)
+    try:
+        yield
+    finally:
+        primary_reads.reset(token)
+
+
+def get_sticky_user_key(user_id):
+    return f"replica:primary:user:{user_id}"
+
+
+def get_user_id(request):
+    """Return the id of the authenticated user of `request` if it is already known, else None."""
+    user = getattr(request, "user", None)
+    if isinstance(user, LazyObject):
+        # Evaluating it would query, and that query could be the one being routed.
+        user = None if user._wrapped is empty else user._wrapped
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+class RequestRouting:
+    """The database alias reads of the request being handled go to, decided on the first read."""
+
+    __slots__ = ("request", "alias", "decided")
+
+    def __init__(self, request):
+        self.request = request
+        self.alias = None
+        self.decided = False
+
+    def get_read_alias(self):
+        if not self.decided:
+            # The view is only resolved once the request reaches it, so this can't be decided earlier.
+            self.alias = random.choice(settings.DATABASE_REPLICAS) if reads_from_replica(self.request) else None
+            self.decided = True
+        return self.alias
+
+
+def get_view_module(resolver_match):
+    view = resolver_match.func
+    view = getattr(view, "cls", None) or getattr(view, "view_class", None) or view
+    return view.__module__
+
+
+def is_sticky(request):
+    """Return whether the client or its user wrote recently enough to read its writes from the primary."""
+    try:
+        if float(request.COOKIES.get(PRIMARY_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    # Clients authenticating with a token header may not keep cookies.
+    user_id = get_user_id(request)
+    return user_id is not None and cache.get(get_sticky_user_key(user_id)) is not None
+
+
+def reads_from_replica(request):
+    return (
+        bool(settings.DATABASE_REPLICAS)
+        and request.method in ("GET", "HEAD")
+        and request.resolver_match is not None
+        and get_view_module(request.resolver_match) in REPLICA_VIEW_MODULES
+        and not is_sticky(request)
+    )
+
+
+class ReplicaRouter:
+    """Send the reads of GET and HEAD requests to the store views to one of `DATABASE_REPLICAS`.
+
+    Writes, reads inside a transaction or `reading_from_primary`, reads of users and reads outside
+    of requests use the primary, and so do the reads of a client or user for `REPLICA_STICKY_SECONDS`
+    after it wrote, see `replica_routing_middleware`.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if routing is None or primary_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if model._meta.label == settings.AUTH_USER_MODEL:
+            # Authentication loads the user before the decision can take it into account.
+            return None
+        return routing.get_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
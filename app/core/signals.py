@@ -0,0 +1,34 @@
+from core.images import release_image
+from core.models import Product
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+
+def get_loaded_image_name(instance):
+    # Reads the loaded value directly, so deferred images aren't fetched.
+    value = instance.__dict__.get("image")
+    return getattr(value, "name", value)
+
+
+@receiver(post_init, sender=Product)
+def remember_image(sender, instance, **kwargs):
+    """Remember the image a product was loaded with, to release it once replaced."""
+    instance._loaded_image_name = get_loaded_image_name(instance)
+
+
+@receiver(post_save, sender=Product)
+def release_replaced_image(sender, instance, **kwargs):
+    """Release the previous image of a product after it was replaced or removed."""
+    previous, current = instance._loaded_image_name, get_loaded_image_name(instance)
+    if previous and previous != current:
+        transaction.on_commit(lambda: release_image(previous))
+    instance._loaded_image_name = current
+
+
+@receiver(post_delete, sender=Product)
+def release_deleted_image(sender, instance, **kwargs):
+    """Release the image of a deleted product."""
+    name = get_loaded_image_name(instance)
+    if name:
+        transaction.on_commit(lambda: release_image(name))
@@ -0,0 +1,92 @@
+"""
+Content-addressed storage of product images.
+"""
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+from django.db.transaction import TransactionManagementError
+from django.utils.deconstruct import deconstructible
+
+IMMUTABLE_NAME_RE = re.compile(r"uploads/product/(?:[0-9a-f]{2}/[0-9a-f]{64}\.\w+|variants/[0-9a-f]{64}/[\w.]+)")
+
+
+def is_immutable(name):
+    """Return whether the file is named after its content, so it never changes."""
+    return IMMUTABLE_NAME_RE.fullmatch(name) is not None
+
+
+def lock_name(name):
+    """Take a transaction-level advisory lock serializing saves and releases of the same blob."""
+    key = int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage keeping each distinct content once, named after its SHA-256 digest.
+
+    The name requested by `upload_to` only contributes its extension. Saving content that is already
+    stored returns the existing name, so blobs are shared and have to be deleted with `release()`.
+    Saves must run inside the transaction that stores the reference, which keeps a concurrent release
+    from deleting the blob before the reference is committed.
+    """
+
+    directory = os.path.join("uploads", "product")
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if not connection.in_atomic_block:
+            # In autocommit the blob lock would be released as soon as the statement taking it commits.
+            raise TransactionManagementError("Content-addressed blobs can only be saved inside atomic().")
+        extension = os.path.splitext(name)[1].lower()
+        directory = self.path(self.directory)
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        temporary_file_path = getattr(content, "temporary_file_path", None)
+        if temporary_file_path is not None:
+            source = temporary_file_path()
+            with open(source, "rb") as file:
+                for chunk in iter(lambda: file.read(64 * 1024), b""):
+                    digest.update(chunk)
+        else:
+            source = os.path.join(directory, f".{uuid.uuid4().hex}.tmp")
+            with open(source, "wb") as file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    file.write(chunk)
+
+        hexdigest = digest.hexdigest()
+        name = os.path.join(self.directory, hexdigest[:2], f"{hexdigest}{extension}")
+        path = self.path(name)
+        lock_name(name)
+        if os.path.exists(path):
+            if temporary_file_path is None:
+                os.remove(source)
+            return name
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_move_safe(source, path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        return name
+
+    def release(self, name, is_referenced):
+        """Delete a blob unless `is_referenced()` says it is still in use. Returns whether it was deleted."""
+        with transaction.atomic():
+            lock_name(name)
+            if is_referenced():
+                return False
+            self.delete(name)
+        return True
+
+
+content_addressed_storage = ContentAddressedStorage()
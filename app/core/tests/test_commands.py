@@ -1,12 +1,24 @@
 """
 Test custom Django management commands.
 """
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
-from django.core.management import call_command
+from core.management.commands.import_products import Command as ImportProductsCommand
+from core.management.commands.import_products import iter_json_array
+from core.models import Category, ImageJob, Product
+from core.tests.test_models import create_product
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from psycopg2 import OperationalError as Psycopg2OpError
+from store.cache import CATEGORIES_VERSION_KEY, GENERATION_KEY, get_version, response_cache_stats
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -30,3 +42,353 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+class RecomputeCategoryStatsTests(TestCase):
+    """Test recomputing category stats."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category = Category.objects.create(name="electronics")
+        create_product(self.category, user, "5.00")
+        create_product(self.category, user, "10.00")
+        Category.objects.update(product_count=0, min_price=None, max_price=None)
+
+    def test_recompute(self):
+        """Test out of date stats are recomputed."""
+        call_command("recompute_category_stats", stdout=StringIO())
+
+        self.category.refresh_from_db()
+        self.assertEqual(2, self.category.product_count)
+        self.assertEqual(Decimal("5.00"), self.category.min_price)
+        self.assertEqual(Decimal("10.00"), self.category.max_price)
+        call_command("recompute_category_stats", "--check", stdout=StringIO())
+
+    def test_check_out_of_date(self):
+        """Test checking reports out of date stats without fixing them."""
+        with self.assertRaises(CommandError):
+            call_command("recompute_category_stats", "--check", stdout=StringIO())
+
+        self.category.refresh_from_db()
+        self.assertEqual(0, self.category.product_count)
+
+
+def product_row(**params):
+    """Return a sample product import row."""
+    row = {
+        "category": "electronics",
+        "name": "Sample name",
+        "price": "5.25",
+        "description": "Sample description",
+        "province": "Lublin",
+        "phone_number": "123456789",
+    }
+    row.update(params)
+    return row
+
+
+class ImportProductsTests(TestCase):
+    """Test importing products from files."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        Category.objects.create(name="electronics")
+        Category.objects.create(name="furniture")
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_file(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def import_products(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_products", path, "--author", self.user.email, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        """Test importing a CSV file in batches."""
+        rows = [product_row(name=f"Product {i}") for i in range(7)]
+        header = ",".join(rows[0])
+        lines = [",".join(row.values()) for row in rows]
+        path = self.write_file("catalog.csv", "\n".join([header, *lines]) + "\n")
+
+        out, _ = self.import_products(path, "--batch-size", "3")
+
+        products = Product.objects.filter(author=self.user).order_by("id")
+        self.assertEqual([f"Product {i}" for i in range(7)], [product.name for product in products])
+        self.assertEqual(Decimal("5.25"), products[0].price)
+        self.assertFalse(products.filter(image__isnull=False).exists())
+        self.assertIn("rows/sec", out)
+        self.assertEqual(7, Category.objects.get(name="electronics").product_count)
+
+    def test_import_json_array(self):
+        """Test importing a JSON array file."""
+        path = self.write_file("catalog.json", json.dumps([product_row(name=f"Product {i}") for i in range(3)]))
+
+        self.import_products(path)
+
+        self.assertEqual(3, Product.objects.count())
+
+    def test_import_ndjson_with_invalid_rows(self):
+        """Test invalid rows are reported and skipped."""
+        rows = [product_row(), product_row(phone_number="12ab"), product_row(category="unknown"), product_row()]
+        path = self.write_file("catalog.ndjson", "\n".join(json.dumps(row) for row in rows))
+
+        _, err = self.import_products(path)
+
+        self.assertEqual(2, Product.objects.count())
+        self.assertIn("Row 2:", err)
+        self.assertIn("Row 3:", err)
+
+    def test_import_updates_owned_products(self):
+        """Test rows with an id update that product when owned by the author."""
+        fields = {key: value for key, value in product_row().items() if key != "category"}
+        product = Product.objects.create(author=self.user, category_id="electronics", **fields)
+        other = get_user_model().objects.create_user(
+            email="testUser2@example.com",
+            password="testPass123",
+            username="TestUser2",
+        )
+        unowned = Product.objects.create(author=other, category_id="electronics", **fields)
+        rows = [
+            product_row(id=product.id, name="Updated", category="furniture"),
+            product_row(id=unowned.id, name="Updated"),
+        ]
+        path = self.write_file("catalog.ndjson", "\n".join(json.dumps(row) for row in rows))
+
+        out, _ = self.import_products(path)
+
+        product.refresh_from_db()
+        unowned.refresh_from_db()
+        self.assertEqual(("Updated", "furniture"), (product.name, product.category_id))
+        self.assertEqual("Sample name", unowned.name)
+        self.assertIn("1 updated, 1 skipped", out)
+        self.assertEqual(2, Product.objects.count())
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test a second run continues after the rows recorded in the checkpoint."""
+        path = self.write_file("catalog.ndjson", "\n".join(json.dumps(product_row()) for _ in range(5)))
+        self.import_products(path, "--batch-size", "2")
+
+        out, _ = self.import_products(path)
+
+        self.assertIn("Resuming after row 5", out)
+        self.assertEqual(5, Product.objects.count())
+        self.import_products(path, "--restart")
+        self.assertEqual(10, Product.objects.count())
+
+    def test_checkpoint_saved_with_batch(self):
+        """Test a batch that failed before its checkpoint was saved is imported again, and only once."""
+        path = self.write_file("catalog.ndjson", "\n".join(json.dumps(product_row()) for _ in range(4)))
+        save_checkpoint = ImportProductsCommand.save_checkpoint
+
+        def crash_after_first_batch(command):
+            if command.stats["rows"] > 2:
+                raise RuntimeError("Crashed.")
+            save_checkpoint(command)
+
+        with patch.object(ImportProductsCommand, "save_checkpoint", crash_after_first_batch):
+            with self.assertRaises(RuntimeError):
+                self.import_products(path, "--batch-size", "2")
+        self.assertEqual(2, Product.objects.count())
+
+        out, _ = self.import_products(path, "--batch-size", "2")
+
+        self.assertIn("Resuming after row 2", out)
+        self.assertEqual(4, Product.objects.count())
+
+    def test_unknown_author(self):
+        """Test importing for an unknown author fails."""
+        path = self.write_file("catalog.json", "[]")
+
+        with self.assertRaises(CommandError):
+            call_command("import_products", path, "--author", "missing@example.com", stdout=StringIO())
+
+    def test_iter_json_array_across_chunks(self):
+        """Test JSON array items split between reads are parsed."""
+        items = [{"name": f"Product {i}", "tags": ["a", "b"]} for i in range(20)]
+
+        parsed = list(iter_json_array(StringIO(json.dumps(items)), chunk_size=7))
+
+        self.assertEqual(items, parsed)
+
+
+class LoadTestStoreTests(TransactionTestCase):
+    """Test load testing the store read endpoints."""
+
+    def test_load_test(self):
+        """Test both handlers are measured for the requested endpoints, with the same layers turned off."""
+        out = StringIO()
+        user = get_user_model().objects.create_user(email="bench@example.com", username="bench", password="pass1234")
+        create_product(Category.objects.create(name="electronics"), user, "5.25")
+        response_cache_stats.reset()
+
+        with patch("store.cache.ConditionalGetMixin.get_validators") as get_validators:
+            call_command(
+                "load_test_store", "--requests", "4", "--concurrency", "2", "--endpoint", "categories", stdout=out
+            )
+            call_command(
+                "load_test_store", "--requests", "2", "--concurrency", "1", "--endpoint", "product", stdout=out
+            )
+
+        lines = out.getvalue().splitlines()
+        labels = ["categories wsgi", "categories asgi", "product wsgi", "product asgi"]
+        self.assertEqual(labels, [line.split(":")[0] for line in lines])
+        self.assertTrue(all(line.endswith(" 0 errors") for line in lines))
+        self.assertEqual({"hits": 0, "misses": 0}, response_cache_stats.as_dict())
+        get_validators.assert_not_called()
+
+    def test_product_endpoint_without_products(self):
+        """Test the product endpoint needs a product to request."""
+        with self.assertRaises(CommandError):
+            call_command("load_test_store", "--endpoint", "product", stdout=StringIO())
+
+
+class BenchmarkSerializersTests(SimpleTestCase):
+    """Test benchmarking the product serializers."""
+
+    def test_benchmark(self):
+        """Test both product serializers are compared."""
+        out = StringIO()
+
+        call_command("benchmark_serializers", "--count", "10", "--repeat", "1", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(["ProductListSerializer", "ProductSerializer"], [line.split(":")[0] for line in lines])
+
+
+class SeedStoreTests(TestCase):
+    """Test seeding the benchmark data."""
+
+    def test_seed(self):
+        """Test users, categories and products are created with valid provinces."""
+        call_command("seed_store", "--users", "3", "--categories", "2", "--products", "25", stdout=StringIO())
+
+        self.assertEqual(3, get_user_model().objects.filter(username__startswith="bench-user-").count())
+        self.assertEqual(2, Category.objects.count())
+        self.assertEqual(25, Product.objects.count())
+        provinces = {province for province, _ in Product.PROVINCES_CHOICES}
+        self.assertTrue(set(Product.objects.values_list("province", flat=True)) <= provinces)
+
+    def test_reproducible(self):
+        """Test seeding again replaces the data with the same data."""
+        fields = ("name", "price", "province", "category__name", "author__username")
+        call_command("seed_store", "--users", "3", "--categories", "2", "--products", "25", stdout=StringIO())
+        first = list(Product.objects.order_by("pk").values_list(*fields))
+
+        call_command("seed_store", "--users", "3", "--categories", "2", "--products", "25", stdout=StringIO())
+
+        self.assertEqual(first, list(Product.objects.order_by("pk").values_list(*fields)))
+
+    def test_seed_bumps_cache_versions(self):
+        """Test seeding invalidates the cached product and category responses."""
+        versions = get_version(GENERATION_KEY), get_version(CATEGORIES_VERSION_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("seed_store", "--users", "1", "--categories", "1", "--products", "1", stdout=StringIO())
+
+        self.assertGreater(get_version(GENERATION_KEY), versions[0])
+        self.assertGreater(get_version(CATEGORIES_VERSION_KEY), versions[1])
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BenchmarkStoreTests(TransactionTestCase):
+    """Test benchmarking the store API."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_benchmark(self):
+        """Test the results of every scenario are written as JSON."""
+        call_command("seed_store", "--users", "2", "--categories", "2", "--products", "20", stdout=StringIO())
+        out = StringIO()
+
+        call_command(
+            "benchmark_store",
+            *("--scenario", "list", "--scenario", "detail", "--scenario", "my-products"),
+            *("--requests", "4", "--concurrency", "2", "--warmup", "0", "--label", "test"),
+            stdout=out,
+            stderr=StringIO(),
+        )
+
+        results = json.loads(out.getvalue())
+        self.assertEqual("test", results["label"])
+        self.assertEqual({"list", "detail", "my-products"}, set(results["scenarios"]))
+        for summary in results["scenarios"].values():
+            self.assertEqual({"requests": 4, "errors": 0}, {key: summary[key] for key in ("requests", "errors")})
+
+    def test_write_scenarios_restore_data(self):
+        """Test the products created and the images uploaded are removed after each run."""
+        call_command("seed_store", "--users", "4", "--categories", "1", "--products", "2", stdout=StringIO())
+        products = list(Product.objects.order_by("pk").values_list("pk", "image"))
+        out = StringIO()
+
+        call_command(
+            "benchmark_store",
+            *("--scenario", "create", "--scenario", "upload-image"),
+            *("--requests", "4", "--concurrency", "1", "--warmup", "2"),
+            stdout=out,
+            stderr=StringIO(),
+        )
+
+        for summary in json.loads(out.getvalue())["scenarios"].values():
+            self.assertEqual(0, summary["errors"])
+        self.assertEqual(products, list(Product.objects.order_by("pk").values_list("pk", "image")))
+        self.assertFalse(ImageJob.objects.exists())
+        self.assertEqual([], [name for _, _, names in os.walk(MEDIA_ROOT) for name in names])
+
+    def test_compare(self):
+        """Test slower results than the baseline are regressions."""
+        call_command("seed_store", "--users", "1", "--categories", "1", "--products", "1", stdout=StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, "baseline.json")
+            summary = {"requests": 4, "errors": 0, "throughput": 1e6, "mean": 0.001, "p50": 0.001, "p95": 0.001}
+            with open(baseline, "w") as baseline_file:
+                json.dump({"label": "fast", "scenarios": {"detail": {**summary, "p99": 0.001}}}, baseline_file)
+
+            with self.assertRaisesMessage(CommandError, "regressions compared to fast"):
+                call_command(
+                    "benchmark_store",
+                    *("--scenario", "detail", "--requests", "2", "--warmup", "0", "--compare", baseline),
+                    stdout=StringIO(),
+                    stderr=StringIO(),
+                )
+
+
+class BenchmarkLoginsTests(TransactionTestCase):
+    """Test benchmarking logins."""
+
+    def test_benchmark(self):
+        """Test the benchmark users log in with the requested hasher."""
+        call_command("seed_store", "--users", "2", "--categories", "1", "--products", "0", stdout=StringIO())
+        out = StringIO()
+
+        call_command("benchmark_logins", "--requests", "2", "--concurrency", "1", "--hasher", "pbkdf2", stdout=out)
+
+        self.assertTrue(out.getvalue().startswith("login (pbkdf2): "))
+        self.assertTrue(out.getvalue().strip().endswith(" 0 errors"))
+        passwords = get_user_model().objects.values_list("password", flat=True)
+        self.assertTrue(all(password.startswith("pbkdf2_sha256$") for password in passwords))
+
+    def test_without_benchmark_users(self):
+        """Test the benchmark needs seeded users."""
+        with self.assertRaises(CommandError):
+            call_command("benchmark_logins", stdout=StringIO())
@@ -0,0 +1,139 @@
+"""
+Test the product image processing pipeline.
+"""
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from core.images import MAX_ATTEMPTS, claim_image_job, enqueue_image_processing, generate_variants
+from core.models import Category, ImageJob, Product
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_content(size=(2000, 1000), image_format="JPEG", **options):
+    """Return the bytes of a sample image."""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color=(200, 30, 30)).save(buffer, format=image_format, **options)
+    return ContentFile(buffer.getvalue(), name=f"sample.{image_format.lower()}")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageProcessingTests(TestCase):
+    """Test generating product image variants in the background."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.product = Product.objects.create(
+            category=Category.objects.create(name="electronics"),
+            author=user,
+            name="Sample name",
+            price="5.25",
+            description="Sample description",
+            province="Lublin",
+            phone_number="123456789",
+        )
+
+    def set_image(self, content):
+        self.product.image.save(content.name, content)
+        return enqueue_image_processing(self.product)
+
+    def test_generate_variants(self):
+        """Test variants are resized, in both formats and stripped of metadata."""
+        exif = Image.Exif()
+        exif[0x010F] = "Camera maker"
+        exif[0x0112] = 6
+        name = default_storage.save("uploads/product/sample.jpg", image_content(exif=exif.tobytes()))
+
+        variants = generate_variants(name)
+
+        self.assertEqual({"thumbnail", "medium", "large"}, set(variants))
+        with default_storage.open(variants["thumbnail"]["webp"]) as file, Image.open(file) as image:
+            self.assertEqual("WEBP", image.format)
+            # The orientation tag rotates the image to portrait.
+            self.assertEqual((100, 200), image.size)
+            self.assertNotIn("exif", image.info)
+        with default_storage.open(variants["large"]["jpeg"]) as file, Image.open(file) as image:
+            self.assertEqual("JPEG", image.format)
+            self.assertEqual((800, 1600), image.size)
+            self.assertEqual(0, len(image.getexif()))
+
+    def test_process_images_command(self):
+        """Test the worker records the variants on the product."""
+        job = self.set_image(image_content())
+
+        call_command("process_images", "--once", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(ImageJob.DONE, job.status)
+        self.assertEqual(1, job.attempts)
+        self.assertTrue(default_storage.exists(self.product.image_variants["thumbnail"]["webp"]))
+        self.assertIsNone(claim_image_job())
+
+    def test_replacing_image_removes_old_variants(self):
+        """Test replacing an image deletes the previous one and its variants."""
+        self.set_image(image_content())
+        call_command("process_images", "--once", stdout=StringIO())
+        self.product.refresh_from_db()
+        old_image = self.product.image.name
+        old_thumbnail = self.product.image_variants["thumbnail"]["jpeg"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.set_image(image_content(size=(300, 300), image_format="PNG"))
+        call_command("process_images", "--once", stdout=StringIO())
+
+        self.product.refresh_from_db()
+        self.assertFalse(default_storage.exists(old_image))
+        self.assertFalse(default_storage.exists(old_thumbnail))
+        self.assertTrue(default_storage.exists(self.product.image_variants["thumbnail"]["jpeg"]))
+
+    def test_outdated_job_discards_variants(self):
+        """Test variants of an image replaced in the meantime are not recorded."""
+        job = self.set_image(image_content())
+        self.product.image = "uploads/product/other.jpg"
+        self.product.save()
+
+        call_command("process_images", "--once", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(ImageJob.DONE, job.status)
+        self.assertEqual({}, self.product.image_variants)
+
+    def test_failed_job_is_retried(self):
+        """Test failing jobs are retried until the attempts run out."""
+        job = ImageJob.objects.create(product=self.product, source="uploads/product/missing.jpg")
+
+        call_command("process_images", "--once", stdout=StringIO(), stderr=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(ImageJob.FAILED, job.status)
+        self.assertEqual(MAX_ATTEMPTS, job.attempts)
+        self.assertIn("FileNotFoundError", job.error)
+
+    def test_stale_job_is_claimed_again(self):
+        """Test jobs left processing by a crashed worker are picked up again."""
+        job = ImageJob.objects.create(product=self.product, source="a.jpg", status=ImageJob.PROCESSING)
+        self.assertIsNone(claim_image_job())
+
+        ImageJob.objects.filter(pk=job.pk).update(updated=job.updated - timedelta(hours=1))
+
+        self.assertEqual(job.pk, claim_image_job().pk)
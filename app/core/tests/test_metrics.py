@@ -0,0 +1,164 @@
+"""
+Test request metrics.
+"""
+import re
+
+from core.metrics import Histogram, SampleBuffer, registry
+from core.models import Category, Product
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+METRICS_URL = reverse("metrics")
+PRODUCT_URL = reverse("store:products-list")
+
+
+def parse_server_timing(header):
+    """Return the metrics of a `Server-Timing` header by name."""
+    return {
+        name: {key: value.strip('"') for key, value in (param.split("=", 1) for param in params)}
+        for name, *params in ([part.strip() for part in metric.split(";")] for metric in header.split(","))
+    }
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Test recording request metrics."""
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        user = get_user_model().objects.create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        category = Category.objects.create(name="electronics")
+        Product.objects.create(
+            category=category,
+            author=user,
+            name="Sample name",
+            price="5.25",
+            description="Sample description",
+            province="Lublin",
+            phone_number="123456789",
+        )
+        self.client = APIClient()
+
+    def get_metric(self, name, view_name):
+        """Return the value of a sample of the scraped metrics."""
+        content = self.client.get(METRICS_URL).content.decode()
+        match = re.search(rf'^{re.escape(name)}{{view="{re.escape(view_name)}"}} (\S+)$', content, re.MULTILINE)
+        return match and float(match.group(1))
+
+    def test_server_timing(self):
+        """Test responses report their queries, SQL time, serializer time and total time."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(PRODUCT_URL)
+
+        timing = parse_server_timing(res["Server-Timing"])
+        self.assertEqual(f"{len(ctx.captured_queries)} queries", timing["db"]["desc"])
+        self.assertGreater(float(timing["serializer"]["dur"]), 0)
+        self.assertGreaterEqual(float(timing["total"]["dur"]), float(timing["db"]["dur"]))
+
+    def test_histograms_by_url_name(self):
+        """Test requests are aggregated by URL name."""
+        self.client.get(PRODUCT_URL)
+        self.client.get(PRODUCT_URL, {"ordering": "price"})
+        self.client.post(reverse("users:register"), {})
+
+        self.assertEqual(2, self.get_metric("http_request_duration_seconds_count", "store:products-list"))
+        self.assertEqual(1, self.get_metric("db_queries_per_request_count", "users:register"))
+
+    def test_unresolved(self):
+        """Test requests to unknown URLs are aggregated together."""
+        self.client.get("/missing/")
+
+        self.assertEqual(1, self.get_metric("http_request_duration_seconds_count", "<unresolved>"))
+
+    def test_exposition_format(self):
+        """Test the metrics are exposed in the Prometheus text format."""
+        self.client.get(PRODUCT_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual("text/plain; version=0.0.4; charset=utf-8", res["Content-Type"])
+        content = res.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", content)
+        self.assertIn('http_request_duration_seconds_bucket{view="store:products-list",le="+Inf"} 1', content)
+        self.assertIn("metrics_dropped_samples_total 0", content)
+
+    def test_streamed_queries(self):
+        """Test queries run while a response is streamed are recorded with its request."""
+        res = self.client.get(reverse("store:products-export"), {"format": "ndjson"})
+        self.assertIsNone(self.get_metric("http_request_duration_seconds_count", "store:products-export"))
+
+        with CaptureQueriesContext(connection) as ctx:
+            b"".join(res.streaming_content)
+
+        self.assertGreater(len(ctx.captured_queries), 0)
+        self.assertEqual(1, self.get_metric("http_request_duration_seconds_count", "store:products-export"))
+        self.assertGreaterEqual(
+            self.get_metric("db_queries_per_request_sum", "store:products-export"), len(ctx.captured_queries)
+        )
+
+    def test_metrics_allowed_ips(self):
+        """Test only the allowed clients can scrape the metrics."""
+        with self.settings(METRICS_ALLOWED_IPS=["10.0.0.0/8"]):
+            forbidden = self.client.get(METRICS_URL)
+            allowed = self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3")
+
+        self.assertEqual(403, forbidden.status_code)
+        self.assertEqual(200, allowed.status_code)
+
+    async def test_async_view(self):
+        """Test queries of async views are counted."""
+        res = await AsyncClient().get(reverse("store:async-product-list"))
+
+        timing = parse_server_timing(res["Server-Timing"])
+        self.assertEqual("2 queries", timing["db"]["desc"])
+
+
+class SampleBufferTests(SimpleTestCase):
+    """Test the request sample ring buffer."""
+
+    def test_drain(self):
+        """Test samples are drained once, in order."""
+        buffer = SampleBuffer(4)
+        for i in range(3):
+            buffer.append(i)
+
+        self.assertEqual([0, 1, 2], buffer.drain())
+        buffer.append(3)
+        self.assertEqual([3], buffer.drain())
+
+    def test_overwritten_samples_are_dropped(self):
+        """Test samples overwritten before a drain are counted as dropped."""
+        buffer = SampleBuffer(4)
+        for i in range(10):
+            buffer.append(i)
+
+        self.assertEqual([6, 7, 8, 9], buffer.drain())
+        self.assertEqual(6, buffer.dropped)
+
+    def test_histogram_bounds(self):
+        """Test histogram buckets include their upper bound."""
+        histogram = Histogram((1, 2))
+        for value in (1, 1.5, 3):
+            histogram.observe(value)
+
+        lines = list(histogram.expose("metric", 'view="a"'))
+
+        self.assertEqual(
+            [
+                'metric_bucket{view="a",le="1"} 1',
+                'metric_bucket{view="a",le="2"} 2',
+                'metric_bucket{view="a",le="+Inf"} 3',
+                'metric_sum{view="a"} 5.5',
+                'metric_count{view="a"} 3',
+            ],
+            lines,
+        )
@@ -0,0 +1,135 @@
+"""
+Test database-maintained model fields.
+"""
+from decimal import Decimal
+
+from core.models import Category, Product
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+
+def create_product(category, author, price):
+    return Product.objects.create(
+        category=category,
+        author=author,
+        name="Sample product",
+        price=Decimal(price),
+        description="Sample description",
+        province="Masovia",
+        phone_number="123456789",
+    )
+
+
+class CategoryStatsTests(TestCase):
+    """Test category product counts and price bounds are kept up to date."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.electronics = Category.objects.create(name="electronics")
+        self.furniture = Category.objects.create(name="furniture")
+
+    def assertStats(self, category, product_count, min_price, max_price):
+        category.refresh_from_db()
+        self.assertEqual(product_count, category.product_count)
+        self.assertEqual(min_price and Decimal(min_price), category.min_price)
+        self.assertEqual(max_price and Decimal(max_price), category.max_price)
+
+    def test_empty_category(self):
+        """Test a category without products has no price bounds."""
+        self.assertStats(self.electronics, 0, None, None)
+
+    def test_create_products(self):
+        """Test creating products updates the count and bounds."""
+        create_product(self.electronics, self.user, "10.00")
+        create_product(self.electronics, self.user, "5.00")
+        create_product(self.electronics, self.user, "20.00")
+
+        self.assertStats(self.electronics, 3, "5.00", "20.00")
+        self.assertStats(self.furniture, 0, None, None)
+
+    def test_bulk_create_products(self):
+        """Test products created in one statement update the stats."""
+        Product.objects.bulk_create(
+            [
+                Product(
+                    category=category,
+                    author=self.user,
+                    name="Sample product",
+                    price=Decimal(price),
+                    description="Sample description",
+                    province="Masovia",
+                    phone_number="123456789",
+                )
+                for category, price in [
+                    (self.electronics, "1.00"),
+                    (self.electronics, "3.00"),
+                    (self.furniture, "2.00"),
+                ]
+            ]
+        )
+
+        self.assertStats(self.electronics, 2, "1.00", "3.00")
+        self.assertStats(self.furniture, 1, "2.00", "2.00")
+
+    def test_change_price(self):
+        """Test re-pricing the cheapest product moves the lower bound."""
+        cheapest = create_product(self.electronics, self.user, "5.00")
+        create_product(self.electronics, self.user, "10.00")
+
+        cheapest.price = Decimal("15.00")
+        cheapest.save()
+
+        self.assertStats(self.electronics, 2, "10.00", "15.00")
+
+    def test_change_category(self):
+        """Test re-categorizing a product moves it between the stats."""
+        product = create_product(self.electronics, self.user, "5.00")
+        create_product(self.electronics, self.user, "10.00")
+
+        product.category = self.furniture
+        product.save()
+
+        self.assertStats(self.electronics, 1, "10.00", "10.00")
+        self.assertStats(self.furniture, 1, "5.00", "5.00")
+
+    def test_unrelated_update(self):
+        """Test updating other fields leaves the stats unchanged."""
+        product = create_product(self.electronics, self.user, "5.00")
+
+        product.name = "Updated name"
+        product.save()
+
+        self.assertStats(self.electronics, 1, "5.00", "5.00")
+
+    def test_delete_products(self):
+        """Test deleting products updates the count and bounds."""
+        create_product(self.electronics, self.user, "5.00")
+        most_expensive = create_product(self.electronics, self.user, "10.00")
+
+        most_expensive.delete()
+        self.assertStats(self.electronics, 1, "5.00", "5.00")
+
+        Product.objects.filter(category=self.electronics).delete()
+        self.assertStats(self.electronics, 0, None, None)
+
+    def test_stale_category_save(self):
+        """Test saving a category loaded before product writes keeps the stats of the triggers."""
+        stale = Category.objects.get(name="electronics")
+        products = [create_product(self.electronics, self.user, price) for price in ("5.00", "10.00")]
+
+        stale.save()
+        self.assertStats(self.electronics, 2, "5.00", "10.00")
+
+        for product in products:
+            product.delete()
+        self.assertStats(self.electronics, 0, None, None)
+
+    def test_category_insert(self):
+        """Test saving a new category still inserts it."""
+        Category(name="books").save()
+
+        self.assertStats(Category(name="books"), 0, None, None)
@@ -0,0 +1,226 @@
+import time
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+
+from core.models import Product
+from core.routers import (
+    PRIMARY_COOKIE,
+    ReplicaRouter,
+    RequestRouting,
+    current_routing,
+    get_sticky_user_key,
+    reading_from_primary,
+)
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from store.cache import response_cache_stats
+from store.tests.test_store_api import (
+    CATEGORY_URL,
+    PRODUCT_URL,
+    create_category,
+    create_product,
+    create_user,
+    detail_url,
+)
+from store.views import category_cache
+
+USER_URL = reverse("users:rest_user_details")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0", "replica_1"])
+@patch("core.routers.connections", {"default": Mock(in_atomic_block=False)})
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the database reads of requests are routed to."""
+
+    router = ReplicaRouter()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_read_alias(self, method, path, user=None, model=Product, **cookies):
+        request = getattr(RequestFactory(), method)(path)
+        request.COOKIES.update(cookies)
+        request.resolver_match = resolve(path)
+        if user is not None:
+            request.user = user
+        token = current_routing.set(RequestRouting(request))
+        try:
+            return [self.router.db_for_read(model) for _ in range(5)]
+        finally:
+            current_routing.reset(token)
+
+    def test_store_reads_use_one_replica(self):
+        """Test safe-method store requests read from a single replica."""
+        aliases = self.get_read_alias("get", PRODUCT_URL)
+
+        self.assertIn(aliases[0], settings.DATABASE_REPLICAS)
+        self.assertEqual([aliases[0]] * 5, aliases)
+        self.assertIn(self.get_read_alias("head", PRODUCT_URL)[0], settings.DATABASE_REPLICAS)
+
+    def test_primary_reads(self):
+        """Test writes, other apps and requests outside of the middleware read from the primary."""
+        self.assertEqual([None] * 5, self.get_read_alias("post", PRODUCT_URL))
+        self.assertEqual([None] * 5, self.get_read_alias("get", USER_URL))
+        self.assertIsNone(self.router.db_for_read(Product))
+        self.assertEqual("default", self.router.db_for_write(Product))
+
+    def test_sticky_client_reads_primary(self):
+        """Test a client that wrote recently reads from the primary until the sticky window ends."""
+        self.assertEqual([None] * 5, self.get_read_alias("get", PRODUCT_URL, **{PRIMARY_COOKIE: str(time.time() + 5)}))
+
+        aliases = self.get_read_alias("get", PRODUCT_URL, **{PRIMARY_COOKIE: str(time.time() - 1)})
+        self.assertIn(aliases[0], settings.DATABASE_REPLICAS)
+
+    def test_sticky_user_reads_primary(self):
+        """Test a user that wrote recently reads from the primary without the sticky cookie."""
+        user = Mock(pk=1, is_authenticated=True)
+        self.assertIn(self.get_read_alias("get", PRODUCT_URL, user=user)[0], settings.DATABASE_REPLICAS)
+
+        cache.set(get_sticky_user_key(1), True)
+
+        self.assertEqual([None] * 5, self.get_read_alias("get", PRODUCT_URL, user=user))
+
+    def test_cache_fill_and_user_reads_primary(self):
+        """Test reads filling shared caches and reads of users stay on the primary."""
+        with reading_from_primary():
+            self.assertEqual([None] * 5, self.get_read_alias("get", PRODUCT_URL))
+        self.assertEqual([None] * 5, self.get_read_alias("get", PRODUCT_URL, model=get_user_model()))
+
+    def test_transaction_reads_primary(self):
+        """Test reads inside a transaction stay on the primary."""
+        with patch("core.routers.connections", {"default": Mock(in_atomic_block=True)}):
+            self.assertEqual([None] * 5, self.get_read_alias("get", PRODUCT_URL))
+
+    def test_no_replicas(self):
+        """Test everything reads from the primary without replicas."""
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual([None] * 5, self.get_read_alias("get", PRODUCT_URL))
+
+    def test_allow_migrate(self):
+        """Test migrations only run on the primary."""
+        self.assertTrue(self.router.allow_migrate("default", "core"))
+        self.assertFalse(self.router.allow_migrate("replica_0", "core"))
+
+
+class StickyCookieTests(TestCase):
+    """Test clients that write are sent to the primary for a while."""
+
+    def setUp(self):
+        self.user = create_user(email="testUser1@example.com", password="testPass123", username="TestUser1")
+        self.product = create_product(create_category("electronics"), self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_successful_write_sets_cookie(self):
+        """Test a successful write sets the sticky cookie for the sticky window."""
+        with self.settings(REPLICA_STICKY_SECONDS=7):
+            res = self.client.patch(detail_url(self.product.id), {"name": "Renamed"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        cookie = res.cookies[PRIMARY_COOKIE]
+        self.assertEqual(7, cookie["max-age"])
+        self.assertAlmostEqual(time.time() + 7, float(cookie.value), delta=5)
+
+    def test_successful_write_sticks_user(self):
+        """Test a write sends later reads of the user to the primary, also from clients without cookies."""
+        cache.clear()
+
+        self.client.patch(detail_url(self.product.id), {"name": "Renamed"})
+
+        self.assertTrue(cache.get(get_sticky_user_key(self.user.pk)))
+
+    def test_reads_and_failed_writes_set_no_cookie(self):
+        """Test reads and rejected writes don't set the sticky cookie."""
+        self.assertNotIn(PRIMARY_COOKIE, self.client.get(PRODUCT_URL).cookies)
+        res = self.client.patch(detail_url(self.product.id), {"price": "not a price"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(PRIMARY_COOKIE, res.cookies)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+class CacheFillRoutingTests(TestCase):
+    """Test cached store responses are built from the primary, so a lagging replica is never cached."""
+
+    def setUp(self):
+        cache.clear()
+        response_cache_stats.reset()
+        self.user = create_user(email="testUser1@example.com", password="testPass123", username="TestUser1")
+        create_product(create_category("electronics"), self.user)
+        self.aliases = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            # Records where reads would go, while running them on the test database.
+            self.aliases.append(db_for_read(router, model, **hints))
+
+        patches = [
+            patch("core.routers.connections", {"default": Mock(in_atomic_block=False)}),
+            patch.object(ReplicaRouter, "db_for_read", record),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_response_cache_filled_from_primary(self):
+        """Test an anonymous list missing the response cache reads only from the primary."""
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual("MISS", res["X-Cache"])
+        self.assertTrue(self.aliases)
+        self.assertEqual({None}, set(self.aliases))
+
+    def test_uncached_responses_read_replica(self):
+        """Test responses that aren't cached still read from the replica."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("replica_0", self.aliases)
+
+    def test_category_cache_filled_from_primary(self):
+        """Test the pre-serialized category list is built from the primary."""
+        category_cache.get()
+        self.aliases.clear()
+        cache.incr(category_cache.version_key)
+
+        res = self.client.get(CATEGORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.aliases)
+        self.assertEqual({None}, set(self.aliases))
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "Needs DB_REPLICAS.")
+class ReplicaQueryTests(TransactionTestCase):
+    """Test the queries of store requests run on the replica connections."""
+
+    databases = "__all__"
+
+    def setUp(self):
+        self.user = create_user(email="testUser1@example.com", password="testPass123", username="TestUser1")
+        create_product(create_category("electronics"), self.user)
+
+    def test_store_list_reads_replica(self):
+        """Test listing products queries a replica and not the primary."""
+        client = APIClient()
+        # Anonymous responses are cached, and so built from the primary.
+        client.force_authenticate(self.user)
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with self.settings(DATABASE_REPLICAS=settings.DATABASE_REPLICAS[:1]):
+            with CaptureQueriesContext(connections["default"]) as primary, CaptureQueriesContext(replica) as queries:
+                res = client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(1, len(res.data["results"]))
+        self.assertTrue(queries.captured_queries)
+        self.assertFalse(primary.captured_queries)
@@ -0,0 +1,139 @@
+"""
+Test content-addressed storage of product images.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from core.images import enqueue_image_processing, variant_file_path
+from core.models import Category, ImageJob, Product
+from core.storage import content_addressed_storage
+from core.views import serve_media
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.transaction import TransactionManagementError
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    """Test deduplicated, reference-counted product image storage."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category = Category.objects.create(name="electronics")
+
+    def create_product(self, content=None):
+        product = Product.objects.create(
+            category=self.category,
+            author=self.user,
+            name="Sample name",
+            price="5.25",
+            description="Sample description",
+            province="Lublin",
+            phone_number="123456789",
+        )
+        if content is not None:
+            product.image.save("photo.JPG", ContentFile(content))
+        return product
+
+    def test_same_content_is_stored_once(self):
+        """Test identical uploads share one blob named after its digest."""
+        digest = hashlib.sha256(b"same bytes").hexdigest()
+
+        product1 = self.create_product(b"same bytes")
+        product2 = self.create_product(b"same bytes")
+
+        self.assertEqual(f"uploads/product/{digest[:2]}/{digest}.jpg", product1.image.name)
+        self.assertEqual(product1.image.name, product2.image.name)
+        directory = os.path.dirname(product1.image.path)
+        self.assertEqual([f"{digest}.jpg"], os.listdir(directory))
+        self.assertFalse([name for name in os.listdir(os.path.dirname(directory)) if name.endswith(".tmp")])
+
+    def test_different_content_is_stored_separately(self):
+        """Test different uploads get different blobs."""
+        product1 = self.create_product(b"first")
+        product2 = self.create_product(b"second")
+
+        self.assertNotEqual(product1.image.name, product2.image.name)
+
+    def test_blob_deleted_with_last_reference(self):
+        """Test a shared blob and its variants are deleted with the last product using it."""
+        product1 = self.create_product(b"shared")
+        product2 = self.create_product(b"shared")
+        name = product1.image.name
+        variant = variant_file_path(name, "thumbnail", "jpg")
+        default_storage.save(variant, ContentFile(b"variant"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product1.delete()
+        self.assertTrue(content_addressed_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product2.delete()
+        self.assertFalse(content_addressed_storage.exists(name))
+        self.assertFalse(default_storage.exists(variant))
+
+    def test_replaced_blob_is_released(self):
+        """Test replacing an image releases the previous blob."""
+        product = self.create_product(b"old")
+        old_name = product.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.image.save("photo.jpg", ContentFile(b"new"))
+
+        self.assertFalse(content_addressed_storage.exists(old_name))
+
+    def test_variants_are_reused(self):
+        """Test a product sharing an image with processed variants doesn't queue processing."""
+        product1 = self.create_product(b"shared")
+        product1.image_variants = {"thumbnail": {"jpeg": "t.jpg"}}
+        product1.save()
+        product2 = self.create_product(b"shared")
+
+        self.assertIsNone(enqueue_image_processing(product2))
+
+        product2.refresh_from_db()
+        self.assertEqual(product1.image_variants, product2.image_variants)
+        self.assertFalse(ImageJob.objects.exists())
+
+    def test_immutable_media_cache_headers(self):
+        """Test content-addressed files are served with far-future cache headers."""
+        product = self.create_product(b"cacheable")
+        default_storage.save("uploads/other.txt", ContentFile(b"mutable"))
+        request = RequestFactory().get("/")
+
+        res = serve_media(request, product.image.name, document_root=MEDIA_ROOT)
+        self.assertIn("max-age=31536000", res["Cache-Control"])
+        self.assertIn("immutable", res["Cache-Control"])
+
+        res = serve_media(request, "uploads/other.txt", document_root=MEDIA_ROOT)
+        self.assertFalse(res.has_header("Cache-Control"))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedStorageTransactionTests(TransactionTestCase):
+    """Test blobs are only saved while their reference is written in the same transaction."""
+
+    def test_save_requires_atomic(self):
+        """Test saving outside of a transaction is refused, since the blob lock wouldn't be held."""
+        with self.assertRaises(TransactionManagementError):
+            content_addressed_storage.save("photo.jpg", ContentFile(b"unlocked bytes"))
+
+        with transaction.atomic():
+            name = content_addressed_storage.save("photo.jpg", ContentFile(b"locked bytes"))
+        self.assertTrue(content_addressed_storage.exists(name))
@@ -0,0 +1,24 @@
+"""
+Helpers shared by the throttles of the apps.
+"""
+from rest_framework.settings import api_settings
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Return the number of requests and the period in seconds of a DRF rate like `20/hour`."""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+class ClientAddressMixin:
+    """Throttle mixin identifying clients by `REMOTE_ADDR`, unless `NUM_PROXIES` trusted proxies are configured.
+
+    Without `NUM_PROXIES` DRF's `get_ident` keys on the whole `X-Forwarded-For` header, which clients set freely.
+    """
+
+    def get_ident(self, request):
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get("REMOTE_ADDR")
+        return super().get_ident(request)
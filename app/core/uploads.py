@@ -0,0 +1,116 @@
+"""
+Chunked product image uploads, written to a part file in MEDIA_ROOT until finalized.
+"""
+import os
+import time
+from datetime import timedelta
+
+from core.models import ImageUpload
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+PART_DIRECTORY = os.path.join("uploads", "incomplete")
+UPLOAD_TTL = timedelta(days=1)
+READ_SIZE = 64 * 1024
+IMAGE_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+
+class IncompleteChunk(Exception):
+    """The request body ended before the announced chunk length."""
+
+
+class InvalidImage(Exception):
+    """The uploaded file isn't a supported image."""
+
+
+class PartFile(File):
+    """Part file handed to the storage, which moves it into place instead of copying it."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def part_path(upload):
+    """Return the filesystem path of the part file of an upload."""
+    return default_storage.path(os.path.join(PART_DIRECTORY, f"{upload.pk}.part"))
+
+
+def create_part(upload):
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+
+def write_chunk(upload, start, length, stream):
+    """Write `length` bytes read from the stream at offset `start` of the part file.
+
+    Memory use is bounded by `READ_SIZE`. Bytes past the chunk left by an interrupted attempt are kept,
+    since a concurrent attempt may have written them, and are overwritten by the following chunks.
+    """
+    with open(part_path(upload), "r+b") as file:
+        file.seek(start)
+        remaining = length
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                raise IncompleteChunk()
+            file.write(data)
+            remaining -= len(data)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def read_image_header(upload):
+    """Return the format and size of the uploaded image, decoding only its header."""
+    try:
+        with Image.open(part_path(upload)) as image:
+            image_format, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise InvalidImage("Upload a valid image. The file you uploaded was either not an image or a corrupted image.")
+    if image_format not in IMAGE_FORMATS:
+        raise InvalidImage(f"Unsupported image format {image_format}.")
+    if Image.MAX_IMAGE_PIXELS and width * height > Image.MAX_IMAGE_PIXELS:
+        raise InvalidImage("The image has too many pixels.")
+    return image_format, (width, height)
+
+
+def finalize_upload(upload):
+    """Validate a complete upload and move it into place as the product image."""
+    image_format, _ = read_image_header(upload)
+    product = upload.product
+    with open(part_path(upload), "rb") as file:
+        product.image.save(f"image.{IMAGE_FORMATS[image_format]}", PartFile(file), save=False)
+    product.image_variants = {}
+    product.save()
+    # The storage moves the part file into place, unless the same image is already stored.
+    remove_part(upload)
+    upload.delete()
+    return product
+
+
+def remove_part(upload):
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def delete_upload(upload):
+    remove_part(upload)
+    upload.delete()
+
+
+def delete_expired_uploads():
+    """Delete uploads that weren't finalized in time, and part files left by deleted products."""
+    for upload in ImageUpload.objects.filter(updated__lt=timezone.now() - UPLOAD_TTL):
+        delete_upload(upload)
+
+    directory = default_storage.path(PART_DIRECTORY)
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - UPLOAD_TTL.total_seconds()
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
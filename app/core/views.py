@@ -0,0 +1,35 @@
+import ipaddress
+
+from core.metrics import registry
+from core.storage import is_immutable
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """Serve uploaded media, letting clients cache content-addressed files forever."""
+    response = serve(request, path, document_root=document_root, show_indexes=show_indexes)
+    if response.status_code in (200, 304) and is_immutable(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
+
+
+def is_metrics_client(request):
+    """Return whether the client address is in `METRICS_ALLOWED_IPS`."""
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_IPS)
+
+
+def metrics(request):
+    """Expose the request metrics of this process in the Prometheus text format to the allowed clients."""
+    if not is_metrics_client(request):
+        raise PermissionDenied
+    return HttpResponse(registry.expose(), content_type="text/plain; version=0.0.4; charset=utf-8")
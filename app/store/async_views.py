@@ -0,0 +1,136 @@
+"""
+Async read-only product and category endpoints, for serving many slow clients per worker under ASGI.
+
+Querysets are built with the filter backends of `ProductViewSet`, which don't touch the database,
+and read with the async ORM. Serialization runs on fully loaded rows, so it never queries.
+Requests count against the same throttle budgets as the product and category APIs, by client IP.
+"""
+from asgiref.sync import sync_to_async
+from core.models import Product
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import Throttled, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from store.filters import ProductSearchFilter
+from store.serializers import ProductListSerializer, ProductSerializer
+from store.throttling import SlidingWindowThrottle, throttle_request
+from store.views import ProductViewSet, category_cache
+
+renderer = JSONRenderer()
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    """Return the data rendered like the JSON responses of the DRF views."""
+    return HttpResponse(renderer.render(data), status=status, content_type="application/json", headers=headers)
+
+
+def method_not_allowed(request):
+    return json_response(
+        {"detail": f'Method "{request.method}" not allowed.'},
+        status=status.HTTP_405_METHOD_NOT_ALLOWED,
+        headers={"Allow": "GET, HEAD"},
+    )
+
+
+async def throttle(request, scope):
+    """Return a throttled response if the client is over the budget of `scope`, else None.
+
+    These views don't authenticate, so clients are counted by IP. Counting can sync with the cache,
+    so it runs in a thread instead of blocking the event loop.
+    """
+    key = f"ip:{SlidingWindowThrottle().get_ident(request)}"
+    # The counters are locked, so they don't need the thread the ORM runs in.
+    allowed, wait = await sync_to_async(throttle_request, thread_sensitive=False)(key, scope)
+    if allowed:
+        return None
+    exc = Throttled(wait)
+    # Same header as the throttled responses of the DRF views.
+    headers = {"Retry-After": "%d" % wait} if wait else None
+    return json_response({"detail": exc.detail}, status=exc.status_code, headers=headers)
+
+
+def get_product_list_queryset(request):
+    """Return the products matching the list filters, search and ordering of the request."""
+    view = ProductViewSet(action="list", request=Request(request), format_kwarg=None)
+    return view.filter_queryset(view.get_queryset())
+
+
+def get_page_link(request, page_number):
+    url = request.build_absolute_uri()
+    if page_number == 1:
+        return remove_query_param(url, "page")
+    return replace_query_param(url, "page", page_number)
+
+
+async def product_list(request):
+    """List products with the same filters and page number pagination as the product list API.
+
+    Counts are always exact, like the product list API with `?exact_count=1`.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return method_not_allowed(request)
+    response = await throttle(
+        request, "store_search" if request.GET.get(ProductSearchFilter.search_param) else "store_list"
+    )
+    if response is not None:
+        return response
+
+    try:
+        queryset = get_product_list_queryset(request)
+    except ValidationError as exc:
+        return json_response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+
+    page_size = api_settings.PAGE_SIZE
+    try:
+        page_number = int(request.GET.get("page", 1))
+    except ValueError:
+        page_number = 0
+    count = await queryset.acount()
+    last_page = max(1, -(-count // page_size))
+    if not 1 <= page_number <= last_page:
+        return json_response({"detail": "Invalid page."}, status=status.HTTP_404_NOT_FOUND)
+
+    start = (page_number - 1) * page_size
+    end = start + page_size
+    products = [product async for product in queryset[start:end].aiterator()]
+    return json_response(
+        {
+            "count": count,
+            "count_is_estimate": False,
+            "next": get_page_link(request, page_number + 1) if page_number < last_page else None,
+            "previous": get_page_link(request, page_number - 1) if page_number > 1 else None,
+            "results": ProductListSerializer(products, many=True, context={"request": request}).data,
+        }
+    )
+
+
+async def product_detail(request, pk):
+    """Get a product with its author, like the product detail API."""
+    if request.method not in ("GET", "HEAD"):
+        return method_not_allowed(request)
+    response = await throttle(request, "store_list")
+    if response is not None:
+        return response
+
+    try:
+        product = await Product.objects.select_related("author").aget(pk=pk)
+    except (Product.DoesNotExist, DjangoValidationError):
+        return json_response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    return json_response(ProductSerializer(product, context={"request": request}).data)
+
+
+async def category_list(request):
+    """List categories from the pre-serialized category cache."""
+    if request.method not in ("GET", "HEAD"):
+        return method_not_allowed(request)
+    response = await throttle(request, "store_list")
+    if response is not None:
+        return response
+
+    # Only a version check unless the list has to be rebuilt after a write.
+    _, (_, content) = await sync_to_async(category_cache.get)()
+    return HttpResponse(content, content_type="application/json")
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+from core.metrics import registry
+from core.routers import reading_from_primary
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+GENERATION_KEY = "store:generation"
+CATEGORIES_VERSION_KEY = "store:categories:version"
+AUTHORS_MODIFIED_KEY = "store:authors:modified"
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+
+
+def get_version(key):
+    """Return the current value of a version counter kept in the cache."""
+    version = cache.get(key)
+    if version is None:
+        # Seeding from the clock keeps an evicted counter from going back to values used before.
+        seed = time.time_ns() // 1000
+        cache.add(key, seed, timeout=None)
+        version = cache.get(key, seed)
+    return version
+
+
+def bump_version(key):
+    """Increment a version counter, invalidating everything cached under the previous value."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return get_version(key)
+
+
+def bump_version_on_commit(key):
+    """Bump a version counter now and again once the current transaction commits."""
+    bump_version(key)
+    # The second bump drops anything cached from pre-commit data in the meantime.
+    transaction.on_commit(lambda: bump_version(key))
+
+
+def get_authors_modified():
+    """Return when a user last changed a field product responses render for their author, as a timestamp."""
+    modified = cache.get(AUTHORS_MODIFIED_KEY)
+    if modified is None:
+        # An evicted time could be older than the last change, so it restarts from now.
+        cache.add(AUTHORS_MODIFIED_KEY, time.time(), timeout=None)
+        modified = cache.get(AUTHORS_MODIFIED_KEY, time.time())
+    return modified
+
+
+def touch_authors_modified_on_commit():
+    """Move the authors' modification time to now, and again once the current transaction commits."""
+    cache.set(AUTHORS_MODIFIED_KEY, time.time(), timeout=None)
+    transaction.on_commit(lambda: cache.set(AUTHORS_MODIFIED_KEY, time.time(), timeout=None))
+
+
+class PreSerializedCache:
+    """Process-local payload rebuilt whenever a version counter in the shared cache changes.
+
+    With a cache backend shared by all workers, bumping the version invalidates every worker's copy.
+    """
+
+    def __init__(self, version_key, build):
+        self.version_key = version_key
+        self.build = build
+        self._lock = threading.Lock()
+        self._entry = (None, None)
+
+    def get(self):
+        """Return the current version and its payload."""
+        version = get_version(self.version_key)
+        entry = self._entry
+        if entry[0] != version:
+            with self._lock:
+                entry = self._entry
+                if entry[0] != version:
+                    # Built from a lagging replica, the payload would be kept under the new version.
+                    with reading_from_primary():
+                        entry = self._entry = (version, self.build())
+        return entry
+
+
+class PreRenderedResponse(Response):
+    """Response whose JSON rendering of `data` is already known."""
+
+    def __init__(self, data, content, **kwargs):
+        super().__init__(data, **kwargs)
+        self.json_content = content
+
+    @property
+    def rendered_content(self):
+        if not isinstance(self.accepted_renderer, JSONRenderer):
+            return super().rendered_content
+        self["Content-Type"] = self.accepted_renderer.media_type
+        return self.json_content
+
+
+class CacheStats:
+    """Process-local hit and miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def as_dict(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+response_cache_stats = CacheStats()
+registry.add_value(
+    "store_response_cache_hits_total",
+    "Anonymous store responses served from the cache.",
+    "counter",
+    lambda: response_cache_stats.hits,
+)
+registry.add_value(
+    "store_response_cache_misses_total",
+    "Anonymous store responses missing the cache.",
+    "counter",
+    lambda: response_cache_stats.misses,
+)
+
+
+class ResponseCacheMixin:
+    """Cache the data of anonymous `list` and `retrieve` responses.
+
+    Entries are keyed by the path, the normalized query parameters and the store generation,
+    which is bumped on every `Product` and `Category` write. Conditional requests are answered
+    from the validators stored with the entry. A `STORE_RESPONSE_CACHE_TIMEOUT` of 0 turns it off.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request):
+        params = {key: sorted(value for value in values if value) for key, values in request.query_params.lists()}
+        normalized = sorted((key, values) for key, values in params.items() if values)
+        raw = json.dumps([request.build_absolute_uri(request.path), normalized], separators=(",", ":"))
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f"store:response:{get_version(GENERATION_KEY)}:{digest}"
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated or not settings.STORE_RESPONSE_CACHE_TIMEOUT:
+            return handler(request, *args, **kwargs)
+
+        cache_key = self.get_response_cache_key(request)
+        entry = cache.get(cache_key)
+        response_cache_stats.record(hit=entry is not None)
+        if entry is not None:
+            headers = entry["headers"]
+            response = Response(entry["data"], headers={**headers, "X-Cache": "HIT"})
+            return get_conditional_response(
+                request,
+                etag=headers.get("ETag"),
+                last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+                response=response,
+            )
+
+        # Entries are built from the primary, so a lagging replica can't be cached under the new generation.
+        with reading_from_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {header: response[header] for header in VALIDATOR_HEADERS if response.has_header(header)}
+            cache.set(cache_key, {"data": response.data, "headers": headers}, settings.STORE_RESPONSE_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class ConditionalGetMixin:
+    """Add validators to `list` and `retrieve` responses and answer conditional requests.
+
+    Validators are computed with a single aggregate over the filtered queryset, so a matching
+    `If-None-Match` request gets a 304 before any serializer runs. `STORE_CONDITIONAL_GET` turns them off.
+    """
+
+    last_modified_field = "updated"
+
+    def list(self, request, *args, **kwargs):
+        if not settings.STORE_CONDITIONAL_GET:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        counts_results = getattr(self.paginator, "counts_results", True)
+        if callable(counts_results):
+            counts_results = counts_results(queryset, request)
+        if not counts_results:
+            # An aggregate over the whole result would undo what a count-free paginator saves.
+            return super().list(request, *args, **kwargs)
+
+        etag, _ = self.get_validators(request, queryset)
+        # Deleting a product doesn't move the latest modification time of a list, so lists only carry an ETag.
+        return self.get_conditional_response(super().list, request, etag, None, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.STORE_CONDITIONAL_GET:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        etag, last_modified = self.get_validators(request, queryset)
+        return self.get_conditional_response(super().retrieve, request, etag, last_modified, *args, **kwargs)
+
+    def get_validators(self, request, queryset):
+        """Return the ETag and the last modification time of the response to `request`.
+
+        Responses render the author of products, so the validators also change when any author does.
+        """
+        state = queryset.order_by().aggregate(
+            count=Count("pk"),
+            max_pk=Max("pk"),
+            last_modified=Max(self.last_modified_field),
+        )
+        last_modified = state["last_modified"]
+        authors_modified = get_authors_modified()
+        raw = json.dumps(
+            [
+                request.get_full_path(),
+                state["count"],
+                state["max_pk"],
+                last_modified and last_modified.isoformat(),
+                authors_modified,
+            ],
+            separators=(",", ":"),
+        )
+        if last_modified is not None:
+            last_modified = max(last_modified, datetime.fromtimestamp(authors_modified, timezone.utc))
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest()), last_modified
+
+    def get_conditional_response(self, handler, request, etag, last_modified, *args, **kwargs):
+        timestamp = None if last_modified is None else int(last_modified.timestamp())
+        not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
@@ -1,5 +1,10 @@
+import re
+
 from core.models import Product
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 
 
 class ProductFilter(filters.FilterSet):
@@ -10,3 +15,32 @@ class ProductFilter(filters.FilterSet):
             "price": ["gt", "lt"],
             "created": ["gt", "lt"],
         }
+
+
+class ProductSearchFilter(SearchFilter):
+    """Full-text search over `Product.search_vector`, ranked by relevance.
+
+    Keeps the `?search=` contract of `SearchFilter`: every term has to match,
+    and each term is matched as a word prefix.
+    """
+
+    search_config = "simple"
+    vector_field = "search_vector"
+
+    def get_search_query(self, request):
+        """Return a prefix `SearchQuery` built from the search terms, or None."""
+        words = [word for term in self.get_search_terms(request) for word in re.findall(r"\w+", term)]
+        if not words:
+            return None
+        return SearchQuery(" & ".join(f"{word}:*" for word in words), config=self.search_config, search_type="raw")
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if query is None:
+            return queryset
+
+        return (
+            queryset.filter(**{self.vector_field: query})
+            .annotate(search_rank=SearchRank(F(self.vector_field), query))
+            .order_by("-search_rank", *queryset.model._meta.ordering)
+        )
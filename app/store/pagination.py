@@ -0,0 +1,331 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on the requested ordering field plus an ``id`` tiebreaker.
+
+    Pages are fetched with a ``(field, id)`` position predicate instead of an OFFSET,
+    so every page costs the same regardless of depth and no COUNT query is run.
+    """
+
+    counts_results = False
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+    page_size = api_settings.PAGE_SIZE
+    tiebreaker = "id"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.field = queryset.model._meta.get_field(self.ordering.lstrip("-"))
+        cursor = self.decode_cursor(request)
+
+        reverse = cursor is not None and cursor["reverse"]
+        descending = self.ordering.startswith("-") != reverse
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}{self.field.name}", f"{prefix}{self.tiebreaker}")
+        if cursor is not None:
+            queryset = queryset.filter(self.get_position_filter(cursor, descending))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """Return the first requested ordering term, falling back to the model ordering."""
+        ordering = OrderingFilter().get_ordering(request, queryset, view) or queryset.model._meta.ordering
+        return (ordering or [self.tiebreaker])[0]
+
+    def get_position_filter(self, cursor, descending):
+        lookup = "lt" if descending else "gt"
+        position = Q(**{f"{self.tiebreaker}__{lookup}": cursor["id"]})
+        if self.field.name == self.tiebreaker:
+            return position
+
+        return Q(**{f"{self.field.name}__{lookup}": cursor["value"]}) | (
+            Q(**{self.field.name: cursor["value"]}) & position
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            cursor = {
+                "ordering": payload["o"],
+                "value": self.field.to_python(payload["v"]),
+                "id": int(payload["id"]),
+                "reverse": bool(payload["r"]),
+            }
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if cursor["ordering"] != self.ordering:
+            raise NotFound(self.invalid_cursor_message)
+
+        return cursor
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            "o": self.ordering,
+            "v": self.field.value_to_string(instance),
+            "id": getattr(instance, self.tiebreaker),
+            "r": int(reverse),
+        }
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode("ascii"))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            }
+        ]
+
+
+def estimate_count(queryset):
+    """Return the number of rows PostgreSQL expects `queryset` to return, or `None` without statistics.
+
+    Unfiltered querysets use the row count of the table statistics, others the row estimate of their plan.
+    """
+    query = queryset.query
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if not query.where and not query.distinct and not query.combinator and not query.is_sliced:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # Tables that were never analyzed have -1 tuples.
+            if row is not None and row[0] >= 0:
+                return int(row[0])
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedPage(Page):
+    """Page of an estimated count, which knows whether a next page exists from an extra fetched row."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        return self.number + 1
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """Django paginator that trusts `estimate_count` for results of at least `exact_count_threshold` rows.
+
+    Pages past an estimated count can be requested, and the count is corrected by the pages that show
+    it was wrong. Without a threshold every count is exact.
+    """
+
+    def __init__(self, object_list, per_page, exact_count_threshold=None, estimate=estimate_count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.exact_count_threshold = exact_count_threshold
+        self.estimate = estimate
+        self.is_estimate = False
+
+    @cached_property
+    def count(self):
+        if self.exact_count_threshold is not None:
+            estimate = self.estimate(self.object_list)
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                self.is_estimate = True
+                return estimate
+        return self.object_list.count()
+
+    def count_exactly(self):
+        """Replace an estimated count by the exact one."""
+        # Estimates are only made once the count is read.
+        self.count
+        if self.is_estimate:
+            self.count = self.object_list.count()
+            self.is_estimate = False
+            self.__dict__.pop("num_pages", None)
+
+    def validate_number(self, number):
+        if not self.count or not self.is_estimate:
+            return super().validate_number(number)
+        # Whether a page past the estimate exists is only known once it is fetched.
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.is_estimate:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        # One extra row tells whether there is a next page without counting.
+        end = top + 1
+        rows = list(self.object_list[bottom:end])
+        if not rows and number > 1:
+            # Past the real end, which only an exact count tells apart from a page of a wrong estimate.
+            self.count_exactly()
+            raise EmptyPage("That page contains no results")
+
+        has_next = len(rows) > self.per_page
+        if not has_next:
+            self.count = bottom + len(rows)
+            self.is_estimate = False
+        elif self.count <= top:
+            self.count = top + 1
+        self.__dict__.pop("num_pages", None)
+        return EstimatedPage(rows[: self.per_page], number, self, has_next)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Page number pagination with the count estimated from PostgreSQL statistics for large results.
+
+    Results estimated below `exact_count_threshold` rows, or requested with `?exact_count=1`, are counted
+    exactly. `count_is_estimate` tells clients which one they got.
+    """
+
+    exact_count_query_param = "exact_count"
+    exact_count_threshold = 1000
+
+    def __init__(self):
+        self.estimates = {}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, queryset, page_size):
+        """Create the Django paginator, called by `paginate_queryset` in place of a paginator class."""
+        threshold = None if self.is_exact_count_requested(self.request) else self.exact_count_threshold
+        return EstimatedCountPaginator(queryset, page_size, exact_count_threshold=threshold, estimate=self.estimate)
+
+    def get_page_number(self, request, paginator):
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if page_number in self.last_page_strings:
+            # The last page of an estimate could be past the results.
+            paginator.count_exactly()
+        return super().get_page_number(request, paginator)
+
+    def counts_results(self, queryset, request):
+        """Return whether the count of `queryset` will be exact, see `ConditionalGetMixin.list`."""
+        if self.is_exact_count_requested(request):
+            return True
+        estimate = self.estimate(queryset)
+        return estimate is None or estimate < self.exact_count_threshold
+
+    def is_exact_count_requested(self, request):
+        return request.query_params.get(self.exact_count_query_param, "").lower() in ("1", "true")
+
+    def estimate(self, queryset):
+        """Return `estimate_count(queryset)`, planned once per query for the request."""
+        sql, params = queryset.query.sql_with_params()
+        key = (queryset.db, sql, tuple(params))
+        if key not in self.estimates:
+            self.estimates[key] = estimate_count(queryset)
+        return self.estimates[key]
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.page.paginator.count),
+                    ("count_is_estimate", self.page.paginator.is_estimate),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"] = {
+            "count": response_schema["properties"]["count"],
+            "count_is_estimate": {"type": "boolean"},
+            **response_schema["properties"],
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": self.exact_count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Count the results exactly instead of estimating large counts.",
+                "schema": {"type": "boolean"},
+            },
+        ]
@@ -0,0 +1,51 @@
+import json
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import BaseParser
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Request body too large."
+    default_code = "request_too_large"
+
+
+class NDJSONParser(BaseParser):
+    """Parses newline-delimited JSON into a list with one item per non-blank line.
+
+    Lines are read from the stream one by one. Parsing stops as soon as the body is larger than the view's
+    `bulk_max_body_size` or has more items than its `bulk_max_items`, when the view sets them.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        view = parser_context.get("view")
+        max_size = getattr(view, "bulk_max_body_size", None)
+        max_items = getattr(view, "bulk_max_items", None)
+        request = parser_context.get("request")
+        if max_size is not None and request is not None and int(request.META.get("CONTENT_LENGTH") or 0) > max_size:
+            raise RequestTooLarge(f"Ensure the body has no more than {max_size} bytes.")
+
+        items = []
+        size = 0
+        number = 0
+        # Reading one byte past the limit is enough to tell the body is too large.
+        while line := stream.readline(None if max_size is None else max_size - size + 1):
+            size += len(line)
+            number += 1
+            if max_size is not None and size > max_size:
+                raise RequestTooLarge(f"Ensure the body has no more than {max_size} bytes.")
+            if not line.strip():
+                continue
+            if max_items is not None and len(items) == max_items:
+                raise ParseError(f"Ensure there are no more than {max_items} items.")
+            try:
+                items.append(json.loads(line.decode(encoding)))
+            except ValueError as exc:
+                raise ParseError(f"NDJSON parse error on line {number} - {exc}")
+        return items
@@ -0,0 +1,71 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class EchoBuffer:
+    """File-like object handing back whatever is written to it, for `csv.writer`."""
+
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(BaseRenderer):
+    """Base class of renderers that also encode an iterable of rows lazily for streaming responses."""
+
+    charset = "utf-8"
+    rows_per_chunk = 100
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows and isinstance(rows[0], dict) else []
+        return b"".join(self.stream(rows, fields))
+
+    def stream(self, rows, fields):
+        """Yield the encoded rows in chunks of `rows_per_chunk`."""
+        lines = list(self.get_header(fields))
+        for row in rows:
+            lines.append(self.encode_row(row, fields))
+            if len(lines) >= self.rows_per_chunk:
+                yield "".join(lines).encode(self.charset)
+                lines = []
+        if lines:
+            yield "".join(lines).encode(self.charset)
+
+    def get_header(self, fields):
+        return []
+
+    def encode_row(self, row, fields):
+        raise NotImplementedError(".encode_row() must be overridden.")
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """Renders one JSON object per line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def encode_row(self, row, fields):
+        return json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class CSVRenderer(StreamingRenderer):
+    """Renders rows as CSV with a header line."""
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def __init__(self):
+        self.writer = csv.writer(EchoBuffer())
+
+    def get_header(self, fields):
+        return [self.writer.writerow(fields)]
+
+    def encode_row(self, row, fields):
+        if not isinstance(row, dict):
+            return self.writer.writerow([row])
+        return self.writer.writerow([row.get(field) for field in fields])
@@ -0,0 +1,204 @@
+"""
+Precompiled read-only representation of serializers.
+
+`Serializer.to_representation` resolves every field through `get_attribute` and `to_representation` on each
+call. A representation plan picks an attribute getter, a `.values()` row key and a converter for every readable
+field once per serializer class, and then builds plain dicts with the same output as the DRF fields.
+"""
+from decimal import Decimal
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+
+class RepresentationPlan:
+    """Field names, getters and converters of a serializer, for model instances and `.values()` rows.
+
+    Row keys follow the `.values()` naming, so nested serializers read `<source>__<field>` keys.
+    """
+
+    def __init__(self, serializer, prefix=""):
+        self.fields = []
+        # The `.values()` arguments that return every row key the plan reads.
+        self.values_fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*":
+                raise ImproperlyConfigured(f"{serializer.__class__.__name__}.{name} can't be precompiled.")
+            attname, row_key = get_sources(field, prefix)
+            self.values_fields.append(row_key)
+            if isinstance(field, serializers.BaseSerializer):
+                nested = RepresentationPlan(field, prefix=f"{row_key}__")
+                self.values_fields.extend(nested.values_fields)
+                self.fields.append((name, attrgetter(attname), row_key, None, nested))
+            else:
+                self.fields.append((name, attrgetter(attname), row_key, get_converter(field), None))
+
+    def represent(self, instance, state):
+        """Return the representation of a model instance."""
+        data = {}
+        for name, getter, _, convert, nested in self.fields:
+            value = getter(instance)
+            if value is None:
+                data[name] = None
+            elif nested is not None:
+                data[name] = nested.represent(value, state)
+            else:
+                data[name] = convert(value, state)
+        return data
+
+    def represent_row(self, row, state):
+        """Return the representation of a `.values()` row."""
+        data = {}
+        for name, _, row_key, convert, nested in self.fields:
+            value = row[row_key]
+            if value is None:
+                data[name] = None
+            elif nested is not None:
+                data[name] = nested.represent_row(row, state)
+            else:
+                data[name] = convert(value, state)
+        return data
+
+
+class RepresentationState:
+    """Per serializer values the converters need, looked up once instead of once per value."""
+
+    def __init__(self, request):
+        self.request = request
+        self.timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        self.base_urls = {}
+        self.scheme_host = None
+
+    def build_url(self, storage, name):
+        """Return `storage.url(name)`, made absolute like `request.build_absolute_uri` when there is a request."""
+        url = self.get_storage_url(storage, name)
+        if self.request is None:
+            return url
+        if url.startswith("/") and not url.startswith("//") and "/./" not in url and "/../" not in url:
+            if self.scheme_host is None:
+                self.scheme_host = self.request.build_absolute_uri("/")[:-1]
+            # Storage URLs are already quoted, so `iri_to_uri` wouldn't change them.
+            return self.scheme_host + url
+        return self.request.build_absolute_uri(url)
+
+    def get_storage_url(self, storage, name):
+        # `FileSystemStorage.url` joins the quoted name to the base URL, which is plain concatenation without
+        # dot segments.
+        if storage.__class__.url is not FileSystemStorage.url:
+            return storage.url(name)
+        path = filepath_to_uri(name).lstrip("/")
+        if "/." in f"/{path}":
+            return storage.url(name)
+        base_url = self.base_urls.get(id(storage))
+        if base_url is None:
+            base_url = self.base_urls[id(storage)] = storage.base_url
+        return base_url + path
+
+
+class PrecompiledRepresentationMixin:
+    """Serializer mixin that represents instances and `.values()` rows through a per-class representation plan."""
+
+    @classmethod
+    def get_representation_plan(cls):
+        plan = cls.__dict__.get("_representation_plan")
+        if plan is None:
+            plan = cls._representation_plan = RepresentationPlan(cls())
+        return plan
+
+    def to_representation(self, instance):
+        plan = self.get_representation_plan()
+        # The child of a list serializer represents every item, so the state is shared by the whole list.
+        state = self.__dict__.get("_representation_state")
+        if state is None:
+            state = self._representation_state = RepresentationState(self.context.get("request"))
+        if isinstance(instance, dict):
+            return plan.represent_row(instance, state)
+        return plan.represent(instance, state)
+
+
+def get_sources(field, prefix):
+    """Return the attribute path and the `.values()` key of a field."""
+    row_key = prefix + field.source.replace(".", "__")
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        # Matches the pk only optimization of `RelatedField`, which reads the foreign key column.
+        model_field = field.parent.Meta.model._meta.get_field(field.source)
+        return model_field.attname, row_key
+    if isinstance(field, serializers.FileField):
+        return f"{field.source}.name", row_key
+    return field.source, row_key
+
+
+def get_converter(field):
+    """Return a `convert(value, state)` function with the output of `field.to_representation` for non null values."""
+    if hasattr(field, "get_converter"):
+        return field.get_converter()
+
+    fallback = field.to_representation
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            return lambda value, state: field.pk_field.to_representation(value)
+        return lambda value, state: value
+
+    if isinstance(field, serializers.FileField):
+        if not getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL):
+            return lambda value, state: value or None
+        storage = field.parent.Meta.model._meta.get_field(field.source).storage
+
+        def convert_file(value, state):
+            if not value:
+                return None
+            return state.build_url(storage, value)
+
+        return convert_file
+
+    if isinstance(field, serializers.DateTimeField):
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        is_iso_8601 = output_format is not None and output_format.lower() == ISO_8601
+        if not settings.USE_TZ or hasattr(field, "timezone") or not is_iso_8601:
+            return lambda value, state: fallback(value)
+
+        def convert_datetime(value, state):
+            if isinstance(value, str) or value.utcoffset() is None:
+                return fallback(value)
+            value = value.astimezone(state.timezone).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+        return convert_datetime
+
+    if isinstance(field, serializers.DecimalField):
+        coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+        if not coerce_to_string or field.localize or field.decimal_places is None:
+            return lambda value, state: fallback(value)
+        exponent = -field.decimal_places
+
+        def convert_decimal(value, state):
+            # Values read from the column already have the field's scale, so quantizing wouldn't change them.
+            if type(value) is Decimal and value.as_tuple().exponent == exponent:
+                return format(value, "f")
+            return fallback(value)
+
+        return convert_decimal
+
+    if isinstance(field, serializers.ChoiceField):
+        choices = field.choice_strings_to_values
+        return lambda value, state: value if value == "" else choices.get(str(value), value)
+
+    if isinstance(field, serializers.IntegerField):
+        return lambda value, state: int(value)
+
+    if isinstance(field, serializers.CharField):
+        return lambda value, state: str(value)
+
+    if isinstance(field, serializers.ReadOnlyField):
+        return lambda value, state: value
+
+    raise ImproperlyConfigured(f"{field.__class__.__name__} {field.field_name!r} can't be precompiled.")
@@ -1,41 +1,248 @@
-from core.models import Category, Product
+from core.metrics import MeasuredSerializerMixin
+from core.models import Category, ImageUpload, Product
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from store.representation import PrecompiledRepresentationMixin
 
 UserModel = get_user_model()
 
 
-class UserProductSerializer(serializers.ModelSerializer):
+class UserProductSerializer(MeasuredSerializerMixin, PrecompiledRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = UserModel
         fields = ("id", "username", "date_joined", "last_login")
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = "__all__"
 
 
-class ProductSerializer(serializers.ModelSerializer):
+@extend_schema_field(OpenApiTypes.OBJECT)
+class ImageVariantsField(serializers.Field):
+    """Read-only URLs of the generated image variants, optionally limited to a single variant."""
+
+    def __init__(self, variant=None, **kwargs):
+        self.variant = variant
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        urls = {
+            variant: {
+                name: request.build_absolute_uri(default_storage.url(path))
+                if request is not None
+                else default_storage.url(path)
+                for name, path in formats.items()
+            }
+            for variant, formats in value.items()
+        }
+        if self.variant is not None:
+            return urls.get(self.variant)
+        return urls
+
+    def get_converter(self):
+        """Return the precompiled representation converter, see `store.representation`."""
+
+        def convert(value, state):
+            if self.variant is not None:
+                value = {self.variant: value[self.variant]} if self.variant in value else {}
+            urls = {
+                variant: {name: state.build_url(default_storage, path) for name, path in formats.items()}
+                for variant, formats in value.items()
+            }
+            if self.variant is not None:
+                return urls.get(self.variant)
+            return urls
+
+        return convert
+
+
+class ProductSerializer(MeasuredSerializerMixin, PrecompiledRepresentationMixin, serializers.ModelSerializer):
     author = UserProductSerializer(read_only=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ("search_vector",)
+        # Images are only set through the image upload actions, which queue generating their variants.
+        read_only_fields = ("image",)
+
 
+class ProductListSerializer(MeasuredSerializerMixin, PrecompiledRepresentationMixin, serializers.ModelSerializer):
+    thumbnail = ImageVariantsField(variant="thumbnail", source="image_variants")
 
-class ProductListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        exclude = ("author", "description", "phone_number")
+        exclude = ("author", "description", "phone_number", "search_vector", "image_variants")
+
+
+class ProductExportSerializer(MeasuredSerializerMixin, PrecompiledRepresentationMixin, serializers.ModelSerializer):
+    """Product columns of the catalog export, represented from `.values()` rows like the API responses."""
+
+    category_id = serializers.PrimaryKeyRelatedField(source="category", read_only=True)
+    author_id = serializers.PrimaryKeyRelatedField(source="author", read_only=True)
+
+    class Meta:
+        model = Product
+        fields = (
+            "id",
+            "category_id",
+            "author_id",
+            "name",
+            "price",
+            "description",
+            "created",
+            "updated",
+            "province",
+            "phone_number",
+            "image",
+        )
+
+
+class PrefetchedCategoryField(serializers.PrimaryKeyRelatedField):
+    """Category field resolved from the categories prefetched by `ProductBulkListSerializer`."""
+
+    def to_internal_value(self, data):
+        categories = self.context.get("categories")
+        if categories is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool) or not isinstance(data, (str, int)):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return categories[str(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+class ProductBulkListSerializer(serializers.ListSerializer):
+    """Validates products in one batch, collecting per-item errors instead of failing the whole list.
+
+    Invalid items are replaced by `None` in `validated_data` and their errors are kept in `item_errors`.
+    On update, `instance` is a mapping of product ids to products and every item must carry an `id`.
+    """
+
+    default_error_messages = {
+        "not_found": "Not found.",
+        "missing_id": "This field is required.",
+    }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            message = self.error_messages["not_a_list"].format(input_type=type(data).__name__)
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code="not_a_list")
+        if self.max_length is not None and len(data) > self.max_length:
+            message = self.error_messages["max_length"].format(max_length=self.max_length)
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code="max_length")
+
+        names = {str(item["category"]) for item in data if isinstance(item, dict) and "category" in item}
+        self.context["categories"] = Category.objects.in_bulk(names)
+
+        results, self.item_errors = [], []
+        for item in data:
+            try:
+                results.append(self.validate_item(item))
+                self.item_errors.append({})
+            except serializers.ValidationError as exc:
+                results.append(None)
+                self.item_errors.append(exc.detail)
+        return results
 
+    def validate_item(self, item):
+        if self.instance is None:
+            return self.child.run_validation(item)
 
-class ProductImageSerializer(serializers.ModelSerializer):
+        if not isinstance(item, dict) or "id" not in item:
+            raise serializers.ValidationError({"id": [self.error_messages["missing_id"]]})
+        try:
+            self.child.instance = self.instance[int(item["id"])]
+        except (KeyError, TypeError, ValueError):
+            raise serializers.ValidationError({"id": [self.error_messages["not_found"]]})
+        try:
+            return {"instance": self.child.instance, **self.child.run_validation(item)}
+        finally:
+            self.child.instance = None
+
+    def save(self, **kwargs):
+        validated_data = [None if attrs is None else {**attrs, **kwargs} for attrs in self.validated_data]
+        if self.instance is not None:
+            self.instance = self.update(self.instance, validated_data)
+        else:
+            self.instance = self.create(validated_data)
+        return self.instance
+
+    def create(self, validated_data):
+        batch_size = self.context.get("batch_size")
+        products = [self.child.Meta.model(**attrs) for attrs in validated_data if attrs is not None]
+        return self.child.Meta.model.objects.bulk_create(products, batch_size=batch_size)
+
+    def update(self, instance, validated_data):
+        batch_size = self.context.get("batch_size")
+        now = timezone.now()
+        products, fields = [], {"updated"}
+        for attrs in validated_data:
+            if attrs is None:
+                continue
+            product = attrs.pop("instance")
+            for field, value in attrs.items():
+                setattr(product, field, value)
+            # bulk_update() skips auto_now.
+            product.updated = now
+            fields.update(attrs)
+            products.append(product)
+        if products:
+            self.child.Meta.model.objects.bulk_update(products, sorted(fields), batch_size=batch_size)
+        return products
+
+
+class ProductBulkSerializer(serializers.ModelSerializer):
+    """Serializer for creating and updating products in bulk."""
+
+    category = PrefetchedCategoryField(queryset=Category.objects.all())
+
+    class Meta:
+        model = Product
+        exclude = ("author", "image", "image_variants", "search_vector")
+        list_serializer_class = ProductBulkListSerializer
+
+
+class ProductAutocompleteSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Product
+        fields = ("id", "name")
+
+
+class ProductImageSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """Serializer for uploading images to products."""
 
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Product
-        fields = ["id", "image"]
-        read_only_fields = ["id"]
+        fields = ["id", "image", "image_variants"]
+        read_only_fields = ["id", "image_variants"]
         extra_kwargs = {"image": {"required": "True"}}
+
+
+class ImageUploadSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
+    """Serializer for chunked product image uploads."""
+
+    offset = serializers.IntegerField(source="received", read_only=True)
+
+    class Meta:
+        model = ImageUpload
+        fields = ["id", "size", "offset"]
+        read_only_fields = ["id"]
+
+    def validate_size(self, value):
+        max_size = self.context["max_size"]
+        if not 0 < value <= max_size:
+            raise serializers.ValidationError(f"Ensure the size is between 1 and {max_size} bytes.")
+        return value
@@ -0,0 +1,46 @@
+from core.models import Category, Product
+from django.conf import settings
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from store.cache import (
+    CATEGORIES_VERSION_KEY,
+    GENERATION_KEY,
+    bump_version_on_commit,
+    touch_authors_modified_on_commit,
+)
+from store.serializers import UserProductSerializer
+
+
+def get_author_state(instance):
+    # Reads the loaded values directly, so deferred fields aren't fetched.
+    return tuple(instance.__dict__.get(name) for name in UserProductSerializer.Meta.fields)
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_cached_responses(sender, **kwargs):
+    """Invalidate cached store responses after a product or category write."""
+    bump_version_on_commit(GENERATION_KEY)
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_cached_categories(sender, **kwargs):
+    """Invalidate the pre-serialized category list of every worker after a category or product write."""
+    bump_version_on_commit(CATEGORIES_VERSION_KEY)
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def remember_author_state(sender, instance, **kwargs):
+    """Remember the fields a user was loaded with that product responses render for their author."""
+    instance._loaded_author_state = get_author_state(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_author_responses(sender, instance, created, **kwargs):
+    """Invalidate cached store responses and validators after a user changed fields rendered as a product author."""
+    state = get_author_state(instance)
+    if not created and state != instance._loaded_author_state:
+        bump_version_on_commit(GENERATION_KEY)
+        touch_authors_modified_on_commit()
+    instance._loaded_author_state = state
@@ -0,0 +1,102 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from store.tests.test_store_api import (
+    CATEGORY_URL,
+    PRODUCT_URL,
+    create_category,
+    create_product,
+    create_user,
+    detail_url,
+)
+
+ASYNC_PRODUCT_URL = reverse("store:async-product-list")
+ASYNC_CATEGORY_URL = reverse("store:async-category-list")
+
+
+def async_detail_url(product_id):
+    """Create and return an async product detail URL."""
+    return reverse("store:async-product-detail", args=[product_id])
+
+
+class AsyncReadAPITests(TestCase):
+    """Test the async product and category endpoints match the DRF ones."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category1 = create_category("electronics")
+        self.category2 = create_category("furniture")
+        self.products = [
+            create_product(
+                self.category1 if i % 2 else self.category2, self.user, name=f"Product {i}", price=f"{i}.50"
+            )
+            for i in range(11)
+        ]
+        self.client = APIClient()
+        self.async_client = AsyncClient()
+
+    async def assertSameResponse(self, url, async_url, params=None):
+        expected = await self.sync_get(url, params)
+        res = await self.async_client.get(async_url, params)
+
+        self.assertEqual(expected.status_code, res.status_code)
+        self.assertEqual(expected["Content-Type"], res["Content-Type"])
+        self.assertEqual(expected.content.decode().replace(url, async_url), res.content.decode())
+
+    async def sync_get(self, url, params):
+        return await sync_to_async(self.client.get)(url, params)
+
+    async def test_product_list(self):
+        """Test listing products."""
+        await self.assertSameResponse(PRODUCT_URL, ASYNC_PRODUCT_URL)
+
+    async def test_product_list_pages(self):
+        """Test the pages of the product list."""
+        await self.assertSameResponse(PRODUCT_URL, ASYNC_PRODUCT_URL, {"page": 2})
+
+    async def test_product_list_filters(self):
+        """Test filtering, searching and ordering the product list."""
+        params = {"category__name": "electronics", "price__gt": 2, "ordering": "-price", "search": "product"}
+        await self.assertSameResponse(PRODUCT_URL, ASYNC_PRODUCT_URL, params)
+
+    async def test_product_list_invalid_page(self):
+        """Test requesting a page past the end."""
+        res = await self.async_client.get(ASYNC_PRODUCT_URL, {"page": 5})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_product_list_invalid_filter(self):
+        """Test an invalid filter value results in 400."""
+        res = await self.async_client.get(ASYNC_PRODUCT_URL, {"price__gt": "cheap"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("price__gt", res.json())
+
+    async def test_product_detail(self):
+        """Test getting a product with its author."""
+        product = self.products[3]
+        await self.assertSameResponse(detail_url(product.id), async_detail_url(product.id))
+
+    async def test_product_detail_not_found(self):
+        """Test getting a missing product."""
+        res = await self.async_client.get(async_detail_url(0))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_category_list(self):
+        """Test listing categories."""
+        await self.assertSameResponse(CATEGORY_URL, ASYNC_CATEGORY_URL)
+
+    async def test_writes_not_allowed(self):
+        """Test the async endpoints are read-only."""
+        res = await self.async_client.post(ASYNC_PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,202 @@
+import json
+from decimal import Decimal
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from core.models import Category, Product
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from store.parsers import NDJSONParser, RequestTooLarge
+from store.tests.test_store_api import CATEGORY_URL, PRODUCT_URL, create_category, create_product, create_user
+from store.views import ProductViewSet
+
+BULK_URL = reverse("store:products-bulk")
+
+
+def product_payload(**params):
+    """Return a sample product creation payload."""
+    payload = {
+        "category": "electronics",
+        "name": "Sample name",
+        "price": "5.25",
+        "description": "Sample description",
+        "province": "Lublin",
+        "phone_number": "123456789",
+    }
+    payload.update(params)
+    return payload
+
+
+class PublicBulkAPITests(TestCase):
+    """Test unauthenticated bulk requests."""
+
+    def test_auth_required(self):
+        """Test auth is required for bulk writes."""
+        res = APIClient().post(BULK_URL, [product_payload()], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateBulkAPITests(TestCase):
+    """Test bulk creating, updating and deleting products."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category1 = create_category("electronics")
+        self.category2 = create_category("furniture")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating products in bulk with a constant number of queries."""
+        payload = [product_payload(name=f"Product {i}") for i in range(50)]
+
+        with self.assertNumQueries(4):
+            res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        products = Product.objects.filter(author=self.user).order_by("id")
+        self.assertEqual([{"id": product.id} for product in products], res.data["results"])
+        self.assertEqual("Product 0", products[0].name)
+        self.assertEqual(50, Category.objects.get(name="electronics").product_count)
+
+    def test_bulk_create_per_item_errors(self):
+        """Test invalid items are reported without aborting the batch."""
+        payload = [
+            product_payload(),
+            product_payload(category="unknown"),
+            product_payload(phone_number="12345"),
+            "not an object",
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        results = res.data["results"]
+        self.assertIn("id", results[0])
+        self.assertIn("category", results[1]["errors"])
+        self.assertIn("phone_number", results[2]["errors"])
+        self.assertIn("errors", results[3])
+        self.assertEqual(1, Product.objects.count())
+
+    def test_bulk_create_all_invalid(self):
+        """Test a batch without valid items results in 400."""
+        res = self.client.post(BULK_URL, [product_payload(price="free")], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("price", res.data["results"][0]["errors"])
+
+    def test_bulk_create_ndjson(self):
+        """Test creating products from newline-delimited JSON."""
+        body = "\n".join(json.dumps(product_payload(name=f"Product {i}")) for i in range(3)) + "\n\n"
+
+        res = self.client.post(BULK_URL, body, content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(3, Product.objects.filter(author=self.user).count())
+
+    def test_bulk_create_invalid_ndjson(self):
+        """Test malformed NDJSON results in 400."""
+        res = self.client.post(BULK_URL, '{"name": "ok"}\n{broken', content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("line 2", res.data["detail"])
+
+    @patch.object(ProductViewSet, "bulk_max_items", 2)
+    def test_bulk_ndjson_item_limit(self):
+        """Test parsing NDJSON stops with 400 at the first item past the limit."""
+        body = "\n".join(json.dumps(product_payload()) for _ in range(3)) + "\n{broken"
+
+        res = self.client.post(BULK_URL, body, content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("no more than 2 items", res.data["detail"])
+        self.assertFalse(Product.objects.exists())
+
+    @patch.object(ProductViewSet, "bulk_max_body_size", 100)
+    def test_bulk_ndjson_body_size_limit(self):
+        """Test NDJSON bodies larger than the limit result in 413."""
+        body = "\n".join(json.dumps(product_payload()) for _ in range(2))
+
+        res = self.client.post(BULK_URL, body, content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_ndjson_stream_size_limit(self):
+        """Test the body size is enforced while reading a stream of unknown length."""
+        stream = BytesIO(b'{"name": "a"}\n' * 10)
+        view = SimpleNamespace(bulk_max_body_size=50)
+
+        with self.assertRaises(RequestTooLarge):
+            NDJSONParser().parse(stream, parser_context={"view": view})
+        self.assertLessEqual(stream.tell(), 51)
+
+    def test_bulk_requires_list(self):
+        """Test a non-list body results in 400."""
+        res = self.client.post(BULK_URL, product_payload(), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        """Test partially updating owned products in bulk."""
+        product1 = create_product(self.category1, self.user)
+        product2 = create_product(self.category1, self.user)
+        other = create_user(email="testUser2@example.com", password="testPass123", username="TestUser2")
+        unowned = create_product(self.category1, other)
+        payload = [
+            {"id": product1.id, "price": "9.99"},
+            {"id": product2.id, "category": "furniture", "name": "Chair"},
+            {"id": unowned.id, "price": "1.00"},
+            {"price": "1.00"},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data["results"]
+        self.assertEqual([{"id": product1.id}, {"id": product2.id}], results[:2])
+        self.assertIn("id", results[2]["errors"])
+        self.assertIn("id", results[3]["errors"])
+        product1.refresh_from_db()
+        product2.refresh_from_db()
+        unowned.refresh_from_db()
+        self.assertEqual(Decimal("9.99"), product1.price)
+        self.assertGreater(product1.updated, product1.created)
+        self.assertEqual(("furniture", "Chair"), (product2.category_id, product2.name))
+        self.assertEqual(Decimal("5.25"), unowned.price)
+
+    def test_bulk_delete(self):
+        """Test deleting owned products in bulk."""
+        product1 = create_product(self.category1, self.user)
+        product2 = create_product(self.category1, self.user)
+        other = create_user(email="testUser2@example.com", password="testPass123", username="TestUser2")
+        unowned = create_product(self.category1, other)
+
+        res = self.client.delete(BULK_URL, [product1.id, product2.id, unowned.id, "x"], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data["results"]
+        self.assertEqual([{"id": product1.id}, {"id": product2.id}], results[:2])
+        self.assertIn("errors", results[2])
+        self.assertIn("errors", results[3])
+        self.assertEqual([unowned.id], list(Product.objects.values_list("id", flat=True)))
+
+    def test_bulk_create_invalidates_caches(self):
+        """Test bulk writes invalidate cached product and category lists."""
+        client = APIClient()
+        client.get(PRODUCT_URL)
+        client.get(CATEGORY_URL)
+
+        self.client.post(BULK_URL, [product_payload()], format="json")
+
+        self.assertEqual(1, client.get(PRODUCT_URL).data["count"])
+        self.assertEqual(1, client.get(CATEGORY_URL).data[0]["product_count"])
@@ -0,0 +1,390 @@
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from store.cache import CATEGORIES_VERSION_KEY, bump_version, response_cache_stats
+from store.serializers import CategorySerializer, ProductListSerializer, ProductSerializer
+from store.tests.test_store_api import (
+    CATEGORY_URL,
+    PRODUCT_URL,
+    create_category,
+    create_product,
+    create_user,
+    detail_url,
+    image_upload_url,
+)
+from store.views import category_cache
+
+
+class ResponseCacheTests(TestCase):
+    """Test caching of anonymous product and category reads."""
+
+    def setUp(self):
+        cache.clear()
+        response_cache_stats.reset()
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category = create_category("electronics")
+        self.product = create_product(self.category, self.user)
+        self.client = APIClient()
+
+    def test_list_is_cached(self):
+        """Test repeated anonymous list requests are served from the cache."""
+        res = self.client.get(PRODUCT_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(res.data, cached.data)
+        self.assertEqual({"hits": 1, "misses": 1}, response_cache_stats.as_dict())
+
+    def test_counters_exposed(self):
+        """Test the hit and miss counters are part of the metrics."""
+        self.client.get(PRODUCT_URL)
+        self.client.get(PRODUCT_URL)
+        self.client.get(PRODUCT_URL)
+
+        content = self.client.get(reverse("metrics")).content.decode()
+
+        self.assertIn("store_response_cache_hits_total 2", content)
+        self.assertIn("store_response_cache_misses_total 1", content)
+
+    def test_detail_is_cached(self):
+        """Test repeated anonymous detail requests are served from the cache."""
+        url = detail_url(self.product.id)
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(self.product.id, res.data["id"])
+
+    def test_query_params_are_normalized(self):
+        """Test parameter order and empty parameters don't change the cache key."""
+        self.client.get(PRODUCT_URL, {"ordering": "price", "price__gt": 1})
+
+        res = self.client.get(f"{PRODUCT_URL}?search=&price__gt=1&ordering=price")
+
+        self.assertEqual(res["X-Cache"], "HIT")
+
+    def test_different_query_params_are_cached_separately(self):
+        """Test different filters don't share a cache entry."""
+        self.client.get(PRODUCT_URL, {"ordering": "price"})
+
+        res = self.client.get(PRODUCT_URL, {"ordering": "-price"})
+
+        self.assertEqual(res["X-Cache"], "MISS")
+
+    def test_product_create_invalidates_cache(self):
+        """Test creating a product invalidates cached lists."""
+        self.client.get(PRODUCT_URL)
+
+        create_product(self.category, self.user)
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(2, len(res.data["results"]))
+
+    def test_product_update_invalidates_cache(self):
+        """Test updating a product invalidates its cached detail."""
+        url = detail_url(self.product.id)
+        self.client.get(url)
+
+        self.product.name = "Updated name"
+        self.product.save()
+        res = self.client.get(url)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual("Updated name", res.data["name"])
+
+    def test_product_delete_invalidates_cache(self):
+        """Test deleting a product invalidates cached lists."""
+        self.client.get(PRODUCT_URL)
+
+        self.product.delete()
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(0, len(res.data["results"]))
+
+    def test_author_rename_invalidates_cache(self):
+        """Test renaming the author of a product invalidates its cached detail."""
+        url = detail_url(self.product.id)
+        self.client.get(url)
+
+        self.user.username = "Renamed"
+        self.user.save()
+        res = self.client.get(url)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual("Renamed", res.data["author"]["username"])
+
+    def test_unrendered_user_change_keeps_cache(self):
+        """Test user changes that product responses don't render keep the cached responses."""
+        self.client.get(PRODUCT_URL)
+
+        self.user.first_name = "First"
+        self.user.save()
+
+        self.assertEqual("HIT", self.client.get(PRODUCT_URL)["X-Cache"])
+
+    def test_category_create_invalidates_cache(self):
+        """Test creating a category invalidates the cached category list."""
+        self.client.get(CATEGORY_URL)
+
+        create_category("furniture")
+        res = self.client.get(CATEGORY_URL)
+
+        self.assertEqual(2, len(res.data))
+
+    def test_image_upload_invalidates_cache(self):
+        """Test uploading a product image invalidates its cached detail."""
+        url = detail_url(self.product.id)
+        self.client.get(url)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (10, 10)).save(image_file, format="JPEG")
+            image_file.seek(0)
+            client.post(image_upload_url(self.product.id), {"image": image_file}, format="multipart")
+        res = self.client.get(url)
+
+        self.product.refresh_from_db()
+        self.product.image.delete()
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertIsNotNone(res.data["image"])
+
+    def test_authenticated_requests_are_not_cached(self):
+        """Test authenticated users always get fresh responses."""
+        self.client.force_authenticate(self.user)
+        self.client.get(PRODUCT_URL)
+
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertNotIn("X-Cache", res)
+
+    def test_cache_turned_off(self):
+        """Test a timeout of 0 turns the response cache off."""
+        with self.settings(STORE_RESPONSE_CACHE_TIMEOUT=0):
+            self.client.get(PRODUCT_URL)
+            res = self.client.get(PRODUCT_URL)
+
+        self.assertNotIn("X-Cache", res)
+        self.assertEqual({"hits": 0, "misses": 0}, response_cache_stats.as_dict())
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and Last-Modified handling of product and category reads."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category = create_category("electronics")
+        self.product = create_product(self.category, self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_validators(self):
+        """Test product lists carry an ETag but no Last-Modified."""
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", res)
+        self.assertNotIn("Last-Modified", res)
+
+    def test_detail_validators(self):
+        """Test product details carry an ETag and Last-Modified."""
+        res = self.client.get(detail_url(self.product.id))
+
+        self.assertIn("ETag", res)
+        self.assertIn("Last-Modified", res)
+
+    @patch.object(
+        ProductListSerializer, "to_representation", autospec=True, side_effect=ProductListSerializer.to_representation
+    )
+    def test_list_not_modified(self, patched_to_representation):
+        """Test a matching If-None-Match gets a 304 without serializing."""
+        etag = self.client.get(PRODUCT_URL)["ETag"]
+        patched_to_representation.reset_mock()
+
+        res = self.client.get(PRODUCT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(etag, res["ETag"])
+        patched_to_representation.assert_not_called()
+
+    @patch.object(
+        ProductSerializer, "to_representation", autospec=True, side_effect=ProductSerializer.to_representation
+    )
+    def test_detail_not_modified(self, patched_to_representation):
+        """Test a matching If-Modified-Since gets a 304 without serializing."""
+        url = detail_url(self.product.id)
+        last_modified = self.client.get(url)["Last-Modified"]
+        patched_to_representation.reset_mock()
+
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        patched_to_representation.assert_not_called()
+
+    def test_etag_changes_after_update(self):
+        """Test the ETag changes when a listed product changes."""
+        etag = self.client.get(PRODUCT_URL)["ETag"]
+
+        self.product.price = "9.99"
+        self.product.save()
+        res = self.client.get(PRODUCT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(etag, res["ETag"])
+
+    def test_etag_changes_after_delete(self):
+        """Test the ETag changes when a listed product is deleted."""
+        create_product(self.category, self.user)
+        etag = self.client.get(PRODUCT_URL)["ETag"]
+
+        self.product.delete()
+        res = self.client.get(PRODUCT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_validators_change_after_author_rename(self):
+        """Test renaming the author of a product changes the validators of its detail."""
+        url = detail_url(self.product.id)
+        first = self.client.get(url)
+
+        with patch("store.cache.time.time", return_value=time.time() + 5):
+            self.user.username = "Renamed"
+            self.user.save()
+        by_etag = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        by_date = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+
+        self.assertEqual(by_etag.status_code, status.HTTP_200_OK)
+        self.assertEqual("Renamed", by_etag.data["author"]["username"])
+        self.assertEqual(by_date.status_code, status.HTTP_200_OK)
+
+    def test_validators_turned_off(self):
+        """Test `STORE_CONDITIONAL_GET` turns the validators off."""
+        with self.settings(STORE_CONDITIONAL_GET=False):
+            res = self.client.get(detail_url(self.product.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", res)
+        self.assertNotIn("Last-Modified", res)
+
+    def test_etag_depends_on_query(self):
+        """Test different pages of the same products have different ETags."""
+        res1 = self.client.get(PRODUCT_URL, {"ordering": "price"})
+        res2 = self.client.get(PRODUCT_URL, {"ordering": "-price"})
+
+        self.assertNotEqual(res1["ETag"], res2["ETag"])
+
+    def test_cached_response_not_modified(self):
+        """Test anonymous conditional requests are answered from the response cache."""
+        client = APIClient()
+        etag = client.get(PRODUCT_URL)["ETag"]
+
+        with self.assertNumQueries(0):
+            res = client.get(PRODUCT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_category_list_not_modified(self):
+        """Test category lists support conditional requests until a category changes."""
+        etag = self.client.get(CATEGORY_URL)["ETag"]
+
+        res = self.client.get(CATEGORY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        create_category("furniture")
+        res = self.client.get(CATEGORY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class CategoryCacheTests(TestCase):
+    """Test the pre-serialized in-process category list."""
+
+    def setUp(self):
+        cache.clear()
+        self.category1 = create_category("electronics")
+        self.category2 = create_category("furniture")
+        self.client = APIClient()
+
+    def test_served_without_queries(self):
+        """Test a warm category list is served with zero queries."""
+        self.client.get(CATEGORY_URL)
+
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                res = self.client.get(CATEGORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_content_matches_serializer(self):
+        """Test the cached bytes are the JSON rendering of the serializer data."""
+        res = self.client.get(CATEGORY_URL)
+
+        expected = CategorySerializer([self.category1, self.category2], many=True).data
+        self.assertEqual(JSONRenderer().render(expected), res.content)
+        self.assertEqual("application/json", res["Content-Type"])
+
+    def test_version_bump_rebuilds(self):
+        """Test bumping the shared version, as another worker would, rebuilds the list."""
+        self.client.get(CATEGORY_URL)
+        version, _ = category_cache.get()
+
+        bump_version(CATEGORIES_VERSION_KEY)
+        with self.assertNumQueries(1):
+            self.client.get(CATEGORY_URL)
+
+        self.assertNotEqual(version, category_cache.get()[0])
+
+    def test_category_delete_invalidates(self):
+        """Test deleting a category removes it from the cached list."""
+        self.client.get(CATEGORY_URL)
+
+        self.category2.delete()
+        res = self.client.get(CATEGORY_URL)
+
+        self.assertEqual([self.category1.name], [item["name"] for item in res.json()])
+
+    def test_browsable_api(self):
+        """Test the browsable API still renders the category list."""
+        res = self.client.get(CATEGORY_URL, HTTP_ACCEPT="text/html")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(b"electronics", res.content)
+
+    def test_product_write_updates_stats(self):
+        """Test the cached list reflects product counts and prices after a product write."""
+        user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.client.get(CATEGORY_URL)
+
+        create_product(self.category1, user, price="5.00")
+        res = self.client.get(CATEGORY_URL)
+
+        self.assertEqual(
+            {"name": "electronics", "product_count": 1, "min_price": "5.00", "max_price": "5.00"}, res.json()[0]
+        )
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from store.tests.test_store_api import create_category, create_product, create_user
+
+EXPORT_URL = reverse("store:products-export")
+
+
+def read_ndjson(res):
+    """Return the objects of a streamed NDJSON response."""
+    return [json.loads(line) for line in b"".join(res.streaming_content).decode().splitlines()]
+
+
+class ProductExportTests(TestCase):
+    """Test streaming export of the product catalog."""
+
+    def setUp(self):
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category1 = create_category("electronics")
+        self.category2 = create_category("furniture")
+        self.client = APIClient()
+
+    def test_export_ndjson(self):
+        """Test exporting all products as NDJSON."""
+        products = [create_product(self.category1, self.user, name=f"Product {i:03}") for i in range(250)]
+
+        res = self.client.get(EXPORT_URL, {"format": "ndjson"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual("application/x-ndjson; charset=utf-8", res["Content-Type"])
+        self.assertIn('filename="products.ndjson"', res["Content-Disposition"])
+        rows = read_ndjson(res)
+        self.assertEqual([product.id for product in products], [row["id"] for row in rows])
+        self.assertEqual("electronics", rows[0]["category_id"])
+        self.assertEqual(Decimal("5.25"), Decimal(rows[0]["price"]))
+        self.assertNotIn("search_vector", rows[0])
+
+    def test_export_csv(self):
+        """Test exporting products as CSV."""
+        product = create_product(self.category1, self.user, name="Chair, wooden")
+
+        res = self.client.get(EXPORT_URL, {"format": "csv"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/csv"))
+        rows = list(csv.DictReader(io.StringIO(b"".join(res.streaming_content).decode())))
+        self.assertEqual(1, len(rows))
+        self.assertEqual(str(product.id), rows[0]["id"])
+        self.assertEqual("Chair, wooden", rows[0]["name"])
+
+    def test_export_formats_values_like_the_api(self):
+        """Test both formats write datetimes and decimals like the product responses."""
+        product = create_product(self.category1, self.user)
+        detail = self.client.get(reverse("store:products-detail", args=[product.id])).data
+
+        ndjson = read_ndjson(self.client.get(EXPORT_URL, {"format": "ndjson"}))[0]
+        res = self.client.get(EXPORT_URL, {"format": "csv"})
+        csv_row = next(csv.DictReader(io.StringIO(b"".join(res.streaming_content).decode())))
+
+        for field in ("price", "created", "updated"):
+            self.assertEqual(detail[field], ndjson[field])
+            self.assertEqual(detail[field], csv_row[field])
+        self.assertEqual("5.25", ndjson["price"])
+        self.assertIsNone(ndjson["image"])
+
+    def test_export_uses_filters_and_ordering(self):
+        """Test the export honors the list filters and ordering."""
+        expensive = create_product(self.category1, self.user, price=Decimal("3.00"))
+        cheap = create_product(self.category1, self.user, price=Decimal("1.00"))
+        create_product(self.category2, self.user, price=Decimal("2.00"))
+
+        res = self.client.get(
+            EXPORT_URL, {"format": "ndjson", "category__name": "electronics", "ordering": "price", "price__lt": 4}
+        )
+
+        rows = read_ndjson(res)
+        self.assertEqual([cheap.id, expensive.id], [row["id"] for row in rows])
+
+    def test_export_uses_search(self):
+        """Test the export honors full-text search."""
+        create_product(self.category1, self.user, name="Wooden chair")
+        create_product(self.category1, self.user, name="Steel table")
+
+        res = self.client.get(EXPORT_URL, {"format": "ndjson", "search": "wood"})
+
+        self.assertEqual(["Wooden chair"], [row["name"] for row in read_ndjson(res)])
+
+    def test_export_streams_with_server_side_cursor(self):
+        """Test rows are fetched lazily in chunks while the response is consumed."""
+        for _ in range(5):
+            create_product(self.category1, self.user)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(EXPORT_URL, {"format": "ndjson"})
+
+        self.assertEqual(5, len(read_ndjson(res)))
@@ -0,0 +1,246 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from core.models import ImageJob, ImageUpload
+from core.uploads import delete_expired_uploads, part_path, write_chunk
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+from store.tests.test_store_api import create_category, create_product, create_user
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def start_url(product_id):
+    """Create and return the URL starting a chunked image upload."""
+    return reverse("store:products-image-uploads", args=[product_id])
+
+
+def upload_url(product_id, upload_id):
+    """Create and return the URL of a chunked image upload."""
+    return reverse("store:products-image-upload", args=[product_id, upload_id])
+
+
+def finalize_url(product_id, upload_id):
+    """Create and return the URL finalizing a chunked image upload."""
+    return reverse("store:products-image-upload-finalize", args=[product_id, upload_id])
+
+
+def image_bytes(size=(300, 200)):
+    """Return the bytes of a sample PNG image."""
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 64).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ChunkedImageUploadTests(TestCase):
+    """Test the chunked, resumable image upload API."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.product = create_product(create_category("electronics"), self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def start(self, content):
+        res = self.client.post(start_url(self.product.id), {"size": len(content)}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data["id"]
+
+    def put_chunk(self, upload_id, content, first, last=None, **extra):
+        last = len(content) - 1 if last is None else last
+        chunk = content[first:][: last - first + 1]
+        return self.client.put(
+            upload_url(self.product.id, upload_id),
+            chunk,
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {first}-{last}/{len(content)}",
+            **extra,
+        )
+
+    def test_chunked_upload(self):
+        """Test uploading an image in chunks and finalizing it."""
+        content = image_bytes()
+        upload_id = self.start(content)
+
+        for first in range(0, len(content), 1000):
+            res = self.put_chunk(upload_id, content, first, min(first + 999, len(content) - 1))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.post(finalize_url(self.product.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertTrue(self.product.image.name.endswith(".png"))
+        with open(self.product.image.path, "rb") as file:
+            self.assertEqual(content, file.read())
+        self.assertEqual(ImageJob.PENDING, self.product.image_jobs.get().status)
+        self.assertFalse(ImageUpload.objects.exists())
+
+    def test_finalize_already_stored_image(self):
+        """Test finalizing an image that is already stored removes the part file right away."""
+        content = image_bytes()
+        for _ in range(2):
+            upload_id = self.start(content)
+            self.put_chunk(upload_id, content, 0)
+            upload = ImageUpload.objects.get(pk=upload_id)
+            res = self.client.post(finalize_url(self.product.id, upload_id))
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertFalse(os.path.exists(part_path(upload)))
+
+    def test_resume_after_failed_chunk(self):
+        """Test a client can query the offset and retry only the failed chunk."""
+        content = image_bytes()
+        upload_id = self.start(content)
+        self.put_chunk(upload_id, content, 0, 999)
+
+        res = self.put_chunk(upload_id, content, 2000, 2999)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(1000, res.data["offset"])
+
+        res = self.client.get(upload_url(self.product.id, upload_id))
+        self.assertEqual(1000, res.data["offset"])
+        res = self.put_chunk(upload_id, content, 0, 999)
+        self.assertEqual(1000, res.data["offset"])
+        self.put_chunk(upload_id, content, res.data["offset"])
+        res = self.client.post(finalize_url(self.product.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_interrupted_chunk_is_overwritten(self):
+        """Test bytes written by an interrupted attempt are replaced by the retry."""
+        content = image_bytes()
+        upload_id = self.start(content)
+        upload = ImageUpload.objects.get(pk=upload_id)
+        with open(part_path(upload), "wb") as file:
+            file.write(b"garbage" * 100)
+
+        self.put_chunk(upload_id, content, 0)
+        res = self.client.post(finalize_url(self.product.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_chunk_written_outside_transaction(self):
+        """Test the chunk body is read without holding a transaction and the upload lock."""
+        content = image_bytes()
+        upload_id = self.start(content)
+        depths = []
+
+        def record(*args):
+            depths.append(len(connection.atomic_blocks))
+            return write_chunk(*args)
+
+        baseline = len(connection.atomic_blocks)
+        with patch("store.views.write_chunk", record):
+            res = self.put_chunk(upload_id, content, 0)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([baseline], depths)
+
+    def test_concurrent_chunk_conflicts(self):
+        """Test a chunk isn't counted when another chunk moved the offset while it was written."""
+        content = image_bytes()
+        upload_id = self.start(content)
+
+        def write_and_race(upload, *args):
+            write_chunk(upload, *args)
+            ImageUpload.objects.filter(pk=upload.pk).update(received=50)
+
+        with patch("store.views.write_chunk", write_and_race):
+            res = self.put_chunk(upload_id, content, 0, 99)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(50, res.data["offset"])
+
+    def test_finalize_incomplete_upload(self):
+        """Test an incomplete upload can't be finalized."""
+        content = image_bytes()
+        upload_id = self.start(content)
+        self.put_chunk(upload_id, content, 0, 99)
+
+        res = self.client.post(finalize_url(self.product.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_finalize_invalid_image(self):
+        """Test a file that isn't an image is rejected and discarded."""
+        content = b"not an image" * 10
+        upload_id = self.start(content)
+        self.put_chunk(upload_id, content, 0)
+
+        res = self.client.post(finalize_url(self.product.id, upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.image)
+
+    def test_content_range_required(self):
+        """Test chunks without a valid Content-Range are rejected."""
+        content = image_bytes()
+        upload_id = self.start(content)
+
+        res = self.client.put(upload_url(self.product.id, upload_id), content, content_type="application/octet-stream")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.put_chunk(upload_id, content + b"extra", 0)
+        self.assertEqual(res.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_content_length_required(self):
+        """Test chunks without a numeric Content-Length are rejected."""
+        content = image_bytes()
+        upload_id = self.start(content)
+
+        res = self.put_chunk(upload_id, content, 0, CONTENT_LENGTH="")
+        self.assertEqual(res.status_code, status.HTTP_411_LENGTH_REQUIRED)
+
+        res = self.put_chunk(upload_id, content, 0, CONTENT_LENGTH="many")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(0, ImageUpload.objects.get(pk=upload_id).received)
+
+    def test_size_limit(self):
+        """Test uploads larger than the limit can't be started."""
+        res = self.client.post(start_url(self.product.id), {"size": 10**12}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_upload(self):
+        """Test uploads of other users' products are not accessible."""
+        content = image_bytes()
+        upload_id = self.start(content)
+        other = create_user(email="testUser2@example.com", password="testPass123", username="TestUser2")
+        self.client.force_authenticate(other)
+
+        self.assertEqual(
+            self.client.get(upload_url(self.product.id, upload_id)).status_code, status.HTTP_404_NOT_FOUND
+        )
+        res = self.put_chunk(upload_id, content, 0)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_delete_expired_uploads(self):
+        """Test uploads that weren't finalized in time are deleted with their part file."""
+        upload_id = self.start(image_bytes())
+        upload = ImageUpload.objects.get(pk=upload_id)
+        ImageUpload.objects.filter(pk=upload_id).update(updated=upload.updated - timedelta(days=2))
+
+        delete_expired_uploads()
+
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertFalse(os.path.exists(part_path(upload)))
@@ -0,0 +1,228 @@
+from decimal import Decimal
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from core.models import Product
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from store.pagination import EstimatedCountPagination, estimate_count
+from store.tests.test_store_api import create_category, create_product, create_user
+
+PRODUCT_URL = reverse("store:products-list")
+MY_PRODUCTS_URL = reverse("store:products-my-products")
+
+
+def collect_pages(client, url, params):
+    """Follow `next` links and return the ids of every listed product."""
+    ids = []
+    res = client.get(url, params)
+    while True:
+        ids.extend(item["id"] for item in res.data["results"])
+        if res.data["next"] is None:
+            return ids
+        res = client.get(res.data["next"])
+
+
+class KeysetPaginationTests(TestCase):
+    """Test opt-in cursor pagination of the product list."""
+
+    def setUp(self):
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category = create_category("electronics")
+        self.client = APIClient()
+
+    def test_cursor_pagination_response(self):
+        """Test cursor pages have next/previous links and no count."""
+        for _ in range(9):
+            create_product(self.category, self.user)
+
+        res = self.client.get(PRODUCT_URL, {"pagination": "cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", res.data)
+        self.assertEqual(8, len(res.data["results"]))
+        self.assertIsNone(res.data["previous"])
+        self.assertIsNotNone(res.data["next"])
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(1, len(res.data["results"]))
+        self.assertIsNone(res.data["next"])
+        self.assertIsNotNone(res.data["previous"])
+
+    def test_cursor_pagination_no_count_query(self):
+        """Test cursor pagination doesn't run a COUNT query."""
+        create_product(self.category, self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(PRODUCT_URL, {"pagination": "cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(any("COUNT(" in query["sql"].upper() for query in ctx.captured_queries))
+
+    def test_cursor_pagination_with_ties(self):
+        """Test products sharing the ordering value are listed exactly once."""
+        products = [create_product(self.category, self.user, price=Decimal(f"{i % 3}.50")) for i in range(20)]
+
+        ids = collect_pages(self.client, PRODUCT_URL, {"pagination": "cursor", "ordering": "-price"})
+
+        expected = sorted(products, key=lambda product: (-product.price, -product.id))
+        self.assertEqual([product.id for product in expected], ids)
+
+    def test_cursor_pagination_previous_page(self):
+        """Test following the previous link returns the former page."""
+        for i in range(20):
+            create_product(self.category, self.user, name=f"Product {i:02}")
+
+        first = self.client.get(PRODUCT_URL, {"pagination": "cursor", "ordering": "created"})
+        second = self.client.get(first.data["next"])
+        res = self.client.get(second.data["previous"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data["results"], res.data["results"])
+        self.assertIsNone(res.data["previous"])
+
+    def test_cursor_pagination_my_products(self):
+        """Test cursor pagination of owned products."""
+        other = create_user(
+            email="testUser2@example.com",
+            password="testPass123",
+            username="TestUser2",
+        )
+        owned = [create_product(self.category, self.user) for _ in range(10)]
+        create_product(self.category, other)
+        self.client.force_authenticate(self.user)
+
+        ids = collect_pages(self.client, MY_PRODUCTS_URL, {"pagination": "cursor"})
+
+        self.assertEqual(sorted(product.id for product in owned), sorted(ids))
+
+    def test_invalid_cursor(self):
+        """Test an invalid cursor results in 404."""
+        res = self.client.get(PRODUCT_URL, {"pagination": "cursor", "cursor": "invalid"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_changed_ordering(self):
+        """Test a cursor can't be reused with a different ordering."""
+        for _ in range(9):
+            create_product(self.category, self.user)
+
+        res = self.client.get(PRODUCT_URL, {"pagination": "cursor", "ordering": "price"})
+        cursor = parse_qs(urlparse(res.data["next"]).query)["cursor"][0]
+        res = self.client.get(PRODUCT_URL, {"pagination": "cursor", "ordering": "created", "cursor": cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class EstimatedCountPaginationTests(TestCase):
+    """Test estimated counts of the product list."""
+
+    def setUp(self):
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category = create_category("electronics")
+        for _ in range(20):
+            create_product(self.category, self.user)
+        self.client = APIClient()
+
+    def patch_estimate(self, estimate):
+        return patch("store.pagination.estimate_count", return_value=estimate)
+
+    def test_small_results_counted_exactly(self):
+        """Test results estimated below the threshold are counted exactly."""
+        with self.patch_estimate(20):
+            res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(20, res.data["count"])
+        self.assertFalse(res.data["count_is_estimate"])
+        self.assertIn("ETag", res)
+
+    def test_large_results_estimated(self):
+        """Test results estimated above the threshold return the estimate without a COUNT query."""
+        with self.patch_estimate(5000), CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(5000, res.data["count"])
+        self.assertTrue(res.data["count_is_estimate"])
+        self.assertEqual(8, len(res.data["results"]))
+        self.assertIsNotNone(res.data["next"])
+        self.assertNotIn("ETag", res)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+
+    def test_exact_count_requested(self):
+        """Test `?exact_count=1` counts the results exactly."""
+        with self.patch_estimate(5000) as estimate:
+            res = self.client.get(PRODUCT_URL, {"exact_count": "1"})
+
+        self.assertEqual(20, res.data["count"])
+        self.assertFalse(res.data["count_is_estimate"])
+        estimate.assert_not_called()
+
+    def test_last_page_corrects_estimate(self):
+        """Test the last page returns the exact count when the estimate was too high."""
+        with self.patch_estimate(5000):
+            res = self.client.get(PRODUCT_URL, {"page": 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(20, res.data["count"])
+        self.assertFalse(res.data["count_is_estimate"])
+        self.assertEqual(4, len(res.data["results"]))
+        self.assertIsNone(res.data["next"])
+
+    def test_page_past_results(self):
+        """Test a page past the results is not found."""
+        with self.patch_estimate(5000):
+            res = self.client.get(PRODUCT_URL, {"page": 4})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_last_page_of_high_estimate(self):
+        """Test `?page=last` serves the real last page when the estimate is too high."""
+        with self.patch_estimate(1700):
+            res = self.client.get(PRODUCT_URL, {"page": "last"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(20, res.data["count"])
+        self.assertFalse(res.data["count_is_estimate"])
+        self.assertEqual(4, len(res.data["results"]))
+        self.assertIsNone(res.data["next"])
+
+    def test_empty_page_counts_exactly(self):
+        """Test a page past the results of a high estimate is only rejected after an exact count."""
+        with self.patch_estimate(1700), CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PRODUCT_URL, {"page": 50})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+
+    def test_pages_past_low_estimate(self):
+        """Test every page is reachable when the estimate is too low."""
+        with patch.object(EstimatedCountPagination, "exact_count_threshold", 1), self.patch_estimate(2):
+            ids = collect_pages(self.client, PRODUCT_URL, {})
+            res = self.client.get(PRODUCT_URL, {"page": 2})
+
+        self.assertEqual(20, len(ids))
+        self.assertEqual(17, res.data["count"])
+        self.assertTrue(res.data["count_is_estimate"])
+
+    def test_estimate_count(self):
+        """Test estimates come from the table statistics and query plans."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Product._meta.db_table}")
+
+        self.assertEqual(20, estimate_count(Product.objects.all()))
+        self.assertIsInstance(estimate_count(Product.objects.filter(name__icontains="x")), int)
@@ -0,0 +1,181 @@
+from core.models import ImageJob
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from store.serializers import ProductSerializer
+from store.tests.test_store_api import create_category, create_product, create_user, detail_url
+from store.views import ProductViewSet
+
+PRODUCT_URL = reverse("store:products-list")
+MY_PRODUCTS_URL = reverse("store:products-my-products")
+
+
+class ProductQueryPlanTests(TestCase):
+    """Test product list query shapes can be served by indexes.
+
+    The planner is told to avoid seq scans and sorts on a tiny table, so these tests only prove an index is usable
+    for each query shape, not that the planner picks it over a scan at production scale.
+    """
+
+    def setUp(self):
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        # The filtered category is the smallest one, so the composite indexes clearly beat scanning another index.
+        for name, count in (("electronics", 10), ("furniture", 40), ("garden", 40), ("sport", 40)):
+            category = create_category(name)
+            for i in range(count):
+                create_product(category, self.user, name=f"Product {i}", price=f"{i}.99")
+
+        # The table is tiny, so seq scans and sorts are priced out to make the planner show which index it can use.
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE core_product")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+
+    def get_plan(self, params, url=PRODUCT_URL, action="list"):
+        """Return the query plan of a product list page for the given params."""
+        request = Request(APIRequestFactory().get(url, params))
+        view = ProductViewSet(action=action, request=request, format_kwarg=None)
+        view.request.user = self.user
+        queryset = view.filter_queryset(view.get_queryset())
+        return queryset[: view.paginator.page_size].explain()
+
+    def assertUsesIndex(self, plan, index_name):
+        self.assertIn(index_name, plan)
+
+    def test_category_filter_plan(self):
+        """Test filtering by category with the default ordering."""
+        plan = self.get_plan({"category__name": "electronics"})
+        self.assertUsesIndex(plan, "product_category_name_idx")
+
+    def test_category_price_filter_plan(self):
+        """Test filtering by category and price range ordered by price."""
+        params = {"category__name": "electronics", "price__gt": 1, "price__lt": 5, "ordering": "price"}
+        plan = self.get_plan(params)
+        self.assertUsesIndex(plan, "product_category_price_idx")
+
+    def test_category_created_filter_plan(self):
+        """Test filtering by category and creation date ordered by newest."""
+        params = {"category__name": "electronics", "created__gt": "2022-01-01T00:00:00Z", "ordering": "-created"}
+        plan = self.get_plan(params)
+        self.assertUsesIndex(plan, "product_category_created_idx")
+
+    def test_price_ordering_plan(self):
+        """Test ordering by price."""
+        plan = self.get_plan({"ordering": "-price"})
+        self.assertUsesIndex(plan, "product_price_idx")
+
+    def test_price_range_plan(self):
+        """Test filtering by price range."""
+        plan = self.get_plan({"price__gt": 1, "price__lt": 5, "ordering": "price"})
+        self.assertUsesIndex(plan, "product_price_idx")
+
+    def test_created_ordering_plan(self):
+        """Test ordering by creation date."""
+        plan = self.get_plan({"ordering": "-created"})
+        self.assertUsesIndex(plan, "product_created_idx")
+
+    def test_province_ordering_plan(self):
+        """Test ordering by province."""
+        plan = self.get_plan({"ordering": "province"})
+        self.assertUsesIndex(plan, "product_province_created_idx")
+
+    def test_search_plan(self):
+        """Test full-text search."""
+        plan = self.get_plan({"search": "product"})
+        self.assertUsesIndex(plan, "product_search_vector_idx")
+
+    def test_my_products_plan(self):
+        """Test listing owned products."""
+        plan = self.get_plan({}, url=MY_PRODUCTS_URL, action="list_my_products")
+        self.assertUsesIndex(plan, "product_author_name_idx")
+
+
+class ProductQueryCountTests(TestCase):
+    """Test the number of queries of product endpoints doesn't grow with the number of products."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.category = create_category("electronics")
+        self.product = create_product(self.category, self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_products(self, count):
+        for i in range(count):
+            category = create_category(f"category {i}")
+            author = create_user(email=f"author{i}@example.com", password="testPass123", username=f"Author{i}")
+            product = create_product(category, author, name=f"Product {i}")
+            ImageJob.objects.create(product=product, source=f"uploads/product/{i}.jpg")
+
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url, params=None):
+        """Assert a page of one product and a full page take the same number of queries."""
+        single = self.count_queries(url, params)
+        self.add_products(9)
+        self.assertEqual(single, self.count_queries(url, params))
+
+    def test_list(self):
+        """Test listing products."""
+        self.assertConstantQueries(PRODUCT_URL)
+
+    def test_list_cursor_pagination(self):
+        """Test listing products with cursor pagination."""
+        self.assertConstantQueries(PRODUCT_URL, {"pagination": "cursor"})
+
+    def test_my_products(self):
+        """Test listing owned products."""
+        single = self.count_queries(MY_PRODUCTS_URL)
+        for i in range(9):
+            create_product(create_category(f"category {i}"), self.user)
+
+        self.assertEqual(single, self.count_queries(MY_PRODUCTS_URL))
+
+    def test_detail(self):
+        """Test getting a product runs the validators and a single product query with its author."""
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(self.product.id))
+
+        self.assertEqual(self.user.username, res.data["author"]["username"])
+
+    def test_detail_serializer_many(self):
+        """Test serializing many products with the detail queryset doesn't query per product."""
+        self.add_products(9)
+        request = Request(APIRequestFactory().get(PRODUCT_URL))
+        view = ProductViewSet(action="retrieve", request=request, format_kwarg=None)
+
+        with self.assertNumQueries(1):
+            data = ProductSerializer(view.get_queryset(), many=True).data
+
+        self.assertEqual(10, len(data))
+
+    def test_admin_product_changelist(self):
+        """Test the admin product list."""
+        self.client.force_login(self.user)
+        self.assertConstantQueries(reverse("admin:core_product_changelist"))
+
+    def test_admin_image_job_changelist(self):
+        """Test the admin image job list."""
+        ImageJob.objects.create(product=self.product, source="uploads/product/0.jpg")
+        self.client.force_login(self.user)
+        self.assertConstantQueries(reverse("admin:core_imagejob_changelist"))
@@ -0,0 +1,88 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from core.models import Product
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from store.representation import PrecompiledRepresentationMixin
+from store.serializers import ProductListSerializer, ProductSerializer
+from store.tests.test_store_api import create_category, create_product, create_user
+
+
+def render(serializer_class, data, context):
+    """Render the list representation of the data to JSON."""
+    return JSONRenderer().render(serializer_class(data, many=True, context=context).data)
+
+
+def render_with_drf_fields(serializer_class, data, context):
+    """Render the list representation of the data to JSON through the DRF field machinery."""
+    with patch.object(PrecompiledRepresentationMixin, "to_representation", serializers.Serializer.to_representation):
+        return render(serializer_class, data, context)
+
+
+class PrecompiledRepresentationTests(TestCase):
+    """Test the precompiled product serializers render the same bytes as the DRF fields."""
+
+    def setUp(self):
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category = create_category("electronics")
+        create_product(self.category, self.user, price=Decimal("5.00"))
+        create_product(
+            self.category,
+            self.user,
+            name="Zażółć gęślą jaźń",
+            image="uploads/product/ab/abc.jpg",
+            image_variants={"thumbnail": {"jpeg": "uploads/product/ab/abc-thumbnail.jpg"}},
+        )
+        self.user.last_login = timezone.now()
+        self.user.save()
+        create_product(self.category, self.user, price=Decimal("0.10"))
+        self.request = APIRequestFactory().get("/")
+
+    def assertSameRendering(self, serializer_class, data, context):
+        expected = render_with_drf_fields(serializer_class, data, context)
+        self.assertEqual(expected, render(serializer_class, data, context))
+
+    def test_list_serializer(self):
+        """Test the product list representation of model instances."""
+        products = Product.objects.order_by("id")
+        self.assertSameRendering(ProductListSerializer, products, {"request": self.request})
+
+    def test_detail_serializer(self):
+        """Test the product detail representation, including the nested author."""
+        products = Product.objects.select_related("author").order_by("id")
+        self.assertSameRendering(ProductSerializer, products, {"request": self.request})
+
+    def test_without_request(self):
+        """Test URLs are relative without a request."""
+        self.assertSameRendering(ProductSerializer, Product.objects.order_by("id"), {})
+
+    def test_other_timezone(self):
+        """Test dates are converted to the active time zone."""
+        with timezone.override("Europe/Warsaw"):
+            self.assertSameRendering(ProductSerializer, Product.objects.order_by("id"), {"request": self.request})
+
+    def test_unquantized_decimal(self):
+        """Test prices not read from the database are quantized."""
+        products = list(Product.objects.order_by("id"))
+        products[0].price = Decimal("5.5")
+        products[1].price = 7
+
+        self.assertSameRendering(ProductListSerializer, products, {"request": self.request})
+
+    def test_values_rows(self):
+        """Test `.values()` rows render the same as model instances."""
+        for serializer_class in (ProductListSerializer, ProductSerializer):
+            with self.subTest(serializer_class=serializer_class.__name__):
+                fields = serializer_class.get_representation_plan().values_fields
+                rows = Product.objects.order_by("id").values(*fields)
+                expected = render_with_drf_fields(serializer_class, Product.objects.order_by("id"), {})
+
+                self.assertEqual(expected, render(serializer_class, rows, {}))
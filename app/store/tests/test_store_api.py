@@ -2,8 +2,9 @@ import os
 import tempfile
 from decimal import Decimal
 
-from core.models import Category, Product
+from core.models import Category, ImageJob, Product
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from PIL import Image
@@ -13,6 +14,7 @@ from store.serializers import CategorySerializer, ProductListSerializer, Product
 
 PRODUCT_URL = reverse("store:products-list")
 MY_PRODUCTS_URL = reverse("store:products-my-products")
+AUTOCOMPLETE_URL = reverse("store:products-autocomplete")
 CATEGORY_URL = reverse("store:category-list")
 USER_MODEL = get_user_model()
 
@@ -163,6 +165,35 @@ class PublicProductAPITests(TestCase):
         self.assertIn(s1.data, res.data["results"])
         self.assertIn(s3.data, res.data["results"])
 
+    def test_product_list_search_ranking(self):
+        """Test name matches are ranked above description matches."""
+        p1 = create_product(self.category1, self.user1, name="Sample", description="Wooden chair")
+        p2 = create_product(self.category1, self.user1, name="Chair", description="Sample description")
+
+        res = self.client.get(PRODUCT_URL, {"search": "chair"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([p2.id, p1.id], [item["id"] for item in res.data["results"]])
+
+    def test_product_list_search_prefix_and_all_terms(self):
+        """Test search terms match word prefixes and all of them must match."""
+        p1 = create_product(self.category1, self.user1, name="Gaming laptop", description="Fast and light")
+        create_product(self.category1, self.user1, name="Gaming chair", description="Comfortable")
+
+        res = self.client.get(PRODUCT_URL, {"search": "gam lapt"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([p1.id], [item["id"] for item in res.data["results"]])
+
+    def test_product_list_search_special_characters(self):
+        """Test search terms with tsquery operators don't cause errors."""
+        create_product(self.category1, self.user1, name="Sample")
+
+        res = self.client.get(PRODUCT_URL, {"search": "sample & | ! ( ) :*"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(1, len(res.data["results"]))
+
     def test_product_list_order_filtering(self):
         """Test product list order filtering"""
         p1 = create_product(self.category1, self.user1, price="1.25")
@@ -199,6 +230,68 @@ class PublicProductAPITests(TestCase):
         self.assertEqual(s2.data, res.data["results"][0])
 
 
+class AutocompleteAPITests(TestCase):
+    """Test the product name autocomplete API."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email="testUser1@example.com",
+            password="testPass123",
+            username="TestUser1",
+        )
+        self.category = create_category("electronics")
+        self.client = APIClient()
+
+    def test_autocomplete_returns_id_and_name(self):
+        """Test autocomplete returns only ids and names of matching products."""
+        product = create_product(self.category, self.user, name="Gaming laptop")
+        create_product(self.category, self.user, name="Office chair")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "gam"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([{"id": product.id, "name": product.name}], res.data)
+
+    def test_autocomplete_tolerates_typos(self):
+        """Test autocomplete matches misspelled names."""
+        product = create_product(self.category, self.user, name="Gaming laptop")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "laptp"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([product.id], [item["id"] for item in res.data])
+
+    def test_autocomplete_ranks_closest_match_first(self):
+        """Test results are ordered by similarity to the typed term."""
+        p1 = create_product(self.category, self.user, name="Desk lamp with laptop stand")
+        p2 = create_product(self.category, self.user, name="Laptop")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "laptop"})
+
+        self.assertEqual([p2.id, p1.id], [item["id"] for item in res.data])
+
+    def test_autocomplete_empty_term(self):
+        """Test an empty term returns no results without querying."""
+        create_product(self.category, self.user)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": "  "})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([], res.data)
+
+    def test_autocomplete_is_cached(self):
+        """Test repeated prefixes are served from the cache."""
+        create_product(self.category, self.user, name="Gaming laptop")
+        self.client.get(AUTOCOMPLETE_URL, {"q": "Gam"})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": " gam "})
+
+        self.assertEqual(1, len(res.data))
+
+
 class PrivateUserApiTests(TestCase):
     """Test API requests that require authentication."""
 
@@ -358,6 +451,46 @@ class ImageUploadTests(TestCase):
         self.assertIn("image", res.data)
         self.assertTrue(os.path.exists(self.product.image.path))
 
+    def test_upload_image_queues_processing(self):
+        """Test uploading an image queues generating its variants."""
+        url = image_upload_url(self.product.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (10, 10)).save(image_file, format="JPEG")
+            image_file.seek(0)
+            res = self.client.post(url, {"image": image_file}, format="multipart")
+
+        self.product.refresh_from_db()
+        self.assertEqual({}, res.data["image_variants"])
+        job = self.product.image_jobs.get()
+        self.assertEqual((ImageJob.PENDING, self.product.image.name), (job.status, job.source))
+
+    def test_update_ignores_image(self):
+        """Test images can't be set through product updates, which don't generate variants."""
+        self.product.image_variants = {"thumbnail": {"jpeg": "t.jpg", "webp": "t.webp"}}
+        self.product.save()
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (10, 10)).save(image_file, format="JPEG")
+            image_file.seek(0)
+            res = self.client.patch(detail_url(self.product.id), {"image": image_file}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.image)
+        self.assertEqual({"thumbnail": {"jpeg": "t.jpg", "webp": "t.webp"}}, self.product.image_variants)
+        self.assertFalse(self.product.image_jobs.exists())
+
+    def test_list_serves_thumbnail(self):
+        """Test product lists link the generated thumbnail."""
+        self.product.image_variants = {"thumbnail": {"jpeg": "t.jpg", "webp": "t.webp"}}
+        self.product.save()
+
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(
+            {"jpeg": "http://testserver/static/media/t.jpg", "webp": "http://testserver/static/media/t.webp"},
+            res.data["results"][0]["thumbnail"],
+        )
+
     def test_upload_image_bad_request(self):
         """Test uploading an invalid image."""
         url = image_upload_url(self.product.id)
@@ -0,0 +1,199 @@
+import threading
+import uuid
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from store.tests.test_async_views import ASYNC_CATEGORY_URL, ASYNC_PRODUCT_URL, async_detail_url
+from store.tests.test_image_uploads import upload_url
+from store.tests.test_store_api import (
+    AUTOCOMPLETE_URL,
+    CATEGORY_URL,
+    PRODUCT_URL,
+    create_category,
+    create_product,
+    create_user,
+    detail_url,
+    image_upload_url,
+)
+from store.throttling import SlidingWindowCounters, store_counters
+
+RATES = {
+    "store_list": "3/minute",
+    "store_search": "2/minute",
+    "store_write": "2/minute",
+    "store_upload_image": "1/minute",
+    "store_upload_chunk": "2/minute",
+}
+
+
+@override_settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": RATES, "PAGE_SIZE": 8})
+class StoreThrottleTests(TestCase):
+    """Test the budgets of the store endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        store_counters.reset()
+        self.user = create_user(email="testUser1@example.com", password="testPass123", username="TestUser1")
+        self.category = create_category("electronics")
+        self.product = create_product(self.category, self.user)
+        self.client = APIClient()
+
+    def get_statuses(self, method, url, count, data=None, **kwargs):
+        return [getattr(self.client, method)(url, data, **kwargs).status_code for _ in range(count)]
+
+    def test_list_budget(self):
+        """Test reads share the list budget, shared by the category list."""
+        statuses = [
+            self.client.get(PRODUCT_URL).status_code,
+            self.client.get(detail_url(self.product.id)).status_code,
+            self.client.get(CATEGORY_URL).status_code,
+            self.client.get(CATEGORY_URL).status_code,
+        ]
+
+        self.assertEqual([200, 200, 200, 429], statuses)
+
+    def test_search_budget(self):
+        """Test searches have their own budget apart from the other reads."""
+        statuses = [
+            self.client.get(PRODUCT_URL, {"search": "phone"}).status_code,
+            self.client.get(AUTOCOMPLETE_URL, {"q": "pho"}).status_code,
+            self.client.get(PRODUCT_URL, {"search": "lamp"}).status_code,
+        ]
+
+        self.assertEqual([200, 200, 429], statuses)
+        self.assertEqual(status.HTTP_200_OK, self.client.get(PRODUCT_URL).status_code)
+
+    def test_retry_after(self):
+        """Test throttled responses tell when to retry."""
+        with patch("store.throttling.time.time", return_value=6000 * 60 + 15):
+            self.get_statuses("get", PRODUCT_URL, 3)
+            res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual("45", res["Retry-After"])
+
+    def test_write_budget_by_user(self):
+        """Test writes are counted by user."""
+        other = create_user(email="testUser2@example.com", password="testPass123", username="TestUser2")
+        self.client.force_authenticate(self.user)
+        url = detail_url(self.product.id)
+
+        self.assertEqual([200, 200, 429], self.get_statuses("patch", url, 3, {"name": "Renamed"}))
+
+        self.client.force_authenticate(other)
+        self.assertEqual(status.HTTP_403_FORBIDDEN, self.client.patch(url, {"name": "Renamed"}).status_code)
+
+    def test_upload_image_budget(self):
+        """Test image uploads have their own budget."""
+        self.client.force_authenticate(self.user)
+
+        statuses = self.get_statuses("post", image_upload_url(self.product.id), 2, {"image": "notimage"})
+
+        self.assertEqual([400, 429], statuses)
+        self.assertEqual(status.HTTP_200_OK, self.client.patch(detail_url(self.product.id), {}).status_code)
+
+    def test_upload_chunk_budget(self):
+        """Test the chunks of image uploads have their own budget."""
+        self.client.force_authenticate(self.user)
+        url = upload_url(self.product.id, uuid.uuid4())
+
+        statuses = self.get_statuses("put", url, 3, b"chunk", content_type="application/octet-stream")
+
+        self.assertEqual([404, 404, 429], statuses)
+
+    async def test_async_views_share_budgets(self):
+        """Test the async views count against the budgets of the DRF views."""
+        client = AsyncClient()
+        statuses = [
+            (await client.get(ASYNC_PRODUCT_URL, {"search": "phone"})).status_code,
+            (await client.get(ASYNC_PRODUCT_URL, {"search": "lamp"})).status_code,
+            (await client.get(ASYNC_PRODUCT_URL)).status_code,
+            (await client.get(async_detail_url(self.product.id))).status_code,
+            (await client.get(ASYNC_CATEGORY_URL)).status_code,
+        ]
+        res = await client.get(ASYNC_PRODUCT_URL)
+
+        self.assertEqual([200, 200, 200, 200, 200], statuses)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+        self.assertEqual(
+            status.HTTP_429_TOO_MANY_REQUESTS, (await client.get(PRODUCT_URL, {"search": "x"})).status_code
+        )
+
+    async def test_async_views_count_off_event_loop(self):
+        """Test the async views don't count requests on the event loop thread, where cache syncs would block it."""
+        threads = []
+
+        def record(*args):
+            threads.append(threading.get_ident())
+            return True, None
+
+        with patch("store.async_views.throttle_request", record):
+            res = await AsyncClient().get(ASYNC_CATEGORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(1, len(threads))
+        self.assertNotEqual(threading.get_ident(), threads[0])
+
+    def test_without_rate(self):
+        """Test scopes without a rate aren't throttled."""
+        with self.settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": {}, "PAGE_SIZE": 8}):
+            statuses = self.get_statuses("get", CATEGORY_URL, 5)
+
+        self.assertEqual([200] * 5, statuses)
+
+
+class SlidingWindowCountersTests(SimpleTestCase):
+    """Test the sliding window counters."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_previous_window_weight(self):
+        """Test requests of the previous window count by how much it overlaps the sliding window."""
+        counters = SlidingWindowCounters(sync_interval=1000, max_keys=10)
+        for _ in range(4):
+            self.assertTrue(counters.hit("key", 4, 60, now=50)[0])
+        self.assertEqual((False, 10), counters.hit("key", 4, 60, now=50))
+
+        # Five sixths of the previous window still overlap: 4 * 5 / 6 + 0 < 4 requests.
+        self.assertEqual((True, None), counters.hit("key", 4, 60, now=70))
+        allowed, wait = counters.hit("key", 4, 60, now=70)
+        self.assertFalse(allowed)
+        # 4 * 3 / 4 + 1 requests is the limit, so the previous window has to drop to three quarters.
+        self.assertAlmostEqual(5, wait)
+
+        self.assertTrue(counters.hit("key", 4, 60, now=75.5)[0])
+
+    def test_counts_shared_through_cache(self):
+        """Test a process sees the requests of other processes once it syncs."""
+        first = SlidingWindowCounters(sync_interval=1, max_keys=10)
+        second = SlidingWindowCounters(sync_interval=1, max_keys=10)
+        first.hit("key", 3, 60, now=0)
+        first.hit("key", 3, 60, now=0.5)
+        first.hit("key", 3, 60, now=1)
+
+        self.assertTrue(second.hit("key", 3, 60, now=1)[0])
+        self.assertFalse(second.hit("key", 3, 60, now=1.5)[0])
+
+    def test_syncs_once_per_interval(self):
+        """Test a key is only synced with the cache once per interval."""
+        counters = SlidingWindowCounters(sync_interval=1, max_keys=10)
+        with patch("store.throttling.cache", wraps=cache) as patched:
+            for i in range(10):
+                counters.hit("key", 100, 60, now=i / 10)
+
+        self.assertEqual(1, counters.syncs)
+        self.assertEqual(1, patched.get_many.call_count)
+        self.assertEqual({"allowed": 10, "throttled": 0, "syncs": 1, "keys": 1}, counters.as_dict())
+
+    def test_least_recent_key_evicted(self):
+        """Test the least recently used key is dropped once there are too many."""
+        counters = SlidingWindowCounters(sync_interval=1000, max_keys=2)
+        for key in ("a", "b", "a", "c"):
+            counters.hit(key, 10, 60, now=0)
+
+        self.assertEqual(["a", "c"], list(counters.entries))
@@ -0,0 +1,197 @@
+"""
+Sliding window throttling of the store endpoints.
+
+Requests are counted in process, and every `sync_interval` seconds a key adds its new requests to the
+shared cache and reads back the counts of all processes, so most requests cost no cache round trip.
+Between syncs a process only sees the requests of other processes up to the last sync.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from core.metrics import registry
+from core.throttling import ClientAddressMixin, parse_rate
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class WindowCount:
+    """Counts of a key in its current and previous fixed window."""
+
+    __slots__ = ("window", "synced", "pending", "previous", "previous_pending", "synced_at", "syncing")
+
+    def __init__(self, window):
+        self.window = window
+        # Requests of all processes as of the last sync, and the local ones since.
+        self.synced = 0
+        self.pending = 0
+        self.previous = 0
+        # Local requests of the previous window not added to the shared cache yet.
+        self.previous_pending = 0
+        self.synced_at = -math.inf
+        self.syncing = False
+
+    def roll(self, window):
+        if window == self.window + 1:
+            self.previous = self.synced + self.pending
+            self.previous_pending = self.pending
+        else:
+            self.previous = self.previous_pending = 0
+        self.window = window
+        self.synced = self.pending = 0
+        self.synced_at = -math.inf
+
+
+class SlidingWindowCounters:
+    """Process-local sliding window counts by key, synced with the shared cache.
+
+    The count of a window is estimated as the count of the current fixed window plus the count of
+    the previous one weighted by how much of it still overlaps the sliding window.
+    """
+
+    key_prefix = "throttle"
+
+    def __init__(self, sync_interval, max_keys):
+        self.sync_interval = sync_interval
+        self.max_keys = max_keys
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.allowed = 0
+        self.throttled = 0
+        self.syncs = 0
+
+    def hit(self, key, limit, duration, now):
+        """Count a request of `key` if it is within `limit` requests per `duration` seconds.
+
+        Return whether the request is allowed, and if not the seconds until it would be.
+        """
+        window, offset = divmod(now, duration)
+        window = int(window)
+        with self.lock:
+            entry = self.entries.pop(key, None) or WindowCount(window)
+            self.entries[key] = entry
+            while len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+            if entry.window != window:
+                entry.roll(window)
+
+            current = entry.synced + entry.pending
+            overlap = 1 - offset / duration
+            allowed = current + entry.previous * overlap < limit
+            if allowed:
+                entry.pending += 1
+                self.allowed += 1
+                wait = None
+            elif current >= limit or not entry.previous:
+                self.throttled += 1
+                wait = duration - offset
+            else:
+                self.throttled += 1
+                # The previous window's weight has to drop until the current count fits.
+                wait = duration * (1 - (limit - current) / entry.previous) - offset
+
+            sync = not entry.syncing and now - entry.synced_at >= self.sync_interval
+            if sync:
+                entry.syncing = True
+                pending, previous_pending = entry.pending, entry.previous_pending
+                entry.pending = entry.previous_pending = 0
+
+        if sync:
+            self.sync(key, entry, window, duration, now, pending, previous_pending)
+        return allowed, wait
+
+    def sync(self, key, entry, window, duration, now, pending, previous_pending):
+        """Add the local requests of `key` to the shared counts and read back the counts of all processes."""
+        current_key = f"{self.key_prefix}:{key}:{duration}:{window}"
+        previous_key = f"{self.key_prefix}:{key}:{duration}:{window - 1}"
+        try:
+            if previous_pending:
+                self.add(previous_key, previous_pending, duration)
+            if pending:
+                self.add(current_key, pending, duration)
+            counts = cache.get_many([current_key, previous_key])
+        finally:
+            with self.lock:
+                entry.syncing = False
+                self.syncs += 1
+        with self.lock:
+            if entry.window == window:
+                entry.synced = counts.get(current_key, 0)
+                entry.previous = max(entry.previous, counts.get(previous_key, 0))
+                entry.synced_at = now
+
+    def add(self, cache_key, count, duration):
+        # Counts are read for the window they belong to and the next one.
+        if not cache.add(cache_key, count, timeout=2 * duration):
+            try:
+                cache.incr(cache_key, count)
+            except ValueError:
+                # Expired between the add and the increment.
+                cache.add(cache_key, count, timeout=2 * duration)
+
+    def reset(self):
+        with self.lock:
+            self.entries.clear()
+            self.allowed = self.throttled = self.syncs = 0
+
+    def as_dict(self):
+        return {"allowed": self.allowed, "throttled": self.throttled, "syncs": self.syncs, "keys": len(self.entries)}
+
+
+store_counters = SlidingWindowCounters(sync_interval=1.0, max_keys=100000)
+registry.add_value(
+    "store_throttle_allowed_total", "Store requests let through.", "counter", lambda: store_counters.allowed
+)
+registry.add_value(
+    "store_throttle_throttled_total",
+    "Store requests refused by the throttle.",
+    "counter",
+    lambda: store_counters.throttled,
+)
+registry.add_value(
+    "store_throttle_syncs_total", "Syncs of throttle counts with the cache.", "counter", lambda: store_counters.syncs
+)
+
+
+def throttle_request(key, scope, counters=store_counters):
+    """Count a request of `key` against the rate of `scope` in `DEFAULT_THROTTLE_RATES`.
+
+    Return whether the request is allowed, and if not the seconds until it would be. Scopes without
+    a rate aren't throttled.
+    """
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+    if rate is None:
+        return True, None
+    limit, duration = parse_rate(rate)
+    return counters.hit(f"{scope}:{key}", limit, duration, time.time())
+
+
+class SlidingWindowThrottle(ClientAddressMixin, BaseThrottle):
+    """Sliding window throttle by user, or by client IP for anonymous requests, see `ClientAddressMixin`.
+
+    The budget is the rate in `DEFAULT_THROTTLE_RATES` of the scope returned by the view's
+    `get_throttle_scope(request)`, or else its `throttle_scope`. Scopes without a rate aren't throttled.
+    """
+
+    counters = store_counters
+
+    def get_scope(self, request, view):
+        if hasattr(view, "get_throttle_scope"):
+            return view.get_throttle_scope(request)
+        return getattr(view, "throttle_scope", None)
+
+    def get_cache_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        allowed, self.wait_time = throttle_request(
+            self.get_cache_key(request), self.get_scope(request, view), self.counters
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_time
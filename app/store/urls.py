@@ -1,5 +1,6 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
+from store import async_views
 from store.views import CategoryListAPI, ProductViewSet
 
 app_name = "store"
@@ -10,4 +11,7 @@ router.register("products", ProductViewSet, basename="products")
 urlpatterns = [
     path("", include(router.urls)),
     path("categories/", CategoryListAPI.as_view(), name="category-list"),
+    path("async/products/", async_views.product_list, name="async-product-list"),
+    path("async/products/<int:pk>/", async_views.product_detail, name="async-product-detail"),
+    path("async/categories/", async_views.category_list, name="async-category-list"),
 ]
@@ -1,42 +1,136 @@
-from core.models import Category, Product
+import hashlib
+import re
+
+from core.images import enqueue_image_processing
+from core.models import Category, ImageUpload, Product
 from core.permissions import IsAuthor
+from core.uploads import IncompleteChunk, InvalidImage, create_part, delete_upload, finalize_upload, write_chunk
+from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import filters, generics, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from store.filters import ProductFilter
-from store.serializers import CategorySerializer, ProductImageSerializer, ProductListSerializer, ProductSerializer
+from store.cache import (
+    CATEGORIES_VERSION_KEY,
+    GENERATION_KEY,
+    ConditionalGetMixin,
+    PreRenderedResponse,
+    PreSerializedCache,
+    ResponseCacheMixin,
+    bump_version_on_commit,
+)
+from store.filters import ProductFilter, ProductSearchFilter
+from store.pagination import EstimatedCountPagination, KeysetPagination
+from store.parsers import NDJSONParser
+from store.renderers import CSVRenderer, NDJSONRenderer
+from store.serializers import (
+    CategorySerializer,
+    ImageUploadSerializer,
+    ProductAutocompleteSerializer,
+    ProductBulkSerializer,
+    ProductExportSerializer,
+    ProductImageSerializer,
+    ProductListSerializer,
+    ProductSerializer,
+)
+from store.throttling import SlidingWindowThrottle
+
+CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """View for manage product object."""
 
     permission_classes = [
         IsAuthenticatedOrReadOnly,
         IsAuthor,
     ]
-    filter_backends = [filters.SearchFilter, DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [ProductSearchFilter, DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = ProductFilter
-    search_fields = ["name", "description"]
     ordering_fields = ["name", "price", "created", "province"]
+    pagination_class = EstimatedCountPagination
+    throttle_classes = [SlidingWindowThrottle]
+    autocomplete_limit = 10
+    autocomplete_max_length = 50
+    autocomplete_cache_timeout = 30
+    image_upload_max_size = 50 * 1024 * 1024
+    image_upload_max_chunk_size = 8 * 1024 * 1024
+    bulk_batch_size = 500
+    bulk_max_items = 10000
+    bulk_max_body_size = 16 * 1024 * 1024
+    export_chunk_size = 2000
+
+    @property
+    def paginator(self):
+        """The paginator instance selected for the current request."""
+        if not hasattr(self, "_paginator"):
+            pagination_class = self.get_pagination_class()
+            self._paginator = None if pagination_class is None else pagination_class()
+        return self._paginator
+
+    def get_pagination_class(self):
+        """Use keyset pagination when requested with `?pagination=cursor`."""
+        request = getattr(self, "request", None)
+        if request is not None and request.query_params.get("pagination") == "cursor":
+            return KeysetPagination
+        return self.pagination_class
+
+    def get_throttle_scope(self, request):
+        """Give searches, writes and image uploads their own budgets apart from the other reads."""
+        if self.action == "image_upload":
+            # Chunks are small and many per upload, so they get a budget apart from the uploads.
+            return "store_upload_chunk"
+        if self.action in ("upload_image", "start_image_upload", "finalize_image_upload"):
+            return "store_upload_image"
+        if request.method not in SAFE_METHODS:
+            return "store_write"
+        if self.action == "autocomplete" or request.query_params.get(ProductSearchFilter.search_param):
+            return "store_search"
+        return "store_list"
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
     def get_queryset(self):
-        if self.action == "list_my_products" and not self.request.user.is_anonymous:
+        if self.action in ("list_my_products", "bulk") and not self.request.user.is_anonymous:
             queryset = Product.objects.filter(author=self.request.user)
         else:
             queryset = Product.objects.all()
+
+        # Load only the columns and relations the serializer of the action reads.
+        if self.action in ("list", "list_my_products"):
+            queryset = queryset.only(*ProductListSerializer.get_representation_plan().values_fields)
+        elif self.action == "retrieve":
+            queryset = queryset.select_related("author").only(
+                *ProductSerializer.get_representation_plan().values_fields
+            )
+        elif self.action in ("update", "partial_update"):
+            queryset = queryset.select_related("author")
         return queryset
 
     def get_serializer_class(self):
         if self.action == "list" or self.action == "list_my_products":
             return ProductListSerializer
-        elif self.action == "upload_image":
+        elif self.action in ("upload_image", "finalize_image_upload"):
             return ProductImageSerializer
+        elif self.action in ("start_image_upload", "image_upload"):
+            return ImageUploadSerializer
+        elif self.action == "autocomplete":
+            return ProductAutocompleteSerializer
+        elif self.action == "bulk":
+            return ProductBulkSerializer
         else:
             return ProductSerializer
 
@@ -47,11 +141,155 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(product, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                # Variants of the previous image stay on disk until the worker replaces them.
+                serializer.save(image_variants={})
+                enqueue_image_processing(product)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(request=ImageUploadSerializer, responses=ImageUploadSerializer)
+    @action(methods=["POST"], detail=True, url_path="image-uploads", url_name="image-uploads")
+    def start_image_upload(self, request, pk=None):
+        """Start a chunked image upload of the given size in bytes."""
+        product = self.get_object()
+        context = {**self.get_serializer_context(), "max_size": self.image_upload_max_size}
+        serializer = self.get_serializer(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+        create_part(serializer.save(product=product))
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        request={"application/octet-stream": OpenApiTypes.BINARY},
+        parameters=[
+            OpenApiParameter(
+                "Content-Range",
+                str,
+                OpenApiParameter.HEADER,
+                description="Position of the chunk as `bytes <first>-<last>/<size>`, required to append a chunk.",
+            )
+        ],
+        responses=ImageUploadSerializer,
+    )
+    @action(
+        methods=["GET", "PUT"],
+        detail=True,
+        url_path=r"image-uploads/(?P<upload_id>[0-9a-f-]{36})",
+        url_name="image-upload",
+        permission_classes=[IsAuthenticated, IsAuthor],
+    )
+    def image_upload(self, request, pk=None, upload_id=None):
+        """Get the offset to continue a chunked image upload from, or append the chunk sent at that offset."""
+        product = self.get_object()
+        chunk = None
+        with transaction.atomic():
+            upload = self.get_image_upload(product, upload_id)
+            if request.method == "PUT":
+                error, chunk = self.check_image_chunk(request, upload)
+                if error is not None:
+                    return error
+        if chunk is not None:
+            # The body is read without a transaction or the upload lock, however slowly the client sends it.
+            upload = self.append_image_chunk(request, product, upload_id, *chunk)
+            if isinstance(upload, Response):
+                return upload
+        return Response(self.get_serializer(upload).data)
+
+    def check_image_chunk(self, request, upload):
+        """Return an error response for a chunk that can't be appended, and the range of the chunk to write if any."""
+        match = CONTENT_RANGE_RE.fullmatch(request.headers.get("Content-Range", ""))
+        if match is None:
+            raise ValidationError("A `Content-Range: bytes <first>-<last>/<size>` header is required.")
+        content_length = request.headers.get("Content-Length")
+        if not content_length:
+            # Chunked transfer encoding doesn't announce the length.
+            error = Response(
+                {"detail": "A Content-Length header is required."}, status=status.HTTP_411_LENGTH_REQUIRED
+            )
+            return error, None
+        if not content_length.isdigit():
+            raise ValidationError("The Content-Length header must be a number of bytes.")
+        first, last, size = map(int, match.groups())
+        length = last - first + 1
+        if size != upload.size or not 0 < length <= size - first or length != int(content_length):
+            error = Response(
+                {"detail": "Content-Range doesn't match the upload."},
+                status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            )
+            return error, None
+        if length > self.image_upload_max_chunk_size:
+            error = Response(
+                {"detail": f"Chunks can't be larger than {self.image_upload_max_chunk_size} bytes."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            return error, None
+        if last < upload.received:
+            # A retry of a chunk whose response got lost.
+            return None, None
+        if first != upload.received:
+            return self.get_offset_conflict(upload), None
+        return None, (first, last)
+
+    def append_image_chunk(self, request, product, upload_id, first, last):
+        """Write the chunk to the part file, then advance the upload offset if no other chunk did meanwhile."""
+        upload = get_object_or_404(ImageUpload, pk=upload_id, product=product)
+        try:
+            write_chunk(upload, first, last - first + 1, request.stream)
+        except IncompleteChunk:
+            raise ValidationError("The request body is shorter than the Content-Range.")
+
+        with transaction.atomic():
+            upload = self.get_image_upload(product, upload_id)
+            if upload.received > last:
+                # A concurrent retry of the same chunk got there first.
+                return upload
+            if upload.received != first:
+                return self.get_offset_conflict(upload)
+            upload.received = last + 1
+            upload.save(update_fields=["received", "updated"])
+        return upload
+
+    def get_offset_conflict(self, upload):
+        return Response(
+            {"detail": "The chunk doesn't start at the upload offset.", "offset": upload.received},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    @extend_schema(request=None, responses=ProductImageSerializer)
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path=r"image-uploads/(?P<upload_id>[0-9a-f-]{36})/finalize",
+        url_name="image-upload-finalize",
+        permission_classes=[IsAuthenticated, IsAuthor],
+    )
+    def finalize_image_upload(self, request, pk=None, upload_id=None):
+        """Set a completely received chunked upload as the product image."""
+        product = self.get_object()
+        with transaction.atomic():
+            upload = self.get_image_upload(product, upload_id)
+            if upload.received != upload.size:
+                raise ValidationError({"offset": [f"The upload is incomplete, {upload.received} bytes received."]})
+            try:
+                finalize_upload(upload)
+            except InvalidImage as exc:
+                # The upload can't become valid, so it is discarded.
+                delete_upload(upload)
+                return Response({"image": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+            enqueue_image_processing(product)
+        return Response(self.get_serializer(product).data)
+
+    def get_image_upload(self, product, upload_id):
+        upload = get_object_or_404(
+            ImageUpload.objects.select_for_update(),
+            pk=upload_id,
+            product=product,
+            product__author=self.request.user,
+        )
+        upload.product = product
+        return upload
+
     @extend_schema(responses=ProductListSerializer(many=True))
     @action(
         methods=["GET"],
@@ -64,6 +302,156 @@ class ProductViewSet(viewsets.ModelViewSet):
         """Get list of owned products."""
         return self.list(request)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", str, description="Beginning of a word in the product name, typos are tolerated.")
+        ],
+        responses=ProductAutocompleteSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="autocomplete",
+        url_name="autocomplete",
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def autocomplete(self, request):
+        """Get ids and names of products matching the typed name."""
+        term = " ".join(request.query_params.get("q", "").lower().split())[: self.autocomplete_max_length]
+        if not term:
+            return Response([])
+
+        cache_key = f"store:autocomplete:{hashlib.md5(term.encode()).hexdigest()}"
+        data = cache.get(cache_key)
+        if data is None:
+            # `\m` anchors the term at a word start; both conditions are served by the trigram index.
+            queryset = (
+                Product.objects.filter(Q(name__iregex=rf"\m{re.escape(term)}") | Q(name__trigram_word_similar=term))
+                .annotate(
+                    word_similarity=TrigramWordSimilarity(term, "name"),
+                    similarity=TrigramSimilarity("name", term),
+                )
+                .order_by("-word_similarity", "-similarity", "name")
+                .values("id", "name")[: self.autocomplete_limit]
+            )
+            data = self.get_serializer(queryset, many=True).data
+            cache.set(cache_key, data, self.autocomplete_cache_timeout)
+
+        return Response(data)
+
+    @extend_schema(
+        parameters=[OpenApiParameter("format", str, enum=["ndjson", "csv"], description="Export format.")],
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR, (200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        url_name="export",
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+        pagination_class=None,
+    )
+    def export(self, request):
+        """Stream all products matching the list filters, search and ordering as NDJSON or CSV."""
+        renderer = request.accepted_renderer
+        # Formats values with the converters of the API responses, so both formats match them.
+        serializer = ProductExportSerializer(context=self.get_serializer_context())
+        plan = serializer.get_representation_plan()
+        queryset = self.filter_queryset(self.get_queryset()).values(*plan.values_fields)
+        rows = map(serializer.to_representation, queryset.iterator(chunk_size=self.export_chunk_size))
+        response = StreamingHttpResponse(
+            renderer.stream(rows, ProductExportSerializer.Meta.fields),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = f'attachment; filename="products.{renderer.format}"'
+        return response
+
+    @extend_schema(
+        request=ProductBulkSerializer(many=True),
+        responses=OpenApiTypes.OBJECT,
+        description="Accepts a JSON array or NDJSON. Deleting takes a list of product ids.",
+    )
+    @action(
+        methods=["POST", "PATCH", "DELETE"],
+        detail=False,
+        url_path="bulk",
+        url_name="bulk",
+        permission_classes=[IsAuthenticated],
+        parser_classes=[JSONParser, NDJSONParser],
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def bulk(self, request):
+        """Create, update or delete many owned products at once, reporting errors per item."""
+        if not isinstance(request.data, list):
+            raise ValidationError("Expected a list of items.")
+        if len(request.data) > self.bulk_max_items:
+            raise ValidationError(f"Ensure there are no more than {self.bulk_max_items} items.")
+
+        if request.method == "DELETE":
+            return self.bulk_destroy(request)
+
+        context = {**self.get_serializer_context(), "batch_size": self.bulk_batch_size}
+        if request.method == "POST":
+            serializer = self.get_serializer(data=request.data, many=True, context=context)
+        else:
+            ids = self.get_bulk_ids(item.get("id") if isinstance(item, dict) else None for item in request.data)
+            instances = self.get_queryset().in_bulk(ids)
+            serializer = self.get_serializer(instances, data=request.data, many=True, partial=True, context=context)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            products = serializer.save(author=request.user) if request.method == "POST" else serializer.save()
+            self.invalidate_bulk_caches()
+
+        saved = iter(products)
+        results = [{"errors": errors} if errors else {"id": next(saved).id} for errors in serializer.item_errors]
+        if not products:
+            return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED if request.method == "POST" else status.HTTP_200_OK,
+        )
+
+    def bulk_destroy(self, request):
+        ids = self.get_bulk_ids(request.data)
+        existing = set(self.get_queryset().filter(id__in=ids).values_list("id", flat=True))
+        with transaction.atomic():
+            self.get_queryset().filter(id__in=existing).delete()
+            self.invalidate_bulk_caches()
+
+        results = []
+        for item in request.data:
+            try:
+                results.append({"id": item} if int(item) in existing else {"errors": {"id": ["Not found."]}})
+            except (TypeError, ValueError):
+                results.append({"errors": {"id": ["A valid integer is required."]}})
+        return Response({"results": results}, status=status.HTTP_200_OK if existing else status.HTTP_400_BAD_REQUEST)
+
+    def get_bulk_ids(self, values):
+        ids = set()
+        for value in values:
+            try:
+                ids.add(int(value))
+            except (TypeError, ValueError):
+                continue
+        return ids
+
+    def invalidate_bulk_caches(self):
+        # Bulk writes don't send model signals.
+        bump_version_on_commit(GENERATION_KEY)
+        bump_version_on_commit(CATEGORIES_VERSION_KEY)
+
+
+def render_categories():
+    """Return the category list data and its JSON encoding."""
+    data = CategorySerializer(Category.objects.all(), many=True).data
+    return data, JSONRenderer().render(data)
+
+
+category_cache = PreSerializedCache(CATEGORIES_VERSION_KEY, render_categories)
+
 
 class CategoryListAPI(generics.ListAPIView):
     """View for listing all categories."""
@@ -72,3 +460,15 @@ class CategoryListAPI(generics.ListAPIView):
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
     pagination_class = None
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "store_list"
+
+    def list(self, request, *args, **kwargs):
+        """Serve the pre-serialized category list held in process memory."""
+        version, (data, content) = category_cache.get()
+        etag = quote_etag(f"categories-{version}")
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = PreRenderedResponse(data, content)
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,91 @@
+"""
+JWT cookie authentication that remembers verified tokens and the user they belong to.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from drf_spectacular.contrib.rest_auth import SimpleJWTCookieScheme
+
+TokenEntry = namedtuple("TokenEntry", ("expires", "user_id", "validated_token", "db", "field_names", "values"))
+
+
+class UserSnapshotCache:
+    """Process-local LRU of verified raw tokens and a snapshot of their user's fields.
+
+    Entries expire with their token, or after `timeout` seconds, whichever comes first.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, raw_token):
+        with self.lock:
+            entry = self.entries.get(raw_token)
+            if entry is None:
+                return None
+            if entry.expires <= time.time():
+                del self.entries[raw_token]
+                return None
+            self.entries.move_to_end(raw_token)
+            return entry
+
+    def set(self, raw_token, validated_token, user):
+        expires = min(validated_token.get("exp", 0), time.time() + self.timeout)
+        field_names = [field.attname for field in user._meta.concrete_fields]
+        values = [getattr(user, field_name) for field_name in field_names]
+        entry = TokenEntry(expires, user.pk, validated_token, user._state.db, field_names, values)
+        with self.lock:
+            self.entries[raw_token] = entry
+            self.entries.move_to_end(raw_token)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        """Drop every token of a user, so their next request loads the user again."""
+        with self.lock:
+            for raw_token in [raw_token for raw_token, entry in self.entries.items() if entry.user_id == user_id]:
+                del self.entries[raw_token]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_snapshots = UserSnapshotCache(max_size=10000, timeout=300)
+
+
+class CachedJWTCookieAuthentication(JWTCookieAuthentication):
+    """`JWTCookieAuthentication` that skips token verification and the user query for known tokens.
+
+    Every request gets its own user instance built from the snapshot, so changes made by a view
+    never leak into other requests. Other processes see a changed user once their entry expires.
+    """
+
+    snapshots = user_snapshots
+
+    def get_validated_token(self, raw_token):
+        entry = self.snapshots.get(raw_token)
+        if entry is not None:
+            return entry.validated_token
+        return super().get_validated_token(raw_token)
+
+    def get_user(self, validated_token):
+        # Tokens keep the raw value they were created from.
+        entry = self.snapshots.get(validated_token.token)
+        if entry is not None:
+            return self.user_model.from_db(entry.db, entry.field_names, entry.values)
+
+        user = super().get_user(validated_token)
+        self.snapshots.set(validated_token.token, validated_token, user)
+        return user
+
+
+class CachedJWTCookieScheme(SimpleJWTCookieScheme):
+    """Document `CachedJWTCookieAuthentication` like the JWT cookie authentication it extends."""
+
+    target_class = CachedJWTCookieAuthentication
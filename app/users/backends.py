@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db import transaction
+from users.hashers import hash_password, hashing_pool, rehash_password, verify_password
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """`ModelBackend` verifying passwords in the hashing pool.
+
+    Hashes from outdated hashers or costs are replaced in the background after a successful login,
+    instead of on the request thread.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash once to reduce the timing difference between an existing and a nonexistent user.
+            hash_password(password)
+            return None
+
+        is_correct, must_update = hashing_pool.run(verify_password, password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        if must_update:
+            encoded = user.password
+            transaction.on_commit(lambda: hashing_pool.submit(rehash_password, UserModel, user.pk, password, encoded))
+        return user
@@ -0,0 +1,79 @@
+"""
+Password hashers with a configurable cost, and a bounded pool that hashing and verification run in.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import connections
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """Scrypt with the work factor of the `PASSWORD_SCRYPT_WORK_FACTOR` setting."""
+
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 with the costs of the `PASSWORD_ARGON2_*` settings, needs the `argon2-cffi` package."""
+
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class PasswordHashingPool:
+    """Bounded pool of threads hashing and verifying passwords.
+
+    `hashlib.scrypt`, `hashlib.pbkdf2_hmac` and argon2 release the GIL, so the threads run on every core,
+    while the number of hashes computed at once never exceeds `max_workers` however many requests wait.
+    The pool only bounds that concurrency: a request thread running a hash still waits for its result.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        # Threads are only started once work is submitted.
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hashing")
+
+    def submit(self, func, *args):
+        return self.executor.submit(func, *args)
+
+    def run(self, func, *args):
+        """Run `func(*args)` in the pool and wait for its result."""
+        return self.submit(func, *args).result()
+
+
+hashing_pool = PasswordHashingPool(max_workers=settings.PASSWORD_HASHING_WORKERS)
+
+
+def verify_password(password, encoded):
+    """Return whether `password` matches `encoded` and whether `encoded` should be rehashed."""
+    must_update = []
+    is_correct = check_password(password, encoded, setter=lambda raw_password: must_update.append(True))
+    return is_correct, bool(must_update)
+
+
+def hash_password(password):
+    """Return the hash of `password` with the preferred hasher, computed in the hashing pool."""
+    return hashing_pool.run(make_password, password)
+
+
+def set_password(user, password):
+    """Set the password of `user` like `user.set_password()`, hashed in the hashing pool."""
+    user.password = hash_password(password)
+    # Lets `save()` notify the password validators of the change, like `set_password()` does.
+    user._password = password
+
+
+def rehash_password(user_model, user_id, password, encoded):
+    """Replace a user's `encoded` password hash with one from the preferred hasher.
+
+    The update only applies while the stored hash is still `encoded`, so a password changed
+    in the meantime is kept.
+    """
+    try:
+        user_model._default_manager.filter(pk=user_id, password=encoded).update(password=make_password(password))
+    finally:
+        # Pool threads outlive requests, so nothing else closes their connections.
+        connections.close_all()
@@ -1,8 +1,13 @@
+from core.metrics import MeasuredSerializerMixin
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+from users.hashers import hash_password, set_password
 
 
-class BaseUserSerializer(serializers.ModelSerializer):
+class BaseUserSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """Base serializer for user object."""
 
     class Meta:
@@ -18,24 +23,75 @@ class UserSerializer(BaseUserSerializer):
         extra_kwargs = {"password": {"write_only": True, "min_length": 5}}
 
     def update(self, instance, validated_data):
-        """Update and return user."""
+        """Update and return user, saving only the changed fields.
+
+        The instance can be a cached snapshot of the user, so its other fields aren't written back.
+        """
         password = validated_data.pop("password", None)
-        user = super().update(instance, validated_data)
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        update_fields = list(validated_data)
 
         if password:
-            user.set_password(password)
-            user.save()
+            set_password(instance, password)
+            update_fields.append("password")
 
-        return user
+        if update_fields:
+            instance.save(update_fields=update_fields)
+        return instance
 
 
 class RegisterUserSerializer(BaseUserSerializer):
-    """Serializer for registering user."""
+    """Serializer for registering user.
+
+    Unique email and username are enforced by the database constraints when the user is inserted,
+    instead of a lookup per field before it.
+    """
+
+    unique_fields = ("email", "username")
 
     class Meta(BaseUserSerializer.Meta):
         fields = ("email", "username", "password")
         extra_kwargs = {"password": {"write_only": True, "min_length": 5}}
 
+    def get_fields(self):
+        fields = super().get_fields()
+        # The messages of the removed validators are kept for `get_unique_errors`.
+        self.unique_messages = {}
+        for name in self.unique_fields:
+            field = fields[name]
+            unique_validators = [validator for validator in field.validators if isinstance(validator, UniqueValidator)]
+            self.unique_messages[name] = unique_validators[0].message
+            field.validators = [validator for validator in field.validators if validator not in unique_validators]
+        return fields
+
     def create(self, validated_data):
         """Create and return a user with encrypted password."""
-        return get_user_model().objects.create_user(**validated_data)
+        UserModel = get_user_model()
+        # Same as `create_user`, with the password hashed in the hashing pool.
+        user = UserModel(
+            username=UserModel.normalize_username(validated_data["username"]),
+            email=UserModel.objects.normalize_email(validated_data["email"]),
+            password=hash_password(validated_data["password"]),
+        )
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            errors = self.get_unique_errors(user)
+            if not errors:
+                raise
+            raise serializers.ValidationError(errors)
+        return user
+
+    def get_unique_errors(self, user):
+        """Return the errors of the unique fields `user` shares with an existing user, looked up in one query."""
+        lookup = Q()
+        for name in self.unique_fields:
+            lookup |= Q(**{name: getattr(user, name)})
+        errors = {}
+        for values in type(user)._default_manager.filter(lookup).values(*self.unique_fields):
+            for name, value in values.items():
+                if value == getattr(user, name):
+                    errors[name] = [self.unique_messages[name]]
+        return errors
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.authentication import user_snapshots
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_user_snapshots(sender, instance, **kwargs):
+    """Drop the cached snapshots of a saved or deleted user, whatever changed it."""
+    user_snapshots.invalidate_user(instance.pk)
+    # A request could cache the old row again until the write commits.
+    transaction.on_commit(lambda: user_snapshots.invalidate_user(instance.pk))
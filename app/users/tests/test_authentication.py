@@ -0,0 +1,181 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from core.permissions import IsAuthor
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from store.tests.test_store_api import create_category, create_product
+from users.authentication import CachedJWTCookieAuthentication, UserSnapshotCache, user_snapshots
+from users.tests.test_users_api import USER_MODEL, create_user
+
+USER_URL_ME = reverse("users:rest_user_details")
+
+
+class CachedJWTCookieAuthenticationTests(TestCase):
+    """Test authenticating with cached token user snapshots."""
+
+    def setUp(self):
+        user_snapshots.clear()
+        self.user = create_user(email="user123@example.com", username="user123", password="StrongPassword123")
+        self.client = APIClient()
+        self.client.cookies[settings.REST_AUTH["JWT_AUTH_COOKIE"]] = str(AccessToken.for_user(self.user))
+
+    def test_known_token_skips_user_query(self):
+        """Test a second request with the same token doesn't query the user."""
+        with self.assertNumQueries(1):
+            res = self.client.get(USER_URL_ME)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(USER_URL_ME)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user.email, res.data["email"])
+
+    def test_update_invalidates_snapshot(self):
+        """Test updating the user through the user API drops the cached snapshot."""
+        self.client.get(USER_URL_ME)
+
+        res = self.client.patch(USER_URL_ME, {"email": "changed@example.com", "password": "NewPassword123"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(USER_URL_ME)
+        self.assertEqual("changed@example.com", res.data["email"])
+        self.assertTrue(USER_MODEL.objects.get(pk=self.user.pk).check_password("NewPassword123"))
+
+    def test_user_save_invalidates_snapshot(self):
+        """Test a user saved outside of the user API, like a deactivation in the admin, drops the snapshot."""
+        self.client.get(USER_URL_ME)
+
+        user = USER_MODEL.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.client.get(USER_URL_ME).status_code)
+        self.assertFalse(USER_MODEL.objects.get(pk=self.user.pk).is_active)
+
+    def test_update_saves_changed_fields(self):
+        """Test updating from a snapshot doesn't write back the fields the request didn't change."""
+        self.client.get(USER_URL_ME)
+        # Set-based updates don't send signals, so the snapshot is stale.
+        USER_MODEL.objects.filter(pk=self.user.pk).update(first_name="Changed")
+
+        res = self.client.patch(USER_URL_ME, {"email": "changed@example.com"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user = USER_MODEL.objects.get(pk=self.user.pk)
+        self.assertEqual(("changed@example.com", "Changed"), (user.email, user.first_name))
+
+    def test_snapshot_not_shared_between_requests(self):
+        """Test every request gets its own user instance, unaffected by changes made in other requests."""
+        request = APIRequestFactory().get(USER_URL_ME)
+        request.COOKIES = {name: morsel.value for name, morsel in self.client.cookies.items()}
+        first, _ = CachedJWTCookieAuthentication().authenticate(request)
+        first.email = "changed@example.com"
+
+        with self.assertNumQueries(0):
+            second, _ = CachedJWTCookieAuthentication().authenticate(request)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(self.user.email, second.email)
+
+    def test_inactive_user_rejected(self):
+        """Test tokens of inactive users aren't cached or accepted."""
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(USER_URL_ME)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(0, len(user_snapshots.entries))
+
+    def test_invalid_token_rejected(self):
+        """Test an invalid token is rejected."""
+        self.client.cookies[settings.REST_AUTH["JWT_AUTH_COOKIE"]] = "invalid"
+
+        res = self.client.get(USER_URL_ME)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_header_token(self):
+        """Test tokens sent in the authorization header are cached too."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        client.get(USER_URL_ME)
+
+        with self.assertNumQueries(0):
+            res = client.get(USER_URL_ME)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class UserSnapshotCacheTests(TestCase):
+    """Test the token user snapshot cache."""
+
+    def setUp(self):
+        self.user = create_user(email="user123@example.com", username="user123", password="StrongPassword123")
+
+    def test_expires_with_token(self):
+        """Test entries expire with their token."""
+        snapshots = UserSnapshotCache(max_size=10, timeout=300)
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=timedelta(seconds=30))
+        snapshots.set("token", token, self.user)
+
+        self.assertIsNotNone(snapshots.get("token"))
+
+        with patch("users.authentication.time.time", return_value=time.time() + 60):
+            self.assertIsNone(snapshots.get("token"))
+
+    def test_expires_after_timeout(self):
+        """Test entries expire after the timeout even if the token is still valid."""
+        snapshots = UserSnapshotCache(max_size=10, timeout=1)
+        snapshots.set("token", AccessToken.for_user(self.user), self.user)
+
+        self.assertIsNotNone(snapshots.get("token"))
+        with patch("users.authentication.time.time", return_value=time.time() + 2):
+            self.assertIsNone(snapshots.get("token"))
+
+    def test_evicts_least_recently_used(self):
+        """Test the least recently used entry is evicted once the cache is full."""
+        snapshots = UserSnapshotCache(max_size=2, timeout=300)
+        for raw_token in ("a", "b"):
+            snapshots.set(raw_token, AccessToken.for_user(self.user), self.user)
+        snapshots.get("a")
+        snapshots.set("c", AccessToken.for_user(self.user), self.user)
+
+        self.assertEqual(["a", "c"], list(snapshots.entries))
+
+    def test_invalidate_user(self):
+        """Test invalidating a user drops only their entries."""
+        other = create_user(email="other@example.com", username="other", password="StrongPassword123")
+        snapshots = UserSnapshotCache(max_size=10, timeout=300)
+        snapshots.set("a", AccessToken.for_user(self.user), self.user)
+        snapshots.set("b", AccessToken.for_user(other), other)
+
+        snapshots.invalidate_user(self.user.pk)
+
+        self.assertEqual(["b"], list(snapshots.entries))
+
+
+class IsAuthorTests(TestCase):
+    """Test the author permission."""
+
+    def test_compares_author_id(self):
+        """Test the permission doesn't load the author of the object."""
+        user = create_user(email="user123@example.com", username="user123", password="StrongPassword123")
+        other = create_user(email="other@example.com", username="other", password="StrongPassword123")
+        product = create_product(create_category("electronics"), user)
+        product.refresh_from_db()
+        request = APIRequestFactory().patch("/")
+
+        with self.assertNumQueries(0):
+            request.user = user
+            self.assertTrue(IsAuthor().has_object_permission(request, None, product))
+            request.user = other
+            self.assertFalse(IsAuthor().has_object_permission(request, None, product))
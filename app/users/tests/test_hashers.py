@@ -0,0 +1,109 @@
+from unittest.mock import patch
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.hashers import ScryptPasswordHasher, hashing_pool, rehash_password, verify_password
+from users.tests.test_users_api import CREATE_USER_URL, USER_MODEL, create_user
+
+LOGIN_URL = reverse("users:rest_login")
+USER_URL = reverse("users:rest_user_details")
+PBKDF2_HASHER = "django.contrib.auth.hashers.PBKDF2PasswordHasher"
+
+
+class PasswordHashingTests(TestCase):
+    """Test hashing passwords with the configured hasher in the hashing pool."""
+
+    def test_register_hashes_with_preferred_hasher(self):
+        """Test registering a user hashes the password with scrypt."""
+        payload = {"email": "User123@EXAMPLE.com", "username": "user123", "password": "StrongPassword123"}
+
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = USER_MODEL.objects.get(username="user123")
+        self.assertEqual("User123@example.com", user.email)
+        self.assertTrue(user.password.startswith("scrypt$"))
+        self.assertTrue(user.check_password(payload["password"]))
+
+    def test_verify_password(self):
+        """Test verifying reports wrong passwords and hashes needing an update."""
+        self.assertEqual((True, False), verify_password("secret", make_password("secret")))
+        self.assertEqual((False, False), verify_password("wrong", make_password("secret")))
+        self.assertEqual((True, True), verify_password("secret", make_password("secret", hasher="pbkdf2_sha256")))
+
+    def test_work_factor_change_needs_update(self):
+        """Test hashes of a lower scrypt work factor are upgraded."""
+        encoded = make_password("secret")
+
+        with patch.object(ScryptPasswordHasher, "work_factor", ScryptPasswordHasher.work_factor * 2):
+            self.assertEqual((True, True), verify_password("secret", encoded))
+
+    def test_login(self):
+        """Test logging in with a correct and a wrong password."""
+        create_user(email="user123@example.com", username="user123", password="StrongPassword123")
+        client = APIClient()
+
+        res = client.post(LOGIN_URL, {"username": "user123", "password": "StrongPassword123"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = client.post(LOGIN_URL, {"username": "user123", "password": "WrongPassword123"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = client.post(LOGIN_URL, {"username": "nobody", "password": "StrongPassword123"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_password_change_hashed_in_pool(self):
+        """Test changing the password through the user API hashes it in the hashing pool."""
+        user = create_user(email="user123@example.com", username="user123", password="StrongPassword123")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with patch.object(hashing_pool, "run", wraps=hashing_pool.run) as run:
+            res = client.patch(USER_URL, {"password": "ChangedPassword123"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        run.assert_called_once_with(make_password, "ChangedPassword123")
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("scrypt$"))
+        self.assertTrue(check_password("ChangedPassword123", user.password))
+
+
+class PasswordRehashTests(TransactionTestCase):
+    """Test outdated password hashes are replaced after a login."""
+
+    def setUp(self):
+        self.user = create_user(email="user123@example.com", username="user123", password="StrongPassword123")
+        self.legacy = make_password("StrongPassword123", hasher="pbkdf2_sha256")
+        USER_MODEL.objects.filter(pk=self.user.pk).update(password=self.legacy)
+
+    def test_login_rehashes_legacy_hash(self):
+        """Test a login with a PBKDF2 hash replaces it with a scrypt hash in the background."""
+        futures = []
+        submit = hashing_pool.submit
+
+        def record(*args):
+            futures.append(submit(*args))
+            return futures[-1]
+
+        with patch.object(hashing_pool, "submit", record):
+            res = APIClient().post(LOGIN_URL, {"username": "user123", "password": "StrongPassword123"})
+        for future in futures:
+            future.result()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user = USER_MODEL.objects.get(pk=self.user.pk)
+        self.assertTrue(user.password.startswith("scrypt$"))
+        self.assertTrue(user.check_password("StrongPassword123"))
+
+    def test_rehash_keeps_changed_password(self):
+        """Test a rehash doesn't overwrite a password changed after the login."""
+        with self.settings(PASSWORD_HASHERS=[PBKDF2_HASHER]):
+            changed = make_password("ChangedPassword123")
+        USER_MODEL.objects.filter(pk=self.user.pk).update(password=changed)
+
+        rehash_password(USER_MODEL, self.user.pk, "StrongPassword123", self.legacy)
+
+        self.assertEqual(changed, USER_MODEL.objects.get(pk=self.user.pk).password)
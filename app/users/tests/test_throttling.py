@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.tests.test_users_api import CREATE_USER_URL
+from users.throttling import TokenBuckets, registration_buckets
+
+
+@override_settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": {"register": "2/minute"}})
+class RegistrationThrottleTests(TestCase):
+    """Test throttling registrations by client IP."""
+
+    def setUp(self):
+        registration_buckets.reset()
+        self.client = APIClient()
+
+    def register(self, index, ip="10.0.0.1", **extra):
+        payload = {"email": f"user{index}@example.com", "username": f"user{index}", "password": "StrongPassword123"}
+        return self.client.post(CREATE_USER_URL, payload, REMOTE_ADDR=ip, **extra)
+
+    def test_burst_then_throttled(self):
+        """Test a client can register up to the burst size, then has to wait."""
+        self.assertEqual(status.HTTP_201_CREATED, self.register(1).status_code)
+        self.assertEqual(status.HTTP_201_CREATED, self.register(2).status_code)
+
+        res = self.register(3)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual("30", res["Retry-After"])
+
+    def test_clients_throttled_separately(self):
+        """Test every client IP has its own bucket."""
+        self.register(1)
+        self.register(2)
+
+        self.assertEqual(status.HTTP_201_CREATED, self.register(3, ip="10.0.0.2").status_code)
+
+    def test_forwarded_for_ignored_without_proxies(self):
+        """Test clients can't get a new bucket by sending another X-Forwarded-For."""
+        self.register(1, HTTP_X_FORWARDED_FOR="1.1.1.1")
+        self.register(2, HTTP_X_FORWARDED_FOR="2.2.2.2")
+
+        res = self.register(3, HTTP_X_FORWARDED_FOR="3.3.3.3")
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": {"register": "2/minute"}, "NUM_PROXIES": 1})
+    def test_forwarded_for_behind_trusted_proxy(self):
+        """Test clients behind the trusted proxies are throttled by the address the proxy appended."""
+        self.register(1, HTTP_X_FORWARDED_FOR="1.1.1.1, 10.1.0.1")
+        self.register(2, HTTP_X_FORWARDED_FOR="2.2.2.2, 10.1.0.1")
+
+        res = self.register(3, HTTP_X_FORWARDED_FOR="10.1.0.2")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual({"10.1.0.1", "10.1.0.2"}, set(registration_buckets.buckets))
+
+    def test_tokens_refill(self):
+        """Test tokens are added back over time."""
+        with patch("users.throttling.time.monotonic", return_value=1000):
+            self.register(1)
+            self.register(2)
+        with patch("users.throttling.time.monotonic", return_value=1030):
+            self.assertEqual(status.HTTP_201_CREATED, self.register(3).status_code)
+            self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, self.register(4).status_code)
+
+    def test_counters_exposed(self):
+        """Test the throttle counters are part of the metrics."""
+        self.register(1)
+        self.register(2)
+        self.register(3)
+
+        content = self.client.get(reverse("metrics")).content.decode()
+
+        self.assertIn("registration_throttle_allowed_total 2", content)
+        self.assertIn("registration_throttle_throttled_total 1", content)
+        self.assertIn("registration_throttle_clients 1", content)
+        self.assertEqual({"allowed": 2, "throttled": 1, "evicted": 0, "clients": 1}, registration_buckets.as_dict())
+
+
+class TokenBucketsTests(TestCase):
+    """Test the token buckets."""
+
+    def test_least_recent_client_evicted(self):
+        """Test the least recently seen client is dropped once there are too many."""
+        buckets = TokenBuckets(max_clients=2)
+        for key in ("a", "b", "a", "c"):
+            buckets.take(key, capacity=1, refill_rate=1, now=0)
+
+        self.assertEqual(["a", "c"], list(buckets.buckets))
+        self.assertEqual(1, buckets.evicted)
@@ -1,8 +1,11 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from users.throttling import registration_buckets
 
 CREATE_USER_URL = reverse("users:register")
 USER_URL_ME = reverse("users:rest_user_details")
@@ -14,10 +17,16 @@ def create_user(**params):
     return USER_MODEL.objects.create_user(**params)
 
 
+def get_user_statements(ctx):
+    """Return the kind of the captured statements on the user table."""
+    return [query["sql"].split()[0] for query in ctx.captured_queries if '"core_user"' in query["sql"]]
+
+
 class PublicUserApiTests(TestCase):
     """Test the public features of the user API."""
 
     def setUp(self):
+        registration_buckets.reset()
         self.client = APIClient()
 
     def test_create_user(self):
@@ -53,6 +62,29 @@ class PublicUserApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_unique_username_and_email(self):
+        """Test both taken fields are reported, found after the insert fails in a single query."""
+        payload = {"email": "user123@example.com", "username": "user123", "password": "StrongPassword123"}
+        create_user(**payload)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(["INSERT", "SELECT"], get_user_statements(ctx))
+        self.assertEqual(["user with this email already exists."], res.data["email"])
+        self.assertEqual(["A user with that username already exists."], res.data["username"])
+
+    def test_create_user_without_uniqueness_lookups(self):
+        """Test registering runs the insert without looking up the email and username first."""
+        payload = {"email": "user123@example.com", "username": "user123", "password": "StrongPassword123"}
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(["INSERT"], get_user_statements(ctx))
+
     def test_retrieve_user_unauthorized(self):
         """Test authentication is required for users."""
         res = self.client.get(USER_URL_ME)
@@ -0,0 +1,103 @@
+"""
+Token bucket throttling of registrations by client IP.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from core.metrics import registry
+from core.throttling import ClientAddressMixin, parse_rate
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBuckets:
+    """Process-local token buckets by client, the least recently seen client is dropped beyond `max_clients`."""
+
+    def __init__(self, max_clients):
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+        self.allowed = 0
+        self.throttled = 0
+        self.evicted = 0
+
+    def take(self, key, capacity, refill_rate, now):
+        """Take a token from the bucket of `key` and return 0, or the seconds until a token is available."""
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / refill_rate
+                self.throttled += 1
+            self.buckets[key] = (tokens, now)
+            while len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+                self.evicted += 1
+            return wait
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+            self.allowed = self.throttled = self.evicted = 0
+
+    def as_dict(self):
+        return {
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "evicted": self.evicted,
+            "clients": len(self.buckets),
+        }
+
+
+registration_buckets = TokenBuckets(max_clients=100000)
+registry.add_value(
+    "registration_throttle_allowed_total",
+    "Registrations let through.",
+    "counter",
+    lambda: registration_buckets.allowed,
+)
+registry.add_value(
+    "registration_throttle_throttled_total",
+    "Registrations refused by the throttle.",
+    "counter",
+    lambda: registration_buckets.throttled,
+)
+registry.add_value(
+    "registration_throttle_clients", "Clients with a token bucket.", "gauge", lambda: len(registration_buckets.buckets)
+)
+
+
+class RegistrationThrottle(ClientAddressMixin, BaseThrottle):
+    """Token bucket throttle by client IP, see `ClientAddressMixin`.
+
+    The `register` rate of `DEFAULT_THROTTLE_RATES`, like `20/hour`, is both the burst size
+    and the refill rate of a bucket. Without a rate registrations aren't throttled.
+    """
+
+    scope = "register"
+    buckets = registration_buckets
+
+    def get_rate(self):
+        """Return the capacity and the tokens added per second of the buckets, or `None` without a rate."""
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if rate is None:
+            return None
+        count, period = parse_rate(rate)
+        return count, count / period
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        if rate is None:
+            self.wait_time = None
+            return True
+        capacity, refill_rate = rate
+        self.wait_time = self.buckets.take(self.get_ident(request), capacity, refill_rate, time.monotonic())
+        return self.wait_time == 0
+
+    def wait(self):
+        return self.wait_time
@@ -1,8 +1,10 @@
 from rest_framework import generics
 from users.serializers import RegisterUserSerializer
+from users.throttling import RegistrationThrottle
 
 
 class RegisterUserView(generics.CreateAPIView):
     """Create a new user in the system."""
 
     serializer_class = RegisterUserSerializer
+    throttle_classes = [RegistrationThrottle]